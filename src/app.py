@@ -2,47 +2,114 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from pathlib import Path
+from typing import Dict, Any
 import logging
+import time
 
 from utils.logger_config import setup_logger
 from features.cargador_datos_csv import CargadorDatosCSV
 from features.gestor_clientes import GestorClientes
+from features.enrutador_consultas import EnrutadorConsultas
 from model.sistema_rag import SistemaRAG
 
 # Configurar logging
 setup_logger("bank_app.log")
 
+# Configurar rutas
+RUTA_CSV = Path("data/raw_data/BankCustomerChurnPrediction.csv")
+DIRECTORIO_VECTOR_DB = Path("vector_db")
+
+
+@st.cache_resource(show_spinner="Cargando sistema...")
+def obtener_recursos_compartidos(ruta_csv: str, vector_db: str) -> Dict[str, Any]:
+    """
+    Crea los componentes pesados una sola vez por proceso del servidor.
+
+    Streamlit comparte el resultado entre todas las sesiones y serializa
+    las llamadas concurrentes con los mismos argumentos, de modo que el CSV,
+    la base vectorial y el modelo se cargan una única vez. El sistema RAG
+    se prepara en segundo plano para no retrasar el primer renderizado.
+
+    Args:
+        ruta_csv: Ruta al archivo de datos
+        vector_db: Directorio de la base vectorial
+
+    Returns:
+        Diccionario con cargador, df, gestor y rag
+
+    Raises:
+        ValueError: Si no se pueden cargar los datos
+    """
+    cargador = CargadorDatosCSV(ruta_csv)
+    df = cargador.cargar_datos()
+    if df is None:
+        raise ValueError("Error al cargar los datos")
+
+    gestor = GestorClientes(df)
+    logging.info("Recursos compartidos de la aplicación inicializados")
+    return {
+        'cargador': cargador,
+        'df': df,
+        'gestor': gestor,
+        'rag': SistemaRAG(
+            ruta_archivo=ruta_csv,
+            persist_directory=vector_db,
+            inicializacion_en_segundo_plano=True,
+            enrutador=EnrutadorConsultas(gestor),
+            modo_ingesta="mixto"
+        )
+    }
+
 
 class BankApp:
     def __init__(self):
         """Inicializa la aplicación bancaria."""
+        self.cargador = None
+        self.df = None
+        self.gestor = None
+        self.rag = None
         self.inicializar_sistema()
 
     def inicializar_sistema(self):
-        """Inicializa los componentes del sistema."""
+        """
+        Enlaza la sesión con los componentes compartidos del proceso.
+
+        La instancia solo guarda referencias, por lo que cada sesión
+        de navegador es ligera.
+        """
         try:
-            # Configurar rutas
-            ruta_csv = Path("data/raw_data/BankCustomerChurnPrediction.csv")
-            vector_db = Path("vector_db")
-
-            # Cargar datos
-            self.cargador = CargadorDatosCSV(str(ruta_csv))
-            self.df = self.cargador.cargar_datos()
-
-            if self.df is not None:
-                self.gestor = GestorClientes(self.df)
-                self.rag = SistemaRAG(
-                    ruta_archivo=str(ruta_csv),
-                    persist_directory=str(vector_db)
-                )
-                return True
-            return False
+            recursos = obtener_recursos_compartidos(str(RUTA_CSV), str(DIRECTORIO_VECTOR_DB))
+            self.cargador = recursos['cargador']
+            self.df = recursos['df']
+            self.gestor = recursos['gestor']
+            self.rag = recursos['rag']
+            return True
 
         except Exception as e:
             st.error(f"Error al inicializar el sistema: {str(e)}")
             logging.error(f"Error de inicialización: {str(e)}")
             return False
 
+    def mostrar_estado_rag(self) -> bool:
+        """
+        Muestra en la barra lateral el estado de preparación del sistema RAG.
+
+        Returns:
+            True si el sistema RAG está listo para consultas
+        """
+        estado = self.rag.obtener_estado()
+        if estado['fase'] == 'listo':
+            st.sidebar.success(f"Sistema RAG listo ({estado['segundos']:.1f} s)")
+            return True
+        if estado['fase'] == 'error':
+            st.sidebar.error(f"Sistema RAG no disponible: {estado['error']}")
+            return False
+        st.sidebar.progress(
+            estado['progreso'],
+            text=f"Preparando sistema RAG: {estado['fase'].replace('_', ' ')}"
+        )
+        return False
+
     def mostrar_estadisticas_generales(self):
         """Muestra estadísticas generales del banco."""
         st.subheader("📊 Estadísticas Generales")
@@ -132,23 +199,39 @@ class BankApp:
             logging.error(f"Error en análisis de cliente: {str(e)}")
 
     def realizar_consulta_rag(self, consulta):
-        """Realiza una consulta al sistema RAG."""
+        """Realiza una consulta al sistema RAG mostrando la respuesta en streaming."""
         try:
             with st.spinner('Analizando datos...'):
-                resultado = self.rag.realizar_consulta(consulta)
-
-                st.subheader("🤖 Respuesta del Sistema")
-                st.write(resultado['respuesta'])
-
-                with st.expander("Ver detalles del análisis"):
-                    st.write("**Metadatos:**")
-                    st.write(f"- Documentos analizados: {resultado['metadatos']['num_documentos']}")
-                    st.write(f"- Tiempo de respuesta: {resultado['metadatos']['tiempo_respuesta']:.2f} segundos")
-                    st.write(f"- Modelo utilizado: {resultado['metadatos']['modelo']}")
-
-                    st.write("\n**Documentos fuente utilizados:**")
-                    for i, doc in enumerate(resultado['documentos_fuente'], 1):
-                        st.text(f"Documento {i}:\n{doc}\n")
+                eventos = self.rag.realizar_consulta_stream(consulta)
+                documentos = next(eventos)['documentos_fuente']
+
+            st.subheader("🤖 Respuesta del Sistema")
+            final = {}
+
+            def tokens():
+                for evento in eventos:
+                    if evento['tipo'] == 'token':
+                        yield evento['texto']
+                    elif evento['tipo'] == 'fin':
+                        final.update(evento)
+
+            st.write_stream(tokens())
+            metadatos = final['metadatos']
+
+            with st.expander("Ver detalles del análisis"):
+                st.write("**Metadatos:**")
+                st.write(f"- Ruta de la consulta: {metadatos.get('ruta', 'abierta')}")
+                st.write(f"- Documentos analizados: {metadatos['num_documentos']}")
+                if metadatos['tiempo_primer_token'] is not None:
+                    st.write(f"- Tiempo hasta el primer token: {metadatos['tiempo_primer_token']:.2f} segundos")
+                st.write(f"- Tiempo de respuesta: {metadatos['tiempo_respuesta']:.2f} segundos")
+                st.write(f"- Modelo utilizado: {metadatos['modelo']}")
+                if metadatos.get('cache_respuesta'):
+                    st.write(f"- Respuesta reutilizada de la caché (similitud {metadatos['similitud_cache']:.3f})")
+
+                st.write("\n**Documentos fuente utilizados:**")
+                for i, doc in enumerate(documentos, 1):
+                    st.text(f"Documento {i}:\n{doc}\n")
 
         except Exception as e:
             st.error(f"Error en la consulta: {str(e)}")
@@ -156,6 +239,7 @@ class BankApp:
 
 
 def main():
+    inicio_renderizado = time.perf_counter()
     st.set_page_config(
         page_title="Sistema Bancario Inteligente",
         page_icon="🏦",
@@ -176,6 +260,7 @@ def main():
         "Consultas Inteligentes"
     ]
     seleccion = st.sidebar.radio("Seleccione una opción:", opciones)
+    rag_listo = st.session_state.app.mostrar_estado_rag()
 
     if seleccion == "Dashboard General":
         st.session_state.app.mostrar_estadisticas_generales()
@@ -190,6 +275,12 @@ def main():
         if st.button("Analizar Cliente"):
             st.session_state.app.analizar_cliente(customer_id)
 
+    elif not rag_listo:  # Consultas Inteligentes mientras el RAG se prepara
+        st.subheader("💡 Consultas Inteligentes")
+        st.info("El sistema de consultas se está preparando. El resto de la aplicación ya está disponible.")
+        if st.button("Actualizar estado"):
+            st.rerun()
+
     else:  # Consultas Inteligentes
         st.subheader("💡 Consultas Inteligentes")
 
@@ -214,6 +305,17 @@ def main():
             else:
                 st.warning("Por favor, ingrese una consulta")
 
+    # Medir el tiempo hasta el primer renderizado de la sesión
+    if 'tiempo_primer_renderizado' not in st.session_state:
+        st.session_state.tiempo_primer_renderizado = time.perf_counter() - inicio_renderizado
+        logging.info(
+            f"Tiempo hasta primer renderizado: "
+            f"{st.session_state.tiempo_primer_renderizado:.2f} segundos"
+        )
+    st.sidebar.caption(
+        f"Primer renderizado: {st.session_state.tiempo_primer_renderizado:.2f} s"
+    )
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
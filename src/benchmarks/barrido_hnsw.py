@@ -0,0 +1,114 @@
+"""
+Barrido de los parámetros HNSW de Chroma sobre el CSV de clientes.
+
+Embebe los documentos una vez y, para cada combinación de hnsw:M,
+hnsw:construction_ef y hnsw:search_ef, reconstruye el índice (distancia
+coseno) en un directorio temporal y registra el tiempo de construcción
+del índice, el tamaño en disco, la latencia p50/p99 por consulta y el
+recall@k frente a la búsqueda exacta de VectorStoreNumpy. Los resultados
+sirven para elegir hnsw_m, hnsw_construction_ef y hnsw_search_ef de
+SistemaRAG.
+
+Uso (desde src/):
+    python -m benchmarks.barrido_hnsw
+    python -m benchmarks.barrido_hnsw --m 8 16 32 --construction-ef 64 200 --search-ef 10 50 100
+    python -m benchmarks.barrido_hnsw --embeddings-falsos --consultas 200 --salida resultados/hnsw.json
+"""
+import sys
+import itertools
+import argparse
+import logging
+from typing import Any, Dict, List
+
+import pandas as pd
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
+
+from features.vector_store_numpy import calcular_recall
+from utils.document_processor import DataProcessor
+from benchmarks.utilidades import guardar_resultados
+from benchmarks.benchmark_empaquetado import CONSULTAS
+from benchmarks.benchmark_backend_vectorial import embeber, medir
+
+
+def barrer(
+        embeddings,
+        embebidos,
+        vectores: List[List[float]],
+        k: int,
+        valores_m: List[int],
+        valores_construction_ef: List[int],
+        valores_search_ef: List[int]
+) -> List[Dict[str, Any]]:
+    """Mide cada combinación de parámetros HNSW frente a la búsqueda exacta (embebidos: ver embeber)."""
+    exacto = medir('numpy-float32', embeddings, embebidos, vectores, k)
+    resultados = []
+    for m, construction_ef, search_ef in itertools.product(
+            valores_m, valores_construction_ef, valores_search_ef
+    ):
+        parametros = {'hnsw:M': m, 'hnsw:construction_ef': construction_ef, 'hnsw:search_ef': search_ef}
+        logging.info(f"Midiendo {parametros}")
+        medida = medir('chroma', embeddings, embebidos, vectores, k, parametros_hnsw=parametros)
+        resultados.append({
+            'm': m,
+            'construction_ef': construction_ef,
+            'search_ef': search_ef,
+            'tiempo_construccion': medida['tiempo_construccion'],
+            'bytes_indice': medida['bytes_indice'],
+            'latencia': medida['latencia'],
+            'recall': calcular_recall(medida['resultados'], exacto['resultados'])
+        })
+    return resultados
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="../data/raw_data/BankCustomerChurnPrediction.csv")
+    parser.add_argument("--modelo-embeddings", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--embeddings-falsos", action="store_true",
+                        help="Usa embeddings deterministas en lugar de FastEmbed")
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--consultas", type=int, default=100,
+                        help="Consultas medidas (las de ejemplo más textos de filas)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--salida", default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    df = pd.read_csv(args.csv)
+    documentos = [
+        (str(doc.metadata['customer_id']), doc) for doc in DataProcessor.create_csv_docs(df)
+    ]
+    if args.embeddings_falsos:
+        embeddings = DeterministicFakeEmbedding(size=384)
+    else:
+        embeddings = FastEmbedEmbeddings(model_name=args.modelo_embeddings)
+    textos = CONSULTAS + [doc.page_content for _, doc in documentos]
+    vectores = [embeddings.embed_query(texto) for texto in textos[:args.consultas]]
+
+    resultados = barrer(
+        embeddings, embeber(embeddings, documentos), vectores, args.k, args.m, args.construction_ef, args.search_ef
+    )
+
+    print(f"{'M':>4} {'constr_ef':>9} {'search_ef':>9} {'constr. (s)':>11} {'índice (MB)':>11} "
+          f"{'p50 (ms)':>9} {'p99 (ms)':>9} {'recall@' + str(args.k):>9}")
+    for r in resultados:
+        print(
+            f"{r['m']:>4} {r['construction_ef']:>9} {r['search_ef']:>9} {r['tiempo_construccion']:>11.2f} "
+            f"{r['bytes_indice'] / 2 ** 20:>11.2f} {r['latencia']['p50'] * 1000:>9.3f} "
+            f"{r['latencia']['p99'] * 1000:>9.3f} {r['recall']:>9.3f}"
+        )
+    if args.salida:
+        guardar_resultados({
+            'vectores': len(documentos),
+            'consultas': len(vectores),
+            'k': args.k,
+            'resultados': resultados
+        }, args.salida)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
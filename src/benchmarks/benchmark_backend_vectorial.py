@@ -0,0 +1,220 @@
+"""
+Compara la búsqueda de Chroma (HNSW) con la búsqueda exacta de VectorStoreNumpy.
+
+Embebe los documentos una sola vez e indexa los mismos vectores en Chroma
+(distancia coseno, como la referencia) y en VectorStoreNumpy con cada
+precisión indicada, persistidos en directorios temporales. Registra el
+tiempo de construcción del índice (sin el modelo de embeddings), el tamaño
+en disco, la latencia por consulta, la latencia de un lote de consultas y
+el recall@k frente al resultado exacto de NumPy en float32.
+
+Uso (desde src/):
+    python -m benchmarks.benchmark_backend_vectorial
+    python -m benchmarks.benchmark_backend_vectorial --embeddings-falsos --consultas 200
+    python -m benchmarks.benchmark_backend_vectorial --precisiones float32 int8 --factor-reevaluacion 4
+"""
+import sys
+import time
+import uuid
+import shutil
+import argparse
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
+from langchain_community.vectorstores.chroma import Chroma
+
+from features.vector_store_numpy import VectorStoreNumpy, calcular_recall
+from features.pipeline_embeddings import PipelineEmbeddings
+from utils.document_processor import DataProcessor
+from benchmarks.utilidades import resumir_latencias, guardar_resultados
+from benchmarks.benchmark_empaquetado import CONSULTAS, tamano_directorio
+
+# Vectores por escritura al construir un índice (Chroma limita el tamaño de cada upsert)
+TAMANO_LOTE_ESCRITURA = 1000
+
+
+def embeber(embeddings, documentos) -> List[Tuple[str, List[float], Document]]:
+    """
+    Calcula los embeddings de los documentos con PipelineEmbeddings.
+
+    Se llama una vez por ejecución y los vectores se reutilizan en cada
+    índice construido, de modo que el tiempo de construcción no mide el modelo.
+
+    Returns:
+        Lista de (id, vector, documento)
+    """
+    embebidos = []
+
+    def recoger(ids: List[str], vectores: List[List[float]], docs) -> None:
+        embebidos.extend(zip(ids, vectores, docs))
+
+    PipelineEmbeddings(embeddings, recoger).ejecutar(documentos)
+    return embebidos
+
+
+def construir(
+        backend: str,
+        directorio: Path,
+        embeddings,
+        embebidos: List[Tuple[str, List[float], Document]],
+        factor_reevaluacion: int = 0,
+        parametros_hnsw: Optional[Dict[str, int]] = None
+) -> Any:
+    """
+    Crea la base vectorial de un backend ('chroma' o 'numpy-<precisión>')
+    y escribe los vectores calculados por embeber().
+
+    La colección de Chroma usa distancia coseno, la misma que la búsqueda
+    exacta de VectorStoreNumpy; parametros_hnsw son los metadatos 'hnsw:*'.
+    """
+    if backend.startswith('numpy'):
+        vector_db = VectorStoreNumpy(
+            embedding_function=embeddings,
+            persist_directory=str(directorio),
+            precision=backend.split('-')[1],
+            factor_reevaluacion=factor_reevaluacion
+        )
+
+        def escribir(ids: List[str], vectores: List[List[float]], docs) -> None:
+            vector_db.upsert(ids, vectores, [d.page_content for d in docs], [d.metadata for d in docs])
+    else:
+        vector_db = Chroma(
+            collection_name=f"backend_{uuid.uuid4().hex}",
+            persist_directory=str(directorio),
+            embedding_function=embeddings,
+            collection_metadata={'hnsw:space': 'cosine', **(parametros_hnsw or {})}
+        )
+
+        def escribir(ids: List[str], vectores: List[List[float]], docs) -> None:
+            vector_db._collection.upsert(
+                ids=ids,
+                embeddings=vectores,
+                documents=[d.page_content for d in docs],
+                metadatas=[d.metadata for d in docs]
+            )
+
+    for inicio in range(0, len(embebidos), TAMANO_LOTE_ESCRITURA):
+        ids, vectores, docs = zip(*embebidos[inicio:inicio + TAMANO_LOTE_ESCRITURA])
+        escribir(list(ids), list(vectores), list(docs))
+    if isinstance(vector_db, VectorStoreNumpy):
+        vector_db.persistir()
+    return vector_db
+
+
+def buscar_lote(vector_db, vectores: List[List[float]], k: int) -> List[List[str]]:
+    """Textos recuperados para cada vector con una sola petición al backend."""
+    if isinstance(vector_db, VectorStoreNumpy):
+        encontrados = vector_db.buscar_lote(vectores, k=k)
+        return [[doc.page_content for doc in docs] for docs in encontrados]
+    return vector_db._collection.query(
+        query_embeddings=vectores, n_results=k, include=["documents"]
+    )['documents']
+
+
+def medir(
+        backend: str,
+        embeddings,
+        embebidos: List[Tuple[str, List[float], Document]],
+        vectores: List[List[float]],
+        k: int,
+        factor_reevaluacion: int = 0,
+        parametros_hnsw: Optional[Dict[str, int]] = None
+) -> Dict[str, Any]:
+    """Construye el índice de un backend con los vectores ya calculados y mide su rendimiento."""
+    directorio = Path(tempfile.mkdtemp(prefix=f"benchmark_{backend}_"))
+    try:
+        inicio = time.perf_counter()
+        vector_db = construir(
+            backend, directorio, embeddings, embebidos, factor_reevaluacion, parametros_hnsw
+        )
+        tiempo_construccion = time.perf_counter() - inicio
+
+        latencias, resultados = [], []
+        for vector in vectores:
+            t0 = time.perf_counter()
+            resultados.append(buscar_lote(vector_db, [vector], k)[0])
+            latencias.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        buscar_lote(vector_db, vectores, k)
+        tiempo_lote = time.perf_counter() - t0
+
+        return {
+            'backend': backend,
+            'tiempo_construccion': tiempo_construccion,
+            'bytes_indice': tamano_directorio(directorio),
+            'latencia': resumir_latencias(latencias),
+            'tiempo_lote': tiempo_lote,
+            'resultados': resultados
+        }
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="../data/raw_data/BankCustomerChurnPrediction.csv")
+    parser.add_argument("--modelo-embeddings", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--embeddings-falsos", action="store_true",
+                        help="Usa embeddings deterministas en lugar de FastEmbed")
+    parser.add_argument("--consultas", type=int, default=100,
+                        help="Consultas medidas (se repiten las de ejemplo y se añaden textos de filas)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--precisiones", nargs="+", default=["float32", "float16", "int8"],
+                        choices=list(VectorStoreNumpy.PRECISIONES))
+    parser.add_argument("--factor-reevaluacion", type=int, default=0,
+                        help="Candidatos por resultado reordenados en float32 (0 desactiva)")
+    parser.add_argument("--salida", default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    df = pd.read_csv(args.csv)
+    documentos = [
+        (str(doc.metadata['customer_id']), doc) for doc in DataProcessor.create_csv_docs(df)
+    ]
+    if args.embeddings_falsos:
+        embeddings = DeterministicFakeEmbedding(size=384)
+    else:
+        embeddings = FastEmbedEmbeddings(model_name=args.modelo_embeddings)
+
+    textos = CONSULTAS + [doc.page_content for _, doc in documentos]
+    vectores = [embeddings.embed_query(texto) for texto in textos[:args.consultas]]
+    embebidos = embeber(embeddings, documentos)
+
+    # NumPy en float32 es exacto: sirve de referencia para el recall del resto
+    exacto = medir('numpy-float32', embeddings, embebidos, vectores, args.k)
+    medidos = [exacto] + [
+        medir(f"numpy-{precision}", embeddings, embebidos, vectores, args.k, args.factor_reevaluacion)
+        for precision in args.precisiones if precision != 'float32'
+    ] + [medir('chroma', embeddings, embebidos, vectores, args.k)]
+    for r in medidos:
+        r['recall'] = calcular_recall(r['resultados'], exacto['resultados'])
+
+    print(f"{'backend':>13} {'constr. (s)':>11} {'índice (MB)':>11} {'p50 (ms)':>9} "
+          f"{'p95 (ms)':>9} {'lote (ms)':>10} {'recall@' + str(args.k):>9}")
+    for r in medidos:
+        print(
+            f"{r['backend']:>13} {r['tiempo_construccion']:>11.2f} {r['bytes_indice'] / 2 ** 20:>11.2f} "
+            f"{r['latencia']['p50'] * 1000:>9.3f} {r['latencia']['p95'] * 1000:>9.3f} "
+            f"{r['tiempo_lote'] * 1000:>10.2f} {r['recall']:>9.3f}"
+        )
+    if args.salida:
+        guardar_resultados({
+            'vectores': len(documentos),
+            'consultas': len(vectores),
+            'resultados': [
+                {clave: valor for clave, valor in r.items() if clave != 'resultados'}
+                for r in medidos
+            ]
+        }, args.salida)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Compara el rendimiento de la ruta síncrona y la asíncrona de SistemaRAG.
+
+Ejecuta el mismo lote de consultas de forma secuencial con realizar_consulta
+y con arealizar_consulta a distintos niveles de concurrencia, y muestra
+consultas por segundo y latencias. La caché de respuestas se desactiva para
+que cada consulta llegue al modelo.
+
+Uso (desde src/, con Ollama en marcha):
+    python -m benchmarks.benchmark_concurrencia --consultas 16 --concurrencia 1 2 4 8
+"""
+import sys
+import time
+import asyncio
+import argparse
+import logging
+from typing import Any, Dict, List
+
+from model.sistema_rag import SistemaRAG
+from benchmarks.utilidades import resumir_latencias, guardar_resultados
+
+CONSULTAS_BASE = [
+    "¿Cuáles son los factores más comunes de deserción?",
+    "¿Cómo influye el credit score en la deserción?",
+    "¿Qué relación hay entre el balance y la retención?",
+    "¿Los clientes activos tienen menor tasa de deserción?",
+    "¿Qué países tienen más clientes con balance alto?",
+    "¿Cómo se distribuye la antigüedad de los clientes?",
+    "¿Qué productos tienen los clientes que abandonan?",
+    "¿Influye la edad en la deserción?"
+]
+
+
+def generar_consultas(n: int) -> List[str]:
+    """Genera n consultas distintas a partir de las consultas base."""
+    return [f"{CONSULTAS_BASE[i % len(CONSULTAS_BASE)]} (#{i})" for i in range(n)]
+
+
+def medir_sincrono(sistema: SistemaRAG, consultas: List[str], max_tokens: int) -> Dict[str, Any]:
+    """Ejecuta las consultas una tras otra con la ruta síncrona."""
+    latencias = []
+    inicio = time.perf_counter()
+    for consulta in consultas:
+        t0 = time.perf_counter()
+        sistema.realizar_consulta(consulta, max_tokens=max_tokens)
+        latencias.append(time.perf_counter() - t0)
+    total = time.perf_counter() - inicio
+    return {'modo': 'sincrono', 'concurrencia': 1, 'segundos': total,
+            'consultas_por_segundo': len(consultas) / total, 'latencias': resumir_latencias(latencias)}
+
+
+async def medir_asincrono(
+        sistema: SistemaRAG,
+        consultas: List[str],
+        concurrencia: int,
+        max_tokens: int
+) -> Dict[str, Any]:
+    """Ejecuta las consultas con arealizar_consulta limitando las que están en curso."""
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias = []
+
+    async def una(consulta: str) -> None:
+        async with semaforo:
+            t0 = time.perf_counter()
+            await sistema.arealizar_consulta(consulta, max_tokens=max_tokens)
+            latencias.append(time.perf_counter() - t0)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(una(c) for c in consultas))
+    total = time.perf_counter() - inicio
+    return {'modo': 'asincrono', 'concurrencia': concurrencia, 'segundos': total,
+            'consultas_por_segundo': len(consultas) / total, 'latencias': resumir_latencias(latencias)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="../data/raw_data/BankCustomerChurnPrediction.csv")
+    parser.add_argument("--persist-directory", default="./vector_db")
+    parser.add_argument("--modelo", default="llama3.2")
+    parser.add_argument("--url-ollama", default="http://localhost:11434")
+    parser.add_argument("--consultas", type=int, default=16)
+    parser.add_argument("--concurrencia", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--max-tokens", type=int, default=128)
+    parser.add_argument("--salida", default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    sistema = SistemaRAG(
+        ruta_archivo=args.csv,
+        persist_directory=args.persist_directory,
+        model_name=args.modelo,
+        url_ollama=args.url_ollama,
+        umbral_cache_respuestas=None,
+        max_consultas_concurrentes=max(args.concurrencia)
+    )
+    consultas = generar_consultas(args.consultas)
+
+    resultados = [medir_sincrono(sistema, consultas, args.max_tokens)]
+
+    async def asincronos() -> None:
+        try:
+            for concurrencia in args.concurrencia:
+                resultados.append(await medir_asincrono(sistema, consultas, concurrencia, args.max_tokens))
+        finally:
+            await sistema.cerrar()
+
+    asyncio.run(asincronos())
+
+    base = resultados[0]['consultas_por_segundo']
+    print(f"{'modo':<10} {'conc.':>5} {'cons/s':>8} {'x sync':>7} {'p50 (s)':>8} {'p95 (s)':>8}")
+    for r in resultados:
+        print(
+            f"{r['modo']:<10} {r['concurrencia']:>5} {r['consultas_por_segundo']:>8.2f} "
+            f"{r['consultas_por_segundo'] / base:>7.2f} {r['latencias']['p50']:>8.2f} "
+            f"{r['latencias']['p95']:>8.2f}"
+        )
+    if args.salida:
+        guardar_resultados({'consultas': args.consultas, 'resultados': resultados}, args.salida)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
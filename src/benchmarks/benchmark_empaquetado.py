@@ -0,0 +1,135 @@
+"""
+Mide el efecto de agrupar filas por chunk sobre el índice vectorial.
+
+Para cada tamaño de paquete construye un índice Chroma persistido en un
+directorio temporal y registra el tiempo de construcción, el número de
+vectores, el tamaño en disco y la latencia de recuperación.
+
+Uso (desde src/):
+    python -m benchmarks.benchmark_empaquetado --filas-por-chunk 1 5 10 20
+    python -m benchmarks.benchmark_empaquetado --embeddings-falsos   # sin descargar el modelo
+"""
+import sys
+import time
+import uuid
+import shutil
+import argparse
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
+from langchain_community.vectorstores.chroma import Chroma
+
+from features.empaquetador_filas import EmpaquetadorFilas
+from features.pipeline_embeddings import PipelineEmbeddings
+from benchmarks.utilidades import resumir_latencias, guardar_resultados
+
+CONSULTAS = [
+    "clientes de Alemania con balance alto que abandonaron",
+    "clientes jóvenes de Francia con un solo producto",
+    "mujeres de España con credit score bajo",
+    "clientes inactivos con más de dos productos",
+    "clientes mayores con salario estimado alto",
+    "clientes con antigüedad larga y tarjeta de crédito"
+]
+
+
+def tamano_directorio(ruta: Path) -> int:
+    """Bytes ocupados por los archivos de un directorio."""
+    return sum(archivo.stat().st_size for archivo in ruta.rglob("*") if archivo.is_file())
+
+
+def medir(
+        df: pd.DataFrame,
+        embeddings,
+        filas_por_chunk: int,
+        max_caracteres: int,
+        repeticiones: int,
+        k: int
+) -> Dict[str, Any]:
+    """Construye el índice para un tamaño de paquete y mide su rendimiento."""
+    directorio = Path(tempfile.mkdtemp(prefix="benchmark_empaquetado_"))
+    try:
+        inicio = time.perf_counter()
+        chunks = EmpaquetadorFilas(filas_por_chunk, max_caracteres=max_caracteres).empaquetar(df)
+        tiempo_chunking = time.perf_counter() - inicio
+
+        vector_db = Chroma(
+            collection_name=f"empaquetado_{uuid.uuid4().hex}",
+            persist_directory=str(directorio),
+            embedding_function=embeddings
+        )
+
+        def escribir(ids: List[str], vectores: List[List[float]], documentos) -> None:
+            vector_db._collection.upsert(
+                ids=ids,
+                embeddings=vectores,
+                documents=[doc.page_content for doc in documentos],
+                metadatas=[doc.metadata for doc in documentos]
+            )
+
+        PipelineEmbeddings(embeddings, escribir).ejecutar(chunks)
+        tiempo_construccion = time.perf_counter() - inicio
+
+        latencias = []
+        for _ in range(repeticiones):
+            for consulta in CONSULTAS:
+                t0 = time.perf_counter()
+                vector_db.similarity_search(consulta, k=k)
+                latencias.append(time.perf_counter() - t0)
+
+        return {
+            'filas_por_chunk': filas_por_chunk,
+            'vectores': len(chunks),
+            'tiempo_chunking': tiempo_chunking,
+            'tiempo_construccion': tiempo_construccion,
+            'bytes_indice': tamano_directorio(directorio),
+            'latencia': resumir_latencias(latencias)
+        }
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="../data/raw_data/BankCustomerChurnPrediction.csv")
+    parser.add_argument("--filas-por-chunk", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    parser.add_argument("--max-caracteres", type=int, default=4000)
+    parser.add_argument("--modelo-embeddings", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--embeddings-falsos", action="store_true",
+                        help="Usa embeddings deterministas en lugar de FastEmbed")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--salida", default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    df = pd.read_csv(args.csv, dtype=str, keep_default_na=False)
+    if args.embeddings_falsos:
+        embeddings = DeterministicFakeEmbedding(size=384)
+    else:
+        embeddings = FastEmbedEmbeddings(model_name=args.modelo_embeddings)
+
+    resultados = [
+        medir(df, embeddings, n, args.max_caracteres, args.repeticiones, args.k)
+        for n in args.filas_por_chunk
+    ]
+
+    print(f"{'filas':>5} {'vectores':>9} {'constr. (s)':>11} {'índice (MB)':>11} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for r in resultados:
+        print(
+            f"{r['filas_por_chunk']:>5} {r['vectores']:>9} {r['tiempo_construccion']:>11.2f} "
+            f"{r['bytes_indice'] / 2 ** 20:>11.2f} {r['latencia']['p50'] * 1000:>9.2f} "
+            f"{r['latencia']['p95'] * 1000:>9.2f}"
+        )
+    if args.salida:
+        guardar_resultados({'filas': len(df), 'resultados': resultados}, args.salida)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+Prueba de carga de extremo a extremo contra un Ollama simulado.
+
+Arranca ServidorOllamaFalso con el tiempo hasta el primer token y el
+retardo por token indicados y lanza consultas por la ruta real de
+SistemaRAG.realizar_consulta (o SistemaBancario.consultar_rag, con su
+enrutador) a cada nivel de concurrencia. Informa de consultas por segundo,
+latencias p50/p95/p99, tiempo hasta el primer token en streaming y la
+sobrecarga del pipeline: latencia media menos el tiempo medio que el
+servidor dedicó a generar.
+
+Uso (desde src/):
+    python -m benchmarks.benchmark_extremo_a_extremo --embeddings-falsos --concurrencia 1 4 16
+    python -m benchmarks.benchmark_extremo_a_extremo --ruta bancario --modo asincrono --retardo-token 0.01
+    python -m benchmarks.benchmark_extremo_a_extremo --embeddings-falsos --traza traza_e2e.json
+"""
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from main import SistemaBancario
+from model.sistema_rag import SistemaRAG
+from utils.trazas import activar_trazas, desactivar_trazas
+from benchmarks.utilidades import resumir_latencias, guardar_resultados
+from benchmarks.benchmark_concurrencia import generar_consultas
+from benchmarks.servidor_ollama_falso import ServidorOllamaFalso
+
+
+class Objetivo:
+    """Entradas síncrona, asíncrona y en streaming de la ruta medida."""
+
+    def __init__(self, sistema: Any, ruta: str, max_tokens: int):
+        self.sistema = sistema
+        self.ruta = ruta
+        self.max_tokens = max_tokens
+
+    def consultar(self, consulta: str) -> Dict[str, Any]:
+        """Consulta síncrona completa."""
+        if self.ruta == 'bancario':
+            return self.sistema.consultar_rag(consulta)
+        return self.sistema.realizar_consulta(consulta, max_tokens=self.max_tokens)
+
+    async def aconsultar(self, consulta: str) -> Dict[str, Any]:
+        """Consulta por la ruta asíncrona."""
+        if self.ruta == 'bancario':
+            return await self.sistema.aconsultar_rag(consulta)
+        return await self.sistema.arealizar_consulta(consulta, max_tokens=self.max_tokens)
+
+    def consultar_stream(self, consulta: str):
+        """Iterador de eventos de la consulta en streaming."""
+        if self.ruta == 'bancario':
+            return self.sistema.consultar_rag_stream(consulta)
+        return self.sistema.realizar_consulta_stream(consulta, max_tokens=self.max_tokens)
+
+    @property
+    def rag(self) -> SistemaRAG:
+        """SistemaRAG subyacente."""
+        return self.sistema.rag if self.ruta == 'bancario' else self.sistema
+
+
+def medir_en_hilos(
+        funcion: Callable[[str], Optional[float]],
+        consultas: List[str],
+        concurrencia: int
+) -> Dict[str, Any]:
+    """Ejecuta funcion sobre las consultas con 'concurrencia' hilos; funcion retorna el TTFT o None."""
+    latencias, primeros_tokens, errores = [], [], []
+
+    def una(consulta: str) -> None:
+        t0 = time.perf_counter()
+        try:
+            primer_token = funcion(consulta)
+        except Exception as e:
+            errores.append(str(e))
+            return
+        latencias.append(time.perf_counter() - t0)
+        if primer_token is not None:
+            primeros_tokens.append(primer_token - t0)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as ejecutor:
+        list(ejecutor.map(una, consultas))
+    return {
+        'segundos': time.perf_counter() - inicio,
+        'latencias': latencias,
+        'primeros_tokens': primeros_tokens,
+        'errores': errores
+    }
+
+
+def medir_asincrono(objetivo: Objetivo, consultas: List[str], concurrencia: int) -> Dict[str, Any]:
+    """Ejecuta las consultas con la ruta asíncrona limitando las que están en curso."""
+    latencias, errores = [], []
+
+    async def todas() -> None:
+        semaforo = asyncio.Semaphore(concurrencia)
+
+        async def una(consulta: str) -> None:
+            async with semaforo:
+                t0 = time.perf_counter()
+                try:
+                    await objetivo.aconsultar(consulta)
+                except Exception as e:
+                    errores.append(str(e))
+                    return
+                latencias.append(time.perf_counter() - t0)
+
+        try:
+            await asyncio.gather(*(una(c) for c in consultas))
+        finally:
+            # La sesión HTTP pertenece a este bucle de eventos
+            await objetivo.rag.cerrar()
+
+    inicio = time.perf_counter()
+    asyncio.run(todas())
+    return {'segundos': time.perf_counter() - inicio, 'latencias': latencias, 'primeros_tokens': [],
+            'errores': errores}
+
+
+def medir(
+        objetivo: Objetivo,
+        servidor: ServidorOllamaFalso,
+        consultas: List[str],
+        modo: str,
+        concurrencia: int
+) -> Dict[str, Any]:
+    """Mide un modo y nivel de concurrencia y descuenta el tiempo de generación simulado."""
+    servidor.reiniciar_estadisticas()
+    if modo == 'asincrono':
+        medida = medir_asincrono(objetivo, consultas, concurrencia)
+    elif modo == 'stream':
+        def por_eventos(consulta: str) -> Optional[float]:
+            primer_token = None
+            for evento in objetivo.consultar_stream(consulta):
+                if evento['tipo'] == 'token' and primer_token is None:
+                    primer_token = time.perf_counter()
+            return primer_token
+
+        medida = medir_en_hilos(por_eventos, consultas, concurrencia)
+    else:
+        def completa(consulta: str) -> None:
+            objetivo.consultar(consulta)
+
+        medida = medir_en_hilos(completa, consultas, concurrencia)
+
+    servidor_stats = servidor.estadisticas()
+    completadas = len(medida['latencias'])
+    latencia_media = sum(medida['latencias']) / completadas if completadas else 0.0
+    # Consultas resueltas sin el modelo (enrutador) no llegan al servidor
+    peticiones = servidor_stats['peticiones']
+    generacion_media = servidor_stats['segundos_generando'] / peticiones if peticiones else 0.0
+    primeros_tokens = medida['primeros_tokens']
+    return {
+        'modo': modo,
+        'concurrencia': concurrencia,
+        'consultas': len(consultas),
+        'completadas': completadas,
+        'errores': len(medida['errores']),
+        'segundos': medida['segundos'],
+        'consultas_por_segundo': completadas / medida['segundos'] if medida['segundos'] else 0.0,
+        'latencias': resumir_latencias(medida['latencias']),
+        'primer_token': resumir_latencias(primeros_tokens) if primeros_tokens else None,
+        'peticiones_al_modelo': peticiones,
+        'max_en_curso_modelo': servidor_stats['max_en_curso'],
+        'generacion_media': generacion_media,
+        'sobrecarga_media': latencia_media - generacion_media
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="../data/raw_data/BankCustomerChurnPrediction.csv")
+    parser.add_argument("--ruta", default="rag", choices=["rag", "bancario"],
+                        help="SistemaRAG.realizar_consulta o SistemaBancario.consultar_rag")
+    parser.add_argument("--modo", nargs="+", default=["hilos"], choices=["hilos", "asincrono", "stream"])
+    parser.add_argument("--concurrencia", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--consultas", type=int, default=64)
+    parser.add_argument("--primer-token", type=float, default=0.2)
+    parser.add_argument("--retardo-token", type=float, default=0.02)
+    parser.add_argument("--tokens", type=int, default=64)
+    parser.add_argument("--max-tokens", type=int, default=128)
+    parser.add_argument("--embeddings-falsos", action="store_true",
+                        help="Usa embeddings deterministas en lugar de FastEmbed")
+    parser.add_argument("--persist-directory", default=None,
+                        help="Directorio del índice (por defecto uno temporal)")
+    parser.add_argument("--salida", default=None, help="Archivo JSON de resultados")
+    parser.add_argument("--traza", default=None,
+                        help="Archivo JSON de traza Chrome con los spans por etapa")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    if args.traza:
+        activar_trazas("benchmark_extremo_a_extremo")
+
+    directorio = args.persist_directory or tempfile.mkdtemp(prefix="benchmark_e2e_")
+    servidor = ServidorOllamaFalso(
+        tiempo_primer_token=args.primer_token,
+        retardo_por_token=args.retardo_token,
+        tokens_respuesta=args.tokens
+    ).iniciar()
+    objetivo = None
+    try:
+        opciones_rag = {
+            'url_ollama': servidor.url,
+            'umbral_cache_respuestas': None,
+            'max_consultas_concurrentes': max(args.concurrencia)
+        }
+        if args.embeddings_falsos:
+            # Sin caché de embeddings: los vectores falsos son más baratos de calcular que de guardar
+            opciones_rag.update(
+                embeddings=DeterministicFakeEmbedding(size=384), directorio_cache_embeddings=None
+            )
+        if args.ruta == 'bancario':
+            sistema = SistemaBancario(
+                ruta_csv=args.csv, persist_directory=directorio,
+                inicializacion_en_segundo_plano=False, **opciones_rag
+            )
+        else:
+            sistema = SistemaRAG(ruta_archivo=args.csv, persist_directory=directorio, **opciones_rag)
+        objetivo = Objetivo(sistema, args.ruta, args.max_tokens)
+        objetivo.consultar("consulta de calentamiento")
+
+        consultas = generar_consultas(args.consultas)
+        resultados = [
+            medir(objetivo, servidor, consultas, modo, concurrencia)
+            for modo in args.modo for concurrencia in args.concurrencia
+        ]
+        uso_llm = sistema.obtener_estadisticas_llm()
+    finally:
+        if objetivo is not None:
+            objetivo.rag.cerrar_cache_embeddings()
+        servidor.detener()
+        if args.persist_directory is None:
+            shutil.rmtree(directorio, ignore_errors=True)
+        traza = desactivar_trazas()
+        if traza is not None:
+            print(f"Traza escrita en {traza.exportar_chrome(args.traza)}")
+            for nombre, etapa in sorted(traza.resumen().items(), key=lambda par: -par[1]['total_ms']):
+                print(f"  {nombre:<32} {etapa['llamadas']:>6} llamadas {etapa['medio_ms']:>10.2f} ms de media")
+
+    print(f"{'modo':<10} {'conc.':>5} {'cons/s':>8} {'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8} "
+          f"{'TTFT p50':>9} {'modelo (s)':>10} {'sobrecarga (s)':>14} {'errores':>7}")
+    for r in resultados:
+        ttft = f"{r['primer_token']['p50']:>9.3f}" if r['primer_token'] else f"{'-':>9}"
+        print(
+            f"{r['modo']:<10} {r['concurrencia']:>5} {r['consultas_por_segundo']:>8.2f} "
+            f"{r['latencias']['p50']:>8.3f} {r['latencias']['p95']:>8.3f} {r['latencias']['p99']:>8.3f} "
+            f"{ttft} {r['generacion_media']:>10.3f} {r['sobrecarga_media']:>14.3f} {r['errores']:>7}"
+        )
+    if uso_llm['generaciones']:
+        print(
+            f"LLM: {uso_llm['generaciones']} generaciones, "
+            f"{uso_llm['tokens_prompt_medios']:.1f} tokens de prompt y "
+            f"{uso_llm['tokens_generados_medios']:.1f} generados de media, "
+            f"decodificación {uso_llm['tokens_por_segundo_decodificacion'] or 0:.1f} tokens/s"
+        )
+    if args.salida:
+        guardar_resultados({
+            'ruta': args.ruta,
+            'servidor': {
+                'primer_token': args.primer_token,
+                'retardo_token': args.retardo_token,
+                'tokens': args.tokens
+            },
+            'resultados': resultados,
+            'uso_llm': uso_llm
+        }, args.salida)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
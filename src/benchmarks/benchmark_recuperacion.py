@@ -0,0 +1,264 @@
+"""
+Benchmark de recuperación con el conjunto de consultas de referencia.
+
+Indexa BankCustomerChurnPrediction.csv con los mismos documentos e IDs que
+SistemaRAG (una fila por cliente y los resúmenes por segmento) y, para
+cada consulta de benchmarks/consultas_oro.json, mide el tiempo de embeber
+la consulta, la latencia de la búsqueda y si recupera los documentos
+relevantes. Informa del tiempo de construcción del índice, las latencias
+p50/p95/p99, recall@k y MRR (global y por tipo de consulta) y guarda el
+resultado en JSON junto con la versión del conjunto de referencia.
+
+Con --comparar se contrasta con un resultado anterior y el proceso termina
+con código 1 si el recall o el MRR bajan, o el p95 de búsqueda sube, más
+allá de las tolerancias.
+
+Uso (desde src/):
+    python -m benchmarks.benchmark_recuperacion --salida resultados/recup.json
+    python -m benchmarks.benchmark_recuperacion --backend numpy-float32 --comparar resultados/recup.json
+"""
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
+
+from features.vector_store_numpy import calcular_recall
+from utils.document_processor import DataProcessor, FUENTE_RESUMEN
+from benchmarks.utilidades import resumir_latencias, guardar_resultados
+from benchmarks.benchmark_backend_vectorial import construir, buscar_lote, embeber
+
+RUTA_CONSULTAS_ORO = Path(__file__).with_name("consultas_oro.json")
+
+
+def cargar_consultas_oro(
+        ruta: Path = RUTA_CONSULTAS_ORO,
+        ruta_csv: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Carga el conjunto de consultas de referencia.
+
+    Args:
+        ruta: Archivo JSON del conjunto
+        ruta_csv: CSV indexado; si su hash no coincide con el del conjunto se avisa
+
+    Returns:
+        Diccionario con version, csv_sha256 y consultas
+    """
+    with open(ruta, encoding="utf-8") as archivo:
+        conjunto = json.load(archivo)
+    if ruta_csv is not None:
+        with open(ruta_csv, "rb") as archivo:
+            huella = hashlib.sha256(archivo.read()).hexdigest()
+        if huella != conjunto['csv_sha256']:
+            logging.warning(
+                f"El CSV {ruta_csv} no es el del conjunto de referencia {conjunto['version']}; "
+                f"los documentos relevantes pueden no existir"
+            )
+    return conjunto
+
+
+def id_documento(documento: Document) -> str:
+    """ID con el que SistemaRAG indexa el documento ('15634602', 'resumen:country=France')."""
+    metadatos = documento.metadata
+    if metadatos.get('source') == FUENTE_RESUMEN:
+        if metadatos['dimension'] == 'general':
+            return 'resumen:general'
+        return f"resumen:{metadatos['dimension']}={metadatos['valor']}"
+    return str(metadatos['customer_id'])
+
+
+def crear_documentos(df: pd.DataFrame, modo_ingesta: str) -> List[tuple]:
+    """Pares (id, documento) indexados por SistemaRAG en el modo de ingesta dado."""
+    documentos = []
+    if modo_ingesta in ('filas', 'mixto'):
+        documentos += DataProcessor.create_csv_docs(df)
+    if modo_ingesta in ('resumenes', 'mixto'):
+        documentos += [DataProcessor.create_csv_summary(df)] + DataProcessor.create_slice_summaries(df)
+    return [(id_documento(doc), doc) for doc in documentos]
+
+
+def calcular_mrr(obtenidos: Sequence[Sequence[str]], relevantes: Sequence[Sequence[str]]) -> float:
+    """Media del inverso de la posición del primer documento relevante (0 si no aparece)."""
+    rangos = [
+        next((1 / posicion for posicion, id_doc in enumerate(ids, 1) if id_doc in set(esperados)), 0.0)
+        for ids, esperados in zip(obtenidos, relevantes)
+    ]
+    return sum(rangos) / max(len(rangos), 1)
+
+
+def ejecutar(
+        df: pd.DataFrame,
+        conjunto: Dict[str, Any],
+        embeddings,
+        backend: str,
+        modo_ingesta: str,
+        k: int
+) -> Dict[str, Any]:
+    """Construye el índice, lanza las consultas de referencia y calcula las métricas."""
+    inicio = time.perf_counter()
+    documentos = crear_documentos(df, modo_ingesta)
+    tiempo_documentos = time.perf_counter() - inicio
+    indexados = {id_doc for id_doc, _ in documentos}
+
+    # Solo cuentan las consultas cuyos documentos relevantes están indexados en este modo
+    consultas = [c for c in conjunto['consultas'] if indexados.issuperset(c['relevantes'])]
+    omitidas = len(conjunto['consultas']) - len(consultas)
+
+    directorio = Path(tempfile.mkdtemp(prefix="benchmark_recuperacion_"))
+    try:
+        inicio = time.perf_counter()
+        vector_db = construir(backend, directorio, embeddings, embeber(embeddings, documentos))
+        tiempo_indexado = time.perf_counter() - inicio
+
+        latencias_embedding, latencias_busqueda, obtenidos = [], [], []
+        for consulta in consultas:
+            t0 = time.perf_counter()
+            vector = embeddings.embed_query(consulta['consulta'])
+            t1 = time.perf_counter()
+            textos = buscar_lote(vector_db, [vector], k)[0]
+            t2 = time.perf_counter()
+            latencias_embedding.append(t1 - t0)
+            latencias_busqueda.append(t2 - t1)
+            obtenidos.append(textos)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    # buscar_lote devuelve textos: se traducen a IDs con los documentos indexados
+    id_por_texto = {doc.page_content: id_doc for id_doc, doc in documentos}
+    obtenidos = [[id_por_texto.get(texto, '') for texto in textos] for textos in obtenidos]
+
+    por_tipo = {}
+    for tipo in sorted({c['tipo'] for c in consultas}):
+        posiciones = [i for i, c in enumerate(consultas) if c['tipo'] == tipo]
+        por_tipo[tipo] = metricas_calidad(
+            [obtenidos[i] for i in posiciones], [consultas[i]['relevantes'] for i in posiciones]
+        )
+
+    return {
+        'version_consultas': conjunto['version'],
+        'csv_sha256': conjunto['csv_sha256'],
+        'backend': backend,
+        'modo_ingesta': modo_ingesta,
+        'k': k,
+        'documentos': len(documentos),
+        'consultas': len(consultas),
+        'consultas_omitidas': omitidas,
+        'tiempo_documentos': tiempo_documentos,
+        'tiempo_indexado': tiempo_indexado,
+        'tiempo_construccion': tiempo_documentos + tiempo_indexado,
+        'latencia_embedding': resumir_latencias(latencias_embedding),
+        'latencia_busqueda': resumir_latencias(latencias_busqueda),
+        'calidad': metricas_calidad(obtenidos, [c['relevantes'] for c in consultas]),
+        'calidad_por_tipo': por_tipo,
+        'detalle': [
+            {'id': c['id'], 'obtenidos': ids, 'acierto': bool(set(ids) & set(c['relevantes']))}
+            for c, ids in zip(consultas, obtenidos)
+        ]
+    }
+
+
+def metricas_calidad(obtenidos: List[List[str]], relevantes: List[List[str]]) -> Dict[str, float]:
+    """recall@k y MRR de un grupo de consultas."""
+    return {
+        'recall': calcular_recall(obtenidos, relevantes),
+        'mrr': calcular_mrr(obtenidos, relevantes)
+    }
+
+
+def comparar(
+        actual: Dict[str, Any],
+        anterior: Dict[str, Any],
+        tolerancia_calidad: float,
+        tolerancia_latencia: float
+) -> List[str]:
+    """
+    Regresiones del resultado actual frente a uno anterior.
+
+    Args:
+        actual: Resultado de esta ejecución
+        anterior: Resultado guardado de una ejecución previa
+        tolerancia_calidad: Caída absoluta admitida en recall y MRR
+        tolerancia_latencia: Aumento relativo admitido en el p95 de búsqueda
+
+    Returns:
+        Descripción de cada regresión (vacía si no hay)
+    """
+    regresiones = []
+    if actual['version_consultas'] != anterior.get('version_consultas'):
+        logging.warning("Los resultados usan versiones distintas del conjunto de referencia")
+    for metrica in ('recall', 'mrr'):
+        antes, ahora = anterior['calidad'][metrica], actual['calidad'][metrica]
+        if ahora < antes - tolerancia_calidad:
+            regresiones.append(f"{metrica}: {antes:.3f} -> {ahora:.3f}")
+    antes, ahora = anterior['latencia_busqueda']['p95'], actual['latencia_busqueda']['p95']
+    if antes > 0 and ahora > antes * (1 + tolerancia_latencia):
+        regresiones.append(f"p95 búsqueda: {antes * 1000:.2f} ms -> {ahora * 1000:.2f} ms")
+    return regresiones
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="../data/raw_data/BankCustomerChurnPrediction.csv")
+    parser.add_argument("--consultas-oro", default=str(RUTA_CONSULTAS_ORO))
+    parser.add_argument("--backend", default="chroma",
+                        choices=["chroma", "numpy-float32", "numpy-float16", "numpy-int8"])
+    parser.add_argument("--modo-ingesta", default="mixto", choices=["filas", "resumenes", "mixto"])
+    parser.add_argument("--modelo-embeddings", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--embeddings-falsos", action="store_true",
+                        help="Usa embeddings deterministas en lugar de FastEmbed (solo mide latencias)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--salida", default=None, help="Archivo JSON de resultados")
+    parser.add_argument("--comparar", default=None, help="Resultado JSON anterior con el que comparar")
+    parser.add_argument("--tolerancia-calidad", type=float, default=0.02)
+    parser.add_argument("--tolerancia-latencia", type=float, default=0.25)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    conjunto = cargar_consultas_oro(Path(args.consultas_oro), args.csv)
+    df = pd.read_csv(args.csv)
+    if args.embeddings_falsos:
+        embeddings = DeterministicFakeEmbedding(size=384)
+    else:
+        embeddings = FastEmbedEmbeddings(model_name=args.modelo_embeddings)
+
+    resultado = ejecutar(df, conjunto, embeddings, args.backend, args.modo_ingesta, args.k)
+    resultado['modelo_embeddings'] = 'falso' if args.embeddings_falsos else args.modelo_embeddings
+    resultado['fecha'] = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    print(f"Conjunto {resultado['version_consultas']}: {resultado['consultas']} consultas "
+          f"({resultado['consultas_omitidas']} omitidas), {resultado['documentos']} documentos")
+    print(f"Construcción del índice: {resultado['tiempo_construccion']:.2f} s")
+    for nombre in ('latencia_embedding', 'latencia_busqueda'):
+        latencia = resultado[nombre]
+        print(f"{nombre}: p50 {latencia['p50'] * 1000:.2f} ms, p95 {latencia['p95'] * 1000:.2f} ms, "
+              f"p99 {latencia['p99'] * 1000:.2f} ms")
+    print(f"recall@{args.k} {resultado['calidad']['recall']:.3f}, MRR {resultado['calidad']['mrr']:.3f}")
+    for tipo, calidad in resultado['calidad_por_tipo'].items():
+        print(f"  {tipo}: recall@{args.k} {calidad['recall']:.3f}, MRR {calidad['mrr']:.3f}")
+
+    if args.salida:
+        guardar_resultados(resultado, args.salida)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            anterior = json.load(archivo)
+        regresiones = comparar(resultado, anterior, args.tolerancia_calidad, args.tolerancia_latencia)
+        for regresion in regresiones:
+            print(f"REGRESIÓN {regresion}")
+        if regresiones:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""
+Servidor HTTP que imita la API de generación de Ollama sin ejecutar ningún modelo.
+
+Responde a /api/generate (con y sin streaming), /api/tags y /api/version
+con un texto determinista derivado del prompt, esperando el tiempo hasta
+el primer token y el retardo por token configurados. Permite medir la
+sobrecarga del pipeline RAG aislada del modelo.
+
+Uso (desde src/):
+    python -m benchmarks.servidor_ollama_falso --puerto 11434 --primer-token 0.2 --retardo-token 0.02
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+VOCABULARIO = [
+    "los", "clientes", "con", "balance", "alto", "presentan", "una", "tasa", "de", "deserción",
+    "mayor", "en", "Alemania", "y", "el", "credit", "score", "influye", "poco", "segmento",
+    "activos", "productos", "edad", "media", "respecto", "al", "global", "según", "datos", "."
+]
+
+
+class ServidorOllamaFalso:
+    """
+    Servidor de Ollama simulado que se ejecuta en un hilo propio.
+
+    La salida depende solo del prompt y de num_predict, y cada respuesta
+    incluye los contadores de Ollama (prompt_eval_count, eval_count,
+    eval_duration...) calculados con los tiempos simulados.
+    """
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            puerto: int = 0,
+            tiempo_primer_token: float = 0.0,
+            retardo_por_token: float = 0.0,
+            tokens_respuesta: int = 32,
+            modelo: str = "llama3.2"
+    ):
+        """
+        Inicializa el servidor (no escucha hasta llamar a iniciar).
+
+        Args:
+            host: Interfaz de escucha
+            puerto: Puerto de escucha (0 elige uno libre)
+            tiempo_primer_token: Segundos hasta el primer token de cada respuesta
+            retardo_por_token: Segundos entre tokens sucesivos
+            tokens_respuesta: Tokens por respuesta (como máximo num_predict)
+            modelo: Modelo anunciado en /api/tags
+        """
+        if tiempo_primer_token < 0 or retardo_por_token < 0:
+            raise ValueError("Los tiempos simulados no pueden ser negativos")
+        if tokens_respuesta < 1:
+            raise ValueError("Cada respuesta debe tener al menos un token")
+
+        self.host = host
+        self.puerto = puerto
+        self.tiempo_primer_token = tiempo_primer_token
+        self.retardo_por_token = retardo_por_token
+        self.tokens_respuesta = tokens_respuesta
+        self.modelo = modelo
+
+        self._lock = threading.Lock()
+        self._peticiones = 0
+        self._en_curso = 0
+        self._max_en_curso = 0
+        self._segundos_generando = 0.0
+        self._bucle: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL base para url_ollama / base_url."""
+        return f"http://{self.host}:{self.puerto}"
+
+    def tokens_para(self, prompt: str, num_predict: Optional[int] = None) -> List[str]:
+        """
+        Tokens deterministas de la respuesta a un prompt.
+
+        Args:
+            prompt: Texto de entrada
+            num_predict: Máximo de tokens pedido por el cliente
+
+        Returns:
+            Lista de tokens (palabras con su espacio inicial)
+        """
+        cantidad = self.tokens_respuesta
+        if num_predict is not None and num_predict > 0:
+            cantidad = min(cantidad, num_predict)
+        semilla = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+        generador = random.Random(semilla)
+        return [(" " if i else "") + generador.choice(VOCABULARIO) for i in range(cantidad)]
+
+    def iniciar(self) -> "ServidorOllamaFalso":
+        """Arranca el servidor en un hilo y espera a que escuche."""
+        listo = threading.Event()
+        errores: List[BaseException] = []
+
+        def ejecutar() -> None:
+            self._bucle = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._bucle)
+            try:
+                self._bucle.run_until_complete(self._arrancar())
+            except BaseException as e:
+                errores.append(e)
+                listo.set()
+                return
+            listo.set()
+            self._bucle.run_forever()
+            self._bucle.run_until_complete(self._runner.cleanup())
+            self._bucle.close()
+
+        self._hilo = threading.Thread(target=ejecutar, name="ollama-falso", daemon=True)
+        self._hilo.start()
+        listo.wait()
+        if errores:
+            raise RuntimeError(f"No se pudo iniciar el servidor Ollama falso: {errores[0]}")
+        logging.info(f"Servidor Ollama falso escuchando en {self.url}")
+        return self
+
+    def detener(self) -> None:
+        """Detiene el servidor y espera a que termine su hilo."""
+        if self._bucle is not None and self._hilo is not None:
+            self._bucle.call_soon_threadsafe(self._bucle.stop)
+            self._hilo.join()
+        self._bucle = None
+        self._hilo = None
+
+    def __enter__(self) -> "ServidorOllamaFalso":
+        return self.iniciar()
+
+    def __exit__(self, *excepcion: Any) -> None:
+        self.detener()
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Peticiones atendidas, concurrencia máxima y segundos de generación simulada."""
+        with self._lock:
+            return {
+                'peticiones': self._peticiones,
+                'max_en_curso': self._max_en_curso,
+                'segundos_generando': self._segundos_generando
+            }
+
+    def reiniciar_estadisticas(self) -> None:
+        """Pone a cero los contadores."""
+        with self._lock:
+            self._peticiones = 0
+            self._max_en_curso = self._en_curso
+            self._segundos_generando = 0.0
+
+    async def _arrancar(self) -> None:
+        """Crea la aplicación aiohttp y abre el puerto."""
+        aplicacion = web.Application()
+        aplicacion.router.add_post("/api/generate", self._generate)
+        aplicacion.router.add_get("/api/tags", self._tags)
+        aplicacion.router.add_get("/api/version", self._version)
+        self._runner = web.AppRunner(aplicacion, access_log=None)
+        await self._runner.setup()
+        sitio = web.TCPSite(self._runner, self.host, self.puerto)
+        await sitio.start()
+        self.puerto = sitio._server.sockets[0].getsockname()[1]
+
+    async def _tags(self, request: web.Request) -> web.Response:
+        nombre = f"{self.modelo}:latest"
+        return web.json_response({'models': [{'name': nombre, 'model': nombre}]})
+
+    async def _version(self, request: web.Request) -> web.Response:
+        return web.json_response({'version': "0.0.0-falso"})
+
+    async def _generate(self, request: web.Request) -> web.StreamResponse:
+        """Atiende /api/generate; como Ollama, transmite por defecto salvo stream=false."""
+        cuerpo = await request.json()
+        opciones = cuerpo.get('options') or {}
+        tokens = self.tokens_para(cuerpo.get('prompt', ""), opciones.get('num_predict'))
+        modelo = cuerpo.get('model', self.modelo)
+        inicio = time.perf_counter()
+        with self._lock:
+            self._peticiones += 1
+            self._en_curso += 1
+            self._max_en_curso = max(self._max_en_curso, self._en_curso)
+        try:
+            if cuerpo.get('stream', True):
+                return await self._generar_stream(request, modelo, cuerpo.get('prompt', ""), tokens, inicio)
+            await asyncio.sleep(self.tiempo_primer_token + self.retardo_por_token * (len(tokens) - 1))
+            return web.json_response(dict(
+                self._fragmento(modelo, "".join(tokens), True),
+                **self._contadores(cuerpo.get('prompt', ""), tokens, inicio)
+            ))
+        finally:
+            with self._lock:
+                self._en_curso -= 1
+                self._segundos_generando += time.perf_counter() - inicio
+
+    async def _generar_stream(
+            self,
+            request: web.Request,
+            modelo: str,
+            prompt: str,
+            tokens: List[str],
+            inicio: float
+    ) -> web.StreamResponse:
+        """Envía un objeto JSON por línea y token, y uno final con los contadores."""
+        respuesta = web.StreamResponse(headers={'Content-Type': "application/x-ndjson"})
+        await respuesta.prepare(request)
+        await asyncio.sleep(self.tiempo_primer_token)
+        for posicion, token in enumerate(tokens):
+            if posicion:
+                await asyncio.sleep(self.retardo_por_token)
+            await respuesta.write((json.dumps(self._fragmento(modelo, token, False)) + "\n").encode("utf-8"))
+        final = dict(self._fragmento(modelo, "", True), **self._contadores(prompt, tokens, inicio))
+        await respuesta.write((json.dumps(final) + "\n").encode("utf-8"))
+        await respuesta.write_eof()
+        return respuesta
+
+    @staticmethod
+    def _fragmento(modelo: str, texto: str, terminado: bool) -> Dict[str, Any]:
+        return {
+            'model': modelo,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'response': texto,
+            'done': terminado
+        }
+
+    def _contadores(self, prompt: str, tokens: List[str], inicio: float) -> Dict[str, Any]:
+        """Contadores finales de Ollama en nanosegundos, con los tiempos simulados."""
+        total = time.perf_counter() - inicio
+        return {
+            'done_reason': "stop",
+            'total_duration': int(total * 1e9),
+            'load_duration': 0,
+            'prompt_eval_count': len(prompt.split()),
+            'prompt_eval_duration': int(self.tiempo_primer_token * 1e9),
+            'eval_count': len(tokens),
+            'eval_duration': int(self.retardo_por_token * max(len(tokens) - 1, 0) * 1e9)
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=11434)
+    parser.add_argument("--primer-token", type=float, default=0.2, help="Segundos hasta el primer token")
+    parser.add_argument("--retardo-token", type=float, default=0.02, help="Segundos entre tokens")
+    parser.add_argument("--tokens", type=int, default=64, help="Tokens por respuesta")
+    parser.add_argument("--modelo", default="llama3.2")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    servidor = ServidorOllamaFalso(
+        host=args.host,
+        puerto=args.puerto,
+        tiempo_primer_token=args.primer_token,
+        retardo_por_token=args.retardo_token,
+        tokens_respuesta=args.tokens,
+        modelo=args.modelo
+    ).iniciar()
+    print(f"Ollama falso en {servidor.url} (Ctrl+C para salir)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.detener()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+
+def resumir_latencias(latencias: Sequence[float]) -> Dict[str, float]:
+    """
+    Resume una serie de latencias en segundos.
+
+    Args:
+        latencias: Latencias medidas
+
+    Returns:
+        Diccionario con n, media, p50, p95, p99 y máximo
+    """
+    if not latencias:
+        return {'n': 0, 'media': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    valores = np.asarray(latencias, dtype=float)
+    p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+    return {
+        'n': int(valores.size),
+        'media': float(valores.mean()),
+        'p50': float(p50),
+        'p95': float(p95),
+        'p99': float(p99),
+        'max': float(valores.max())
+    }
+
+
+def guardar_resultados(resultados: Dict[str, Any], ruta: str) -> None:
+    """
+    Guarda los resultados de un benchmark en JSON.
+
+    Args:
+        resultados: Resultados a guardar
+        ruta: Archivo de destino
+    """
+    destino = Path(ruta)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    with open(destino, "w", encoding="utf-8") as archivo:
+        json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+    logging.info(f"Resultados guardados en {destino}")
@@ -0,0 +1,297 @@
+import re
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Any
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class CacheEmbeddings:
+    """
+    Caché persistente de embeddings direccionada por contenido.
+
+    Los vectores se guardan en un archivo float32 mapeado en memoria con un
+    número fijo de posiciones; un índice JSON asocia cada clave
+    (modelo, hash del texto) con su posición y conserva el orden LRU.
+
+    Cada posición lleva además la clave del vector que contiene (archivo de
+    etiquetas), que se comprueba al leer: si el índice en disco quedó
+    desfasado tras reutilizar una posición (caída antes de persistir(), u
+    otro proceso leyendo), la entrada cuenta como fallo en lugar de devolver
+    el vector de otro texto.
+
+    Solo una instancia escribe en el directorio: la que tiene el bloqueo del
+    archivo escritor.lock. Las demás la abren en solo lectura y vuelven a
+    intentar tomarlo en cada guardar(); cuando la escritora lo libera con
+    cerrar() (o termina su proceso), la siguiente recarga el índice del
+    disco y pasa a escribir.
+    """
+
+    ARCHIVO_VECTORES = "vectores.f32"
+    ARCHIVO_CLAVES = "claves.bin"
+    ARCHIVO_INDICE = "indice.json"
+    ARCHIVO_BLOQUEO = "escritor.lock"
+    BYTES_CLAVE = 32
+
+    def __init__(self, directorio: str, modelo: str, max_entradas: int = 50_000):
+        """
+        Inicializa la caché.
+
+        Args:
+            directorio: Directorio base de la caché
+            modelo: Nombre del modelo de embeddings
+            max_entradas: Número máximo de vectores antes de expulsar por LRU
+        """
+        if max_entradas < 1:
+            raise ValueError("La caché debe admitir al menos una entrada")
+
+        self.modelo = modelo
+        self.max_entradas = max_entradas
+        self.directorio = Path(directorio) / re.sub(r"[^\w.-]", "_", modelo)
+        self.aciertos = 0
+        self.fallos = 0
+
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[str, int]" = OrderedDict()
+        self._libres: List[int] = []
+        self._dimension: Optional[int] = None
+        self._capacidad = 0
+        self._vectores: Optional[np.memmap] = None
+        self._claves: Optional[np.memmap] = None
+
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self._bloqueo = self._bloquear_escritura()
+        self.solo_lectura = self._bloqueo is None
+        if self.solo_lectura:
+            logging.warning(
+                f"Otra instancia escribe en la caché de embeddings {self.directorio}; se abre en solo lectura"
+            )
+        self._cargar()
+
+    def clave(self, texto: str) -> str:
+        """Clave de caché para un texto con el modelo actual."""
+        return hashlib.sha256(f"{self.modelo}\x00{texto}".encode("utf-8")).hexdigest()
+
+    def obtener(self, textos: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Busca los embeddings de varios textos.
+
+        Args:
+            textos: Textos a buscar
+
+        Returns:
+            Lista alineada con los textos; None en los que no están en caché
+        """
+        resultado: List[Optional[List[float]]] = []
+        with self._lock:
+            for texto in textos:
+                clave = self.clave(texto)
+                posicion = self._entradas.get(clave)
+                if posicion is not None and not self._etiqueta_coincide(posicion, clave):
+                    # La posición se reutilizó para otra clave sin actualizar el índice
+                    del self._entradas[clave]
+                    if not self.solo_lectura:
+                        self._libres.append(posicion)
+                    posicion = None
+                if posicion is None:
+                    self.fallos += 1
+                    resultado.append(None)
+                    continue
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                resultado.append(self._vectores[posicion].tolist())
+        return resultado
+
+    def guardar(self, textos: Sequence[str], vectores: Sequence[Sequence[float]]) -> None:
+        """
+        Añade embeddings a la caché, expulsando los menos usados si está llena.
+
+        Args:
+            textos: Textos embebidos
+            vectores: Embeddings correspondientes
+        """
+        if not textos or (self.solo_lectura and not self._pasar_a_escritura()):
+            return
+        with self._lock:
+            if self._vectores is None:
+                self._crear_almacen(len(vectores[0]))
+            for texto, vector in zip(textos, vectores):
+                if len(vector) != self._dimension:
+                    raise ValueError(
+                        f"Dimensión inválida: esperado {self._dimension}, recibido {len(vector)}"
+                    )
+                clave = self.clave(texto)
+                posicion = self._entradas.get(clave)
+                if posicion is None:
+                    posicion = self._reservar_posicion()
+                    self._entradas[clave] = posicion
+                else:
+                    self._entradas.move_to_end(clave)
+                # La etiqueta se borra antes de escribir el vector y se pone después:
+                # una escritura a medias nunca queda asociada a la clave anterior
+                self._claves[posicion] = 0
+                self._vectores[posicion] = np.asarray(vector, dtype=np.float32)
+                self._claves[posicion] = np.frombuffer(bytes.fromhex(clave), dtype=np.uint8)
+
+    def persistir(self) -> None:
+        """Vuelca los vectores a disco y guarda el índice de forma atómica."""
+        with self._lock:
+            if self._vectores is None or self.solo_lectura:
+                return
+            self._vectores.flush()
+            self._claves.flush()
+            indice = {
+                'modelo': self.modelo,
+                'dimension': self._dimension,
+                'capacidad': self._capacidad,
+                'entradas': list(self._entradas.items())
+            }
+            temporal = self.directorio / f"{self.ARCHIVO_INDICE}.tmp"
+            with open(temporal, "w", encoding="utf-8") as archivo:
+                json.dump(indice, archivo)
+            temporal.replace(self.directorio / self.ARCHIVO_INDICE)
+
+    def cerrar(self) -> None:
+        """Persiste la caché y libera el bloqueo de escritura para otra instancia."""
+        self.persistir()
+        with self._lock:
+            if self._bloqueo is not None:
+                self._bloqueo.close()
+                self._bloqueo = None
+            self.solo_lectura = True
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Retorna aciertos, fallos y ocupación de la caché."""
+        with self._lock:
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'entradas': len(self._entradas),
+                'max_entradas': self.max_entradas
+            }
+
+    def _cargar(self) -> None:
+        """Abre la caché existente en disco, si la hay."""
+        rutas = [self.directorio / nombre for nombre in (
+            self.ARCHIVO_INDICE, self.ARCHIVO_VECTORES, self.ARCHIVO_CLAVES
+        )]
+        if not all(ruta.is_file() for ruta in rutas):
+            return
+        try:
+            with open(rutas[0], encoding="utf-8") as archivo:
+                indice = json.load(archivo)
+            self._dimension = int(indice['dimension'])
+            capacidad = int(indice['capacidad'])
+            self._abrir_almacen(capacidad if self.solo_lectura else max(capacidad, self.max_entradas))
+            self._entradas = OrderedDict(
+                (clave, int(posicion)) for clave, posicion in indice['entradas']
+                if int(posicion) < self._capacidad and self._etiqueta_coincide(int(posicion), clave)
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Caché de embeddings ilegible, se descarta: {e}")
+            self._entradas = OrderedDict()
+            self._vectores = None
+            self._claves = None
+            self._dimension = None
+            return
+        descartadas = len(indice['entradas']) - len(self._entradas)
+        if descartadas:
+            logging.warning(f"{descartadas} entradas de la caché de embeddings no coinciden con su posición")
+
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+        ocupadas = set(self._entradas.values())
+        self._libres = [p for p in range(self._capacidad - 1, -1, -1) if p not in ocupadas]
+        logging.info(
+            f"Caché de embeddings cargada: {len(self._entradas)} vectores de {self.modelo}"
+        )
+
+    def _crear_almacen(self, dimension: int) -> None:
+        """Crea los archivos de vectores y etiquetas para la dimensión del modelo."""
+        self._dimension = dimension
+        self._abrir_almacen(self.max_entradas)
+        self._libres = list(range(self._capacidad - 1, -1, -1))
+
+    def _abrir_almacen(self, capacidad: int) -> None:
+        """Mapea los archivos de vectores y etiquetas, ampliándolos si hace falta y se puede escribir."""
+        modo = "r" if self.solo_lectura else "r+"
+        archivos = [
+            (self.ARCHIVO_VECTORES, np.float32, self._dimension),
+            (self.ARCHIVO_CLAVES, np.uint8, self.BYTES_CLAVE)
+        ]
+        mapas = []
+        for nombre, tipo, columnas in archivos:
+            ruta = self.directorio / nombre
+            if not self.solo_lectura:
+                tamano = capacidad * columnas * np.dtype(tipo).itemsize
+                with open(ruta, "ab") as archivo:
+                    if archivo.tell() < tamano:
+                        archivo.truncate(tamano)
+            mapas.append(np.memmap(ruta, dtype=tipo, mode=modo, shape=(capacidad, columnas)))
+        self._capacidad = capacidad
+        self._vectores, self._claves = mapas
+
+    def _etiqueta_coincide(self, posicion: int, clave: str) -> bool:
+        """Comprueba que la posición contiene el vector de la clave."""
+        return self._claves[posicion].tobytes() == bytes.fromhex(clave)
+
+    def _bloquear_escritura(self):
+        """
+        Toma el bloqueo de escritura del directorio sin esperar.
+
+        Returns:
+            Archivo de bloqueo abierto (se libera al cerrarlo), o None si
+            otro proceso ya escribe en la caché
+        """
+        archivo = open(self.directorio / self.ARCHIVO_BLOQUEO, "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            archivo.close()
+            return None
+        return archivo
+
+    def _pasar_a_escritura(self) -> bool:
+        """
+        Intenta tomar el bloqueo de escritura y recarga la caché desde el disco.
+
+        Returns:
+            True si la instancia puede escribir
+        """
+        with self._lock:
+            if not self.solo_lectura:
+                return True
+            bloqueo = self._bloquear_escritura()
+            if bloqueo is None:
+                return False
+            # El índice en memoria puede ser anterior a lo que escribió la instancia previa
+            self._bloqueo = bloqueo
+            self.solo_lectura = False
+            self._entradas = OrderedDict()
+            self._libres = []
+            self._vectores = None
+            self._claves = None
+            self._dimension = None
+            self._capacidad = 0
+            self._cargar()
+            return True
+
+    def _reservar_posicion(self) -> int:
+        """Devuelve una posición libre, expulsando la entrada menos usada si no hay."""
+        if self._libres and len(self._entradas) < self.max_entradas:
+            return self._libres.pop()
+        _, posicion = self._entradas.popitem(last=False)
+        return posicion
@@ -0,0 +1,174 @@
+import copy
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence
+
+import numpy as np
+
+
+class CacheSemanticoRespuestas:
+    """
+    Caché de respuestas indexada por el embedding de la consulta.
+
+    Una consulta acierta si su similitud coseno con una consulta guardada
+    (con la misma configuración de generación) supera el umbral. Las entradas
+    caducan por TTL, se expulsan por LRU y se descartan todas cuando cambia
+    la versión de los datos.
+    """
+
+    def __init__(
+            self,
+            umbral_similitud: float = 0.95,
+            max_entradas: int = 256,
+            ttl_segundos: Optional[float] = 3600.0
+    ):
+        """
+        Inicializa la caché.
+
+        Args:
+            umbral_similitud: Similitud coseno mínima para considerar un acierto
+            max_entradas: Número máximo de respuestas guardadas
+            ttl_segundos: Vida de cada entrada (None = sin caducidad)
+        """
+        if not 0 < umbral_similitud <= 1:
+            raise ValueError("El umbral de similitud debe estar entre 0 y 1")
+        if max_entradas < 1:
+            raise ValueError("La caché debe admitir al menos una entrada")
+
+        self.umbral_similitud = umbral_similitud
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self.version: Optional[str] = None
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.invalidaciones = 0
+
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._siguiente_id = 0
+
+    def buscar(
+            self,
+            vector: Sequence[float],
+            configuracion: Hashable,
+            version: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Busca una respuesta para una consulta semánticamente equivalente.
+
+        Args:
+            vector: Embedding de la consulta
+            configuracion: Configuración de generación (p. ej. temperatura y max_tokens)
+            version: Versión actual de los datos
+
+        Returns:
+            Copia del resultado guardado con la similitud en los metadatos, o None
+        """
+        consulta = self._normalizar(vector)
+        with self._lock:
+            self._comprobar_version(version)
+            self._purgar_caducadas()
+
+            candidatos = [
+                (id_entrada, entrada) for id_entrada, entrada in self._entradas.items()
+                if entrada['configuracion'] == configuracion
+            ]
+            if not candidatos:
+                self.fallos += 1
+                return None
+
+            similitudes = np.vstack([e['vector'] for _, e in candidatos]) @ consulta
+            mejor = int(np.argmax(similitudes))
+            if similitudes[mejor] < self.umbral_similitud:
+                self.fallos += 1
+                return None
+
+            id_entrada, entrada = candidatos[mejor]
+            self._entradas.move_to_end(id_entrada)
+            self.aciertos += 1
+            resultado = copy.deepcopy(entrada['resultado'])
+
+        resultado.setdefault('metadatos', {}).update({
+            'cache_respuesta': True,
+            'similitud_cache': float(similitudes[mejor])
+        })
+        return resultado
+
+    def guardar(
+            self,
+            vector: Sequence[float],
+            configuracion: Hashable,
+            version: str,
+            resultado: Dict[str, Any]
+    ) -> None:
+        """
+        Guarda la respuesta de una consulta.
+
+        Args:
+            vector: Embedding de la consulta
+            configuracion: Configuración de generación
+            version: Versión de los datos con la que se generó la respuesta
+            resultado: Resultado de la consulta
+        """
+        entrada = {
+            'vector': self._normalizar(vector),
+            'configuracion': configuracion,
+            'resultado': copy.deepcopy(resultado),
+            'creado': time.monotonic()
+        }
+        with self._lock:
+            self._comprobar_version(version)
+            self._entradas[self._siguiente_id] = entrada
+            self._siguiente_id += 1
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.expulsiones += 1
+
+    def invalidar(self) -> None:
+        """Descarta todas las respuestas guardadas."""
+        with self._lock:
+            self._entradas.clear()
+            self.invalidaciones += 1
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Retorna contadores de aciertos, fallos, expulsiones e invalidaciones."""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+                'expulsiones': self.expulsiones,
+                'invalidaciones': self.invalidaciones,
+                'entradas': len(self._entradas),
+                'version': self.version
+            }
+
+    def _comprobar_version(self, version: str) -> None:
+        """Vacía la caché si los datos cambiaron; requiere tener el lock."""
+        if version != self.version:
+            if self._entradas:
+                logging.info("Versión de datos distinta, se invalida la caché de respuestas")
+                self._entradas.clear()
+                self.invalidaciones += 1
+            self.version = version
+
+    def _purgar_caducadas(self) -> None:
+        """Elimina las entradas que superaron el TTL; requiere tener el lock."""
+        if self.ttl_segundos is None:
+            return
+        limite = time.monotonic() - self.ttl_segundos
+        caducadas = [i for i, e in self._entradas.items() if e['creado'] < limite]
+        for id_entrada in caducadas:
+            del self._entradas[id_entrada]
+        self.expulsiones += len(caducadas)
+
+    @staticmethod
+    def _normalizar(vector: Sequence[float]) -> np.ndarray:
+        """Normaliza el vector para que el producto escalar sea la similitud coseno."""
+        vector = np.asarray(vector, dtype=np.float32)
+        norma = np.linalg.norm(vector)
+        return vector / norma if norma > 0 else vector
@@ -2,6 +2,10 @@ import pandas as pd
 from pathlib import Path
 import logging
 from utils.decorators import time_decorator
+from utils.metricas import REGISTRO, etapa
+
+CARGAS = REGISTRO.contador("csv_cargas_total", "Cargas del CSV de clientes por resultado", ("resultado",))
+FILAS = REGISTRO.medidor("csv_filas", "Filas del último CSV cargado")
 
 
 class CargadorDatosCSV:
@@ -25,18 +29,25 @@ class CargadorDatosCSV:
         """
         try:
             logging.info(f"Cargando datos desde {self.ruta_archivo}...")
-            self.df = pd.read_csv(self.ruta_archivo)
+            with etapa("csv.cargar", ruta=str(self.ruta_archivo)) as medicion:
+                self.df = pd.read_csv(self.ruta_archivo)
+                medicion.anotar(filas=len(self.df))
+            CARGAS.inc(resultado='ok')
+            FILAS.fijar(len(self.df))
             logging.info("Datos cargados exitosamente")
             logging.info(f"Columnas del DataFrame: {self.df.columns.tolist()}")
             return self.df
 
         except FileNotFoundError:
+            CARGAS.inc(resultado='no_encontrado')
             logging.error(f"Archivo no encontrado: {self.ruta_archivo}")
             return None
         except pd.errors.EmptyDataError:
+            CARGAS.inc(resultado='vacio')
             logging.error("El archivo CSV está vacío")
             return None
         except Exception as e:
+            CARGAS.inc(resultado='error')
             logging.error(f"Error inesperado: {e}")
             return None
 
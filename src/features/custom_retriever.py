@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from utils.document_processor import FUENTE_RESUMEN
+from features.extractor_predicados import ExtractorPredicados
+from utils.trazas import en_contexto
+from utils.metricas import etapa
+
+# Pool compartido para las subbúsquedas; Chroma libera el GIL durante la búsqueda HNSW
+_EJECUTOR_SUBBUSQUEDAS = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rag-subbusqueda")
+
+
+class CustomRetriever(BaseRetriever):
+    """
+    Retriever que combina el resumen del CSV con los documentos generales.
+
+    Lanza una subbúsqueda filtrada a los resúmenes (k_resumen) y otra general
+    (k_general, con el filtro 'where' de los predicados de la consulta si hay
+    extractor). Con embeddings, la consulta se embebe una sola vez y las
+    subbúsquedas por vector se ejecutan en paralelo; sin ellos, se delega en
+    similarity_search de la base vectorial. El resultado lleva primero los
+    resúmenes y no repite documentos.
+    """
+
+    # VectorStore y ExtractorPredicados; sin validación de tipo para admitir dobles de prueba
+    vectorstore: Any
+    embeddings: Any = None
+    extractor: Any = None
+    k_resumen: int = 1
+    k_general: int = 4
+
+    def filtro_para(self, consulta: str) -> Optional[Dict[str, Any]]:
+        """Filtro 'where' de la búsqueda general, o None sin extractor o predicados."""
+        if self.extractor is None:
+            return None
+        return ExtractorPredicados.a_filtro_where(self.extractor.extraer(consulta))
+
+    def _subbusquedas(self, consulta: str) -> List[Tuple[int, Optional[Dict[str, Any]]]]:
+        """Pares (k, filtro) de las subbúsquedas, en el orden del resultado."""
+        subbusquedas = []
+        if self.k_resumen > 0:
+            subbusquedas.append((self.k_resumen, {"source": FUENTE_RESUMEN}))
+        if self.k_general > 0:
+            subbusquedas.append((self.k_general, self.filtro_para(consulta)))
+        return subbusquedas
+
+    def _buscar_texto(self, consulta: str, k: int, filtro: Optional[Dict[str, Any]]) -> List[Document]:
+        """Subbúsqueda por texto; sin resultados con filtro general, repite sin filtro."""
+        with etapa("recuperacion.subbusqueda", k=k, filtro=filtro):
+            if filtro is None:
+                return self.vectorstore.similarity_search(consulta, k=k)
+            documentos = self.vectorstore.similarity_search(consulta, filter=filtro, k=k)
+            if not documentos and filtro.get("source") != FUENTE_RESUMEN:
+                logging.info(f"Ningún documento cumple {filtro}, se busca sin filtro")
+                documentos = self.vectorstore.similarity_search(consulta, k=k)
+            return documentos
+
+    def _buscar_vector(self, vector: List[float], k: int, filtro: Optional[Dict[str, Any]]) -> List[Document]:
+        """Subbúsqueda por vector con el mismo criterio que _buscar_texto."""
+        with etapa("recuperacion.subbusqueda", k=k, filtro=filtro):
+            documentos = self.vectorstore.similarity_search_by_vector(vector, k=k, filter=filtro)
+            if not documentos and filtro is not None and filtro.get("source") != FUENTE_RESUMEN:
+                logging.info(f"Ningún documento cumple {filtro}, se busca sin filtro")
+                documentos = self.vectorstore.similarity_search_by_vector(vector, k=k)
+            return documentos
+
+    def _embeber_consulta(self, consulta: str) -> List[float]:
+        """Embebe la consulta una sola vez para todas las subbúsquedas."""
+        with etapa("embeddings.consulta"):
+            return self.embeddings.embed_query(consulta)
+
+    @staticmethod
+    def _combinar(resultados: List[List[Document]]) -> List[Document]:
+        """Concatena los resultados en orden, sin documentos repetidos."""
+        vistos = set()
+        combinados = []
+        for documentos in resultados:
+            for documento in documentos:
+                clave = (documento.page_content, documento.metadata.get("source"))
+                if clave not in vistos:
+                    vistos.add(clave)
+                    combinados.append(documento)
+        return combinados
+
+    def _get_relevant_documents(
+            self,
+            query: str,
+            *,
+            run_manager: Optional[CallbackManagerForRetrieverRun] = None
+    ) -> List[Document]:
+        """
+        Ejecuta las subbúsquedas y combina sus resultados.
+
+        Args:
+            query: Consulta
+            run_manager: Gestor de callbacks de LangChain
+
+        Returns:
+            Resúmenes seguidos de los documentos generales, sin repetidos
+        """
+        subbusquedas = self._subbusquedas(query)
+        if self.embeddings is None:
+            # Sin embeddings compartidos cada subbúsqueda embebería la consulta por su cuenta
+            resultados = [self._buscar_texto(query, k, filtro) for k, filtro in subbusquedas]
+        else:
+            vector = self._embeber_consulta(query)
+            buscar = en_contexto(self._buscar_vector)
+            futuros = [
+                _EJECUTOR_SUBBUSQUEDAS.submit(buscar, vector, k, filtro)
+                for k, filtro in subbusquedas
+            ]
+            resultados = [futuro.result() for futuro in futuros]
+        return self._combinar(resultados)
+
+    async def _aget_relevant_documents(
+            self,
+            query: str,
+            *,
+            run_manager: Optional[AsyncCallbackManagerForRetrieverRun] = None
+    ) -> List[Document]:
+        """
+        Versión asíncrona: las subbúsquedas se lanzan a la vez en el pool
+        sin bloquear el bucle de eventos.
+
+        Args:
+            query: Consulta
+            run_manager: Gestor de callbacks de LangChain
+
+        Returns:
+            Resúmenes seguidos de los documentos generales, sin repetidos
+        """
+        bucle = asyncio.get_running_loop()
+        subbusquedas = self._subbusquedas(query)
+        if self.embeddings is None:
+            resultados = await bucle.run_in_executor(
+                _EJECUTOR_SUBBUSQUEDAS,
+                en_contexto(lambda: [self._buscar_texto(query, k, filtro) for k, filtro in subbusquedas])
+            )
+        else:
+            vector = await bucle.run_in_executor(
+                _EJECUTOR_SUBBUSQUEDAS, en_contexto(self._embeber_consulta), query
+            )
+            buscar = en_contexto(self._buscar_vector)
+            resultados = await asyncio.gather(*(
+                bucle.run_in_executor(_EJECUTOR_SUBBUSQUEDAS, buscar, vector, k, filtro)
+                for k, filtro in subbusquedas
+            ))
+        return self._combinar(list(resultados))
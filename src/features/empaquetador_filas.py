@@ -0,0 +1,93 @@
+import logging
+from typing import List, Optional, Tuple
+
+import pandas as pd
+from langchain_core.documents import Document
+
+
+class EmpaquetadorFilas:
+    """
+    Chunker para datos tabulares: agrupa varias filas del CSV en cada chunk
+    con la cabecera una sola vez, en lugar de un documento por fila.
+
+    Permite equilibrar el número de vectores del índice con la
+    granularidad de lo que se recupera.
+    """
+
+    def __init__(
+            self,
+            filas_por_chunk: int = 10,
+            max_caracteres: Optional[int] = None,
+            columna_id: str = "customer_id"
+    ):
+        """
+        Inicializa el empaquetador.
+
+        Args:
+            filas_por_chunk: Filas máximas por chunk
+            max_caracteres: Presupuesto de caracteres por chunk, cabecera incluida
+                (None = sin límite); un chunk siempre lleva al menos una fila
+            columna_id: Columna que identifica cada fila
+        """
+        if filas_por_chunk < 1:
+            raise ValueError("filas_por_chunk debe ser mayor que 0")
+        if max_caracteres is not None and max_caracteres < 1:
+            raise ValueError("max_caracteres debe ser mayor que 0")
+
+        self.filas_por_chunk = filas_por_chunk
+        self.max_caracteres = max_caracteres
+        self.columna_id = columna_id
+
+    def empaquetar(self, df: pd.DataFrame) -> List[Tuple[str, Document]]:
+        """
+        Agrupa las filas del DataFrame en chunks.
+
+        Args:
+            df: Datos tabulares con la columna ID
+
+        Returns:
+            Pares (id, documento); el ID es "primera..última" clave del chunk
+            y metadata['claves'] lista todas las claves separadas por comas
+
+        Raises:
+            ValueError: Si falta la columna ID
+        """
+        if self.columna_id not in df.columns:
+            raise ValueError(f"Falta la columna ID: {self.columna_id}")
+        if df.empty:
+            return []
+
+        cabecera = ",".join(map(str, df.columns))
+        # to_csv serializa todas las filas de una vez; los datos no contienen saltos de línea
+        lineas = df.to_csv(header=False, index=False, lineterminator="\n").split("\n")[:len(df)]
+        claves = df[self.columna_id].astype(str).tolist()
+
+        chunks: List[Tuple[str, Document]] = []
+        inicio = 0
+        while inicio < len(lineas):
+            fin = inicio + 1
+            tamano = len(cabecera) + 1 + len(lineas[inicio])
+            while fin < len(lineas) and fin - inicio < self.filas_por_chunk:
+                siguiente = tamano + 1 + len(lineas[fin])
+                if self.max_caracteres is not None and siguiente > self.max_caracteres:
+                    break
+                tamano = siguiente
+                fin += 1
+
+            claves_chunk = claves[inicio:fin]
+            id_chunk = claves_chunk[0] if len(claves_chunk) == 1 else f"{claves_chunk[0]}..{claves_chunk[-1]}"
+            chunks.append((id_chunk, Document(
+                page_content="\n".join([cabecera] + lineas[inicio:fin]),
+                metadata={
+                    'source': id_chunk,
+                    'claves': ",".join(claves_chunk),
+                    'filas': len(claves_chunk)
+                }
+            )))
+            inicio = fin
+
+        logging.info(
+            f"{len(lineas)} filas empaquetadas en {len(chunks)} chunks "
+            f"(hasta {self.filas_por_chunk} filas por chunk)"
+        )
+        return chunks
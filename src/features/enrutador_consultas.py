@@ -0,0 +1,350 @@
+import re
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.document_processor import BORDES_EDAD, ETIQUETAS_EDAD
+from features.gestor_clientes import GestorClientes
+from features.extractor_predicados import (
+    CAMPOS_NUMERICOS, ExtractorPredicados, normalizar_texto
+)
+
+# Dimensiones de agrupación ("tasa de deserción por país"); el texto ya está sin tildes
+DIMENSIONES = {
+    'country': r"pais(?:es)?|countr(?:y|ies)",
+    'gender': r"genero|sexo|gender",
+    'rango_edad': r"(?:rangos?\s+de\s+)?edad(?:es)?|age(?:\s+group)?",
+    'products_number': r"(?:numero\s+de\s+)?productos|products",
+    'active_member': r"actividad|miembros?\s+activos?|active\s+members?",
+    'credit_card': r"tarjeta(?:\s+de\s+credito)?|credit\s+card",
+    'tenure': r"antiguedad|tenure"
+}
+
+# Métricas agregadas: (nombre, patrón, requiere un campo numérico)
+METRICAS = [
+    ('tasa', r"tasa\s+de\s+(?:desercion|abandono|churn|fuga)|churn\s+rate|"
+             r"porcentaje\s+de\s+(?:desercion|abandono)|(?:desercion|abandono)\s+(?:media|promedio)", False),
+    ('conteo', r"\bcuant[oa]s\b|\b(?:numero|cantidad|total)\s+de\s+clientes\b|\bhow\s+many\b|\bcount\b", False),
+    ('mean', r"\bpromedio\b|\bmedi[oa]\b|\baverage\b|\bmean\b", True),
+    ('median', r"\bmediana\b|\bmedian\b", True),
+    ('max', r"\bmaxim[oa]\b(?!\s*(?:de\s*)?\d)|\bhighest\b", True),
+    ('min', r"\bminim[oa]\b(?!\s*(?:de\s*)?\d)|\blowest\b", True),
+    ('sum', r"\b(?:suma|total)\b|\bsum\b", True)
+]
+
+ETIQUETAS_METRICAS = {
+    'tasa': "Tasa de deserción",
+    'conteo': "Número de clientes",
+    'mean': "Promedio de {campo}",
+    'median': "Mediana de {campo}",
+    'max': "Máximo de {campo}",
+    'min': "Mínimo de {campo}",
+    'sum': "Total de {campo}"
+}
+
+# Preguntas explicativas: van al LLM aunque nombren un cliente, una métrica o un filtro.
+# "como máximo/mínimo" es un operador de los filtros, no un "cómo"
+PATRON_ABIERTA = re.compile(
+    r"\bpor\s*que\b|\bcomo\b(?!\s+(?:maximo|minimo)\b)|\binfluye|\brelacion|\bfactores?\b|\bexplica|"
+    r"\bcaracteristicas\b|\bpatron(?:es)?\b|\bperfil\b|\brecomend|\bwhy\b|\bhow\b(?!\s+many)|\bexplain"
+)
+
+
+class EnrutadorConsultas:
+    """
+    Enruta las consultas antes del sistema RAG.
+
+    Las preguntas por un cliente concreto, los agregados ("tasa de deserción
+    por país", "balance promedio de clientes activos") y los filtros se
+    responden con pandas sobre el DataFrame del gestor; las preguntas
+    abiertas y las explicativas ("¿por qué se fue el cliente ...?") llegan al LLM.
+    """
+
+    RUTAS = ('id_cliente', 'agregado', 'filtro', 'abierta')
+
+    def __init__(self, gestor: GestorClientes, max_clientes_listados: int = 10):
+        """
+        Inicializa el enrutador.
+
+        Args:
+            gestor: Gestor con el DataFrame de clientes
+            max_clientes_listados: IDs de ejemplo incluidos en las respuestas de filtro
+        """
+        self.gestor = gestor
+        self.max_clientes_listados = max_clientes_listados
+        # Los IDs se comprueban en el índice del gestor para ver las actualizaciones
+        self.extractor = ExtractorPredicados(gestor.obtener_dataframe(), existe_cliente=gestor.existe_cliente)
+
+        self._lock = threading.Lock()
+        self._consultas = {ruta: 0 for ruta in self.RUTAS}
+        self._latencias = {ruta: deque(maxlen=1000) for ruta in self.RUTAS}
+
+        dimensiones = "|".join(f"(?P<{d}>{p})" for d, p in DIMENSIONES.items())
+        self._patron_agrupacion = re.compile(
+            rf"\b(?:por|segun|by|per)\s+(?:el\s+|la\s+|los\s+|las\s+|cada\s+)?(?:{dimensiones})\b"
+        )
+        self._patron_campos = {
+            columna: re.compile(rf"\b(?:{patron})\b") for columna, patron in CAMPOS_NUMERICOS.items()
+        }
+
+    def enrutar(self, consulta: str) -> Dict[str, Any]:
+        """
+        Clasifica una consulta sin ejecutarla.
+
+        Args:
+            consulta: Pregunta en lenguaje natural
+
+        Returns:
+            Diccionario con ruta y, según la ruta, customer_id, filtros,
+            metrica, campo y agrupacion
+        """
+        texto = normalizar_texto(consulta)
+        if PATRON_ABIERTA.search(texto):
+            # Un dato o una métrica no responden a un "por qué"
+            return {'ruta': 'abierta'}
+
+        id_cliente = self.extractor.extraer_id_cliente(consulta)
+        if id_cliente is not None:
+            return {'ruta': 'id_cliente', 'customer_id': id_cliente}
+
+        filtros = self.extractor.extraer(consulta)
+
+        agrupacion = None
+        coincidencia = self._patron_agrupacion.search(texto)
+        if coincidencia:
+            agrupacion = next(d for d, valor in coincidencia.groupdict().items() if valor)
+            texto = texto[:coincidencia.start()] + texto[coincidencia.end():]
+
+        metrica, campo = self._detectar_metrica(texto, filtros)
+        if metrica is not None:
+            return {
+                'ruta': 'agregado', 'metrica': metrica, 'campo': campo,
+                'agrupacion': agrupacion, 'filtros': filtros
+            }
+
+        if filtros:
+            return {'ruta': 'filtro', 'filtros': filtros}
+
+        return {'ruta': 'abierta'}
+
+    def responder(self, consulta: str) -> Optional[Dict[str, Any]]:
+        """
+        Responde la consulta con pandas si su ruta lo permite.
+
+        Args:
+            consulta: Pregunta en lenguaje natural
+
+        Returns:
+            Resultado con el formato de SistemaRAG.realizar_consulta, o None
+            si la consulta es abierta y debe ir al LLM
+        """
+        inicio = time.perf_counter()
+        decision = self.enrutar(consulta)
+        resultado = None
+
+        try:
+            if decision['ruta'] == 'id_cliente':
+                resultado = self._responder_cliente(decision['customer_id'])
+            elif decision['ruta'] == 'agregado':
+                resultado = self._responder_agregado(decision)
+            elif decision['ruta'] == 'filtro':
+                resultado = self._responder_filtro(decision['filtros'])
+        except Exception as e:
+            logging.error(f"Error al responder la ruta {decision['ruta']}, se usará el LLM: {e}")
+            decision = {'ruta': 'abierta'}
+            resultado = None
+
+        latencia = time.perf_counter() - inicio
+        self._registrar(decision['ruta'], latencia)
+        logging.info(f"Consulta enrutada a '{decision['ruta']}' en {latencia * 1000:.1f} ms")
+
+        if resultado is None:
+            return None
+        resultado['metadatos'].update({
+            'tiempo_respuesta': latencia,
+            'num_documentos': 0,
+            'modelo': 'pandas',
+            'cache_respuesta': False,
+            'ruta': decision['ruta']
+        })
+        return resultado
+
+    def estadisticas(self) -> Dict[str, Dict[str, float]]:
+        """
+        Retorna las decisiones de enrutado y sus latencias.
+
+        Returns:
+            Por ruta: consultas, latencia_media_ms y latencia_p95_ms
+        """
+        with self._lock:
+            resumen = {}
+            for ruta in self.RUTAS:
+                latencias = np.asarray(self._latencias[ruta], dtype=float) * 1000
+                resumen[ruta] = {
+                    'consultas': self._consultas[ruta],
+                    'latencia_media_ms': float(latencias.mean()) if latencias.size else 0.0,
+                    'latencia_p95_ms': float(np.percentile(latencias, 95)) if latencias.size else 0.0
+                }
+            return resumen
+
+    def _registrar(self, ruta: str, latencia: float) -> None:
+        """Acumula la decisión y su latencia."""
+        with self._lock:
+            self._consultas[ruta] += 1
+            self._latencias[ruta].append(latencia)
+
+    def _detectar_metrica(
+            self,
+            texto: str,
+            filtros: List[Dict[str, Any]]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Identifica la métrica pedida y el campo sobre el que se calcula.
+
+        Returns:
+            (metrica, campo); (None, None) si no hay métrica calculable
+        """
+        columnas_filtradas = {filtro['columna'] for filtro in filtros}
+        posiciones = {}
+        for columna, patron in self._patron_campos.items():
+            coincidencia = patron.search(texto)
+            if coincidencia and columna not in columnas_filtradas:
+                posiciones[columna] = coincidencia.start()
+        campo = min(posiciones, key=posiciones.get) if posiciones else None
+
+        for metrica, patron, requiere_campo in METRICAS:
+            if re.search(patron, texto):
+                if not requiere_campo:
+                    return metrica, None
+                if campo is not None:
+                    return metrica, campo
+        return None, None
+
+    def _responder_cliente(self, customer_id: int) -> Optional[Dict[str, Any]]:
+        """Ficha de un cliente con las estadísticas del gestor."""
+        estadisticas = self.gestor.obtener_estadisticas_cliente(customer_id)
+        datos = self.gestor.obtener_cliente(customer_id)
+        if estadisticas is None or datos is None:
+            return None
+        datos['risk_level'] = estadisticas['risk_level']
+
+        lineas = [f"Cliente {customer_id}:"]
+        lineas += [f"- {columna}: {valor}" for columna, valor in datos.items() if columna != 'customer_id']
+        return {
+            'respuesta': "\n".join(lineas),
+            'documentos_fuente': [],
+            'metadatos': {'datos': datos}
+        }
+
+    def _responder_agregado(self, decision: Dict[str, Any]) -> Dict[str, Any]:
+        """Calcula una métrica, opcionalmente filtrada y agrupada."""
+        df = self.gestor.obtener_instantanea()
+        filtros = decision['filtros']
+        subconjunto = df[ExtractorPredicados.aplicar(df, filtros)]
+        metrica, campo, agrupacion = decision['metrica'], decision['campo'], decision['agrupacion']
+
+        etiqueta = ETIQUETAS_METRICAS[metrica].format(campo=campo)
+        if filtros:
+            etiqueta += f" ({ExtractorPredicados.describir(filtros)})"
+
+        valor = self._calcular(subconjunto, metrica, campo)
+        datos: Dict[str, Any] = {'metrica': metrica, 'campo': campo, 'valor': valor, 'clientes': len(subconjunto)}
+        lineas = []
+
+        if agrupacion:
+            claves = self._claves_agrupacion(subconjunto, agrupacion)
+            grupos = subconjunto.groupby(claves, observed=True)
+            valores = self._calcular_por_grupo(grupos, metrica, campo)
+            tamanos = grupos.size()
+            datos['agrupacion'] = agrupacion
+            datos['grupos'] = {str(g): v for g, v in valores.items()}
+            lineas.append(f"{etiqueta} por {agrupacion}:")
+            lineas += [
+                f"- {grupo}: {self._formatear(metrica, v)} ({int(tamanos[grupo])} clientes)"
+                for grupo, v in valores.items()
+            ]
+            lineas.append(f"Total: {self._formatear(metrica, valor)} ({len(subconjunto)} clientes)")
+        elif metrica == 'conteo':
+            lineas.append(f"{etiqueta}: {self._formatear(metrica, valor)}")
+        else:
+            lineas.append(f"{etiqueta}: {self._formatear(metrica, valor)} ({len(subconjunto)} clientes)")
+
+        if filtros and metrica != 'conteo':
+            global_ = self._calcular(df, metrica, campo)
+            datos['valor_global'] = global_
+            lineas.append(f"Valor para todos los clientes: {self._formatear(metrica, global_)} ({len(df)} clientes)")
+
+        return {
+            'respuesta': "\n".join(lineas),
+            'documentos_fuente': [],
+            'metadatos': {'datos': datos}
+        }
+
+    def _responder_filtro(self, filtros: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Resume los clientes que cumplen los filtros."""
+        df = self.gestor.obtener_instantanea()
+        subconjunto = df[ExtractorPredicados.aplicar(df, filtros)]
+        ids = subconjunto['customer_id'].head(self.max_clientes_listados).tolist()
+        datos = {
+            'clientes': len(subconjunto),
+            'customer_ids': ids,
+            'tasa_desercion': self._calcular(subconjunto, 'tasa', None) if 'churn' in df else None,
+            'balance_promedio': self._calcular(subconjunto, 'mean', 'balance'),
+            'credit_score_promedio': self._calcular(subconjunto, 'mean', 'credit_score')
+        }
+
+        lineas = [f"Clientes con {ExtractorPredicados.describir(filtros)}: {len(subconjunto)}"]
+        if len(subconjunto):
+            if datos['tasa_desercion'] is not None:
+                lineas.append(f"- Tasa de deserción: {self._formatear('tasa', datos['tasa_desercion'])}")
+            lineas.append(f"- Balance promedio: {self._formatear('mean', datos['balance_promedio'])}")
+            lineas.append(f"- Credit score promedio: {self._formatear('mean', datos['credit_score_promedio'])}")
+            lineas.append(f"- Ejemplos de clientes: {', '.join(map(str, ids))}")
+        return {
+            'respuesta': "\n".join(lineas),
+            'documentos_fuente': [],
+            'metadatos': {'datos': datos}
+        }
+
+    @staticmethod
+    def _claves_agrupacion(df: pd.DataFrame, agrupacion: str) -> pd.Series:
+        """Serie por la que se agrupa; la edad se agrupa en rangos."""
+        if agrupacion == 'rango_edad':
+            return pd.cut(df['age'], bins=BORDES_EDAD, labels=ETIQUETAS_EDAD, right=False)
+        return df[agrupacion]
+
+    @staticmethod
+    def _calcular(df: pd.DataFrame, metrica: str, campo: Optional[str]) -> float:
+        """Valor de la métrica sobre todo el DataFrame."""
+        if metrica == 'conteo':
+            return float(len(df))
+        if df.empty:
+            return float('nan')
+        if metrica == 'tasa':
+            return float(df['churn'].mean() * 100)
+        return float(getattr(df[campo], metrica)())
+
+    @staticmethod
+    def _calcular_por_grupo(grupos, metrica: str, campo: Optional[str]) -> Dict[Any, float]:
+        """Valor de la métrica para cada grupo."""
+        if metrica == 'conteo':
+            serie = grupos.size()
+        elif metrica == 'tasa':
+            serie = grupos['churn'].mean() * 100
+        else:
+            serie = grupos[campo].agg(metrica)
+        return {grupo: float(valor) for grupo, valor in serie.items()}
+
+    @staticmethod
+    def _formatear(metrica: str, valor: float) -> str:
+        """Formato legible según la métrica."""
+        if metrica == 'tasa':
+            return f"{valor:.1f}%"
+        if metrica == 'conteo':
+            return f"{int(valor):,}"
+        return f"{valor:,.2f}"
@@ -0,0 +1,320 @@
+import re
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# Sinónimos de las columnas numéricas, en español e inglés
+CAMPOS_NUMERICOS = {
+    'credit_score': r"credit\s*score|puntuaci[oó]n\s+(?:de\s+)?cr[eé]dito|score",
+    'balance': r"balance|saldo",
+    'products_number': r"n[uú]mero\s+de\s+productos|productos|products",
+    'age': r"edad|age",
+    'estimated_salary': r"salario(?:\s+estimado)?|sueldo|salary",
+    'tenure': r"antig[uü]edad|tenure"
+}
+
+# Operadores de comparación y su forma en pandas
+OPERADORES = [
+    (r"mayor(?:es)?\s+o\s+igual(?:es)?|>=|al\s+menos|como\s+m[ií]nimo|at\s+least", '>='),
+    (r"menor(?:es)?\s+o\s+igual(?:es)?|<=|como\s+m[aá]ximo|at\s+most", '<='),
+    (r"mayor(?:es)?|m[aá]s|superior(?:es)?|por\s+encima|>|over|above|greater|more", '>'),
+    (r"menor(?:es)?|menos|inferior(?:es)?|por\s+debajo|<|under|below|less|fewer", '<'),
+    (r"igual(?:es)?|=|exactamente|exactly", '==')
+]
+
+# Operadores de las edades sin campo explícito ("mayores de 60")
+OPERADORES_EDAD = {'mayores': '>', 'menores': '<', 'como maximo': '<=', 'como minimo': '>='}
+
+# Operadores de los filtros 'where' de Chroma
+OPERADORES_WHERE = {'==': '$eq', '>': '$gt', '>=': '$gte', '<': '$lt', '<=': '$lte'}
+
+PAISES = {
+    'francia': 'France', 'espana': 'Spain', 'alemania': 'Germany'
+}
+
+GENEROS = [
+    (r"\b(?:mujer(?:es)?|femenin[oa]s?|females?|women)\b", 'Female'),
+    (r"\b(?:hombres?|masculin[oa]s?|males?|men)\b", 'Male')
+]
+
+# Filtros categóricos por palabras clave: (patrón, columna, valor)
+FILTROS_CATEGORICOS = [
+    (r"\b(?:inactiv[oa]s?|no\s+activ[oa]s?|inactive)\b", 'active_member', 0),
+    (r"\b(?:activ[oa]s?|active)\b", 'active_member', 1),
+    (r"\b(?:no\s+abandonaron|retenid[oa]s?|permanecen|retained)\b", 'churn', 0),
+    (r"\b(?:abandonaron|desertores|se\s+fueron|churned)\b", 'churn', 1),
+    (r"\bsin\s+tarjeta\b", 'credit_card', 0),
+    (r"\bcon\s+tarjeta\b", 'credit_card', 1)
+]
+
+
+def _numero(nombre: str = "num") -> str:
+    """Patrón de un número con sufijo opcional de miles, en grupos con nombre."""
+    return rf"(?P<{nombre}>\d+(?:[.,]\d+)*)(?:\s*(?P<{nombre}_miles>k|mil)\b)?"
+
+
+def normalizar_texto(texto: str) -> str:
+    """Pasa a minúsculas y elimina tildes (salvo la ñ, que pasa a n)."""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def convertir_numero(texto: str, sufijo: Optional[str] = None) -> float:
+    """
+    Convierte un número escrito en español o inglés a float.
+
+    Acepta separadores de miles (100.000 o 100,000), coma decimal y
+    los sufijos k y mil.
+    """
+    if re.fullmatch(r"\d{1,3}(?:[.,]\d{3})+", texto):
+        valor = float(re.sub(r"[.,]", "", texto))
+    else:
+        valor = float(texto.replace(",", "."))
+    if sufijo:
+        valor *= 1000
+    return valor
+
+
+class ExtractorPredicados:
+    """
+    Extrae filtros estructurados (país, género, actividad, deserción y
+    comparaciones numéricas) de una pregunta en lenguaje natural y los
+    aplica de forma vectorizada sobre el DataFrame de clientes.
+    """
+
+    def __init__(self, df: pd.DataFrame, existe_cliente: Optional[Callable[[int], bool]] = None):
+        """
+        Inicializa el extractor con los valores presentes en los datos.
+
+        Args:
+            df: DataFrame de clientes
+            existe_cliente: Comprueba si un customer_id existe; por defecto se
+                usan los IDs de df, que no ven las actualizaciones posteriores
+        """
+        self.columnas = set(df.columns)
+        self.paises = dict(PAISES)
+        if 'country' in df.columns:
+            for pais in df['country'].dropna().unique():
+                self.paises[normalizar_texto(str(pais))] = pais
+        if existe_cliente is None:
+            ids_clientes = set(df['customer_id'].tolist()) if 'customer_id' in df.columns else set()
+            existe_cliente = ids_clientes.__contains__
+        self.existe_cliente = existe_cliente
+
+        campos = "|".join(f"(?P<{c}>{p})" for c, p in CAMPOS_NUMERICOS.items() if c in self.columnas)
+        operadores = "|".join(f"(?:{p})" for p, _ in OPERADORES)
+        # "balance mayor de 100000", "edad entre 30 y 40"
+        self._patron_campo_operador = re.compile(
+            rf"\b(?:{campos})\b[^\d]{{0,25}}?(?P<op>{operadores})\s*(?:de|que|a|than|to)?\s*{_numero()}"
+        )
+        self._patron_campo_entre = re.compile(
+            rf"\b(?:{campos})\b[^\d]{{0,15}}?(?:entre|between)\s*{_numero('min')}\s*(?:y|and)\s*{_numero('max')}"
+        )
+        # "más de 2 productos", "con 3 productos"
+        self._patron_operador_campo = re.compile(
+            rf"(?:(?P<op>{operadores})\s*(?:de|que|than)?|\bcon|\bwith)\s*{_numero()}\s*(?:{campos})\b"
+        )
+        # "mayores de 60", "menores de 30 años", "como máximo de 30 años"
+        self._patron_edad = re.compile(
+            rf"\b(?P<op>mayores|menores|como\s+maximo|como\s+minimo)\s+(?:de\s+)?{_numero()}"
+            rf"(?P<anos>\s*anos\b(?!\s+de\s+antiguedad))?"
+        )
+        self._patron_id = re.compile(r"\b(\d{6,9})\b")
+
+    def extraer_id_cliente(self, consulta: str) -> Optional[int]:
+        """
+        Busca un ID de cliente conocido en la consulta.
+
+        Returns:
+            El ID si aparece en la consulta y existe en los datos, o None
+        """
+        for numero in self._patron_id.findall(consulta):
+            if self.existe_cliente(int(numero)):
+                return int(numero)
+        return None
+
+    def extraer(self, consulta: str) -> List[Dict[str, Any]]:
+        """
+        Extrae los filtros de una consulta.
+
+        Args:
+            consulta: Pregunta en lenguaje natural
+
+        Returns:
+            Lista de filtros {'columna', 'operador', 'valor'}; el operador
+            'entre' lleva una tupla (mínimo, máximo)
+        """
+        texto = normalizar_texto(consulta)
+        filtros: List[Dict[str, Any]] = []
+        ocupados: List[Tuple[int, int]] = []
+
+        def libre(coincidencia: re.Match) -> bool:
+            inicio, fin = coincidencia.span()
+            if any(inicio < f and i < fin for i, f in ocupados):
+                return False
+            ocupados.append((inicio, fin))
+            return True
+
+        # Los IDs de cliente no son umbrales numéricos
+        for coincidencia in self._patron_id.finditer(texto):
+            if self.existe_cliente(int(coincidencia.group(1))):
+                ocupados.append(coincidencia.span())
+
+        for coincidencia in self._patron_campo_entre.finditer(texto):
+            if libre(coincidencia):
+                minimo, maximo = self._valor(coincidencia, 'min'), self._valor(coincidencia, 'max')
+                filtros.append({
+                    'columna': self._campo(coincidencia),
+                    'operador': 'entre',
+                    'valor': (min(minimo, maximo), max(minimo, maximo))
+                })
+
+        edades = list(self._patron_edad.finditer(texto)) if 'age' in self.columnas else []
+
+        def filtro_edad(coincidencia: re.Match) -> Dict[str, Any]:
+            return {
+                'columna': 'age',
+                'operador': OPERADORES_EDAD[re.sub(r"\s+", " ", coincidencia.group('op'))],
+                'valor': self._valor(coincidencia)
+            }
+
+        # Con "años" explícito es una edad aunque antes aparezca otro campo
+        # ("balance promedio de clientes como máximo de 30 años")
+        for coincidencia in edades:
+            if coincidencia.group('anos') and libre(coincidencia):
+                filtros.append(filtro_edad(coincidencia))
+
+        # "más de 2 productos" antes que "balance ... más de 2" para no atribuir
+        # el número al campo equivocado
+        for patron in (self._patron_operador_campo, self._patron_campo_operador):
+            for coincidencia in patron.finditer(texto):
+                if libre(coincidencia):
+                    filtros.append({
+                        'columna': self._campo(coincidencia),
+                        'operador': self._operador(coincidencia.group('op')),
+                        'valor': self._valor(coincidencia)
+                    })
+
+        for coincidencia in edades:
+            if coincidencia.group('op') in ('mayores', 'menores') and libre(coincidencia):
+                filtros.append(filtro_edad(coincidencia))
+
+        if 'country' in self.columnas:
+            paises = [
+                valor for nombre, valor in self.paises.items()
+                if re.search(rf"\b{re.escape(nombre)}\b", texto)
+            ]
+            if paises:
+                filtros.append({'columna': 'country', 'operador': 'en', 'valor': sorted(set(paises))})
+
+        if 'gender' in self.columnas:
+            for patron, valor in GENEROS:
+                if re.search(patron, texto):
+                    filtros.append({'columna': 'gender', 'operador': '==', 'valor': valor})
+                    break
+
+        columnas_usadas = set()
+        for patron, columna, valor in FILTROS_CATEGORICOS:
+            if columna in self.columnas and columna not in columnas_usadas:
+                coincidencia = re.search(patron, texto)
+                if coincidencia and libre(coincidencia):
+                    filtros.append({'columna': columna, 'operador': '==', 'valor': valor})
+                    columnas_usadas.add(columna)
+
+        return filtros
+
+    @staticmethod
+    def aplicar(df: pd.DataFrame, filtros: List[Dict[str, Any]]) -> pd.Series:
+        """
+        Construye la máscara booleana de los filtros.
+
+        Args:
+            df: DataFrame de clientes
+            filtros: Filtros devueltos por extraer
+
+        Returns:
+            Serie booleana alineada con df
+        """
+        mascara = pd.Series(True, index=df.index)
+        for filtro in filtros:
+            columna = df[filtro['columna']]
+            operador, valor = filtro['operador'], filtro['valor']
+            if operador == 'entre':
+                mascara &= columna.between(*valor)
+            elif operador == 'en':
+                mascara &= columna.isin(valor)
+            elif operador == '>':
+                mascara &= columna > valor
+            elif operador == '>=':
+                mascara &= columna >= valor
+            elif operador == '<':
+                mascara &= columna < valor
+            elif operador == '<=':
+                mascara &= columna <= valor
+            else:
+                mascara &= columna == valor
+        return mascara
+
+    @staticmethod
+    def a_filtro_where(filtros: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Traduce los filtros al formato 'where' de Chroma.
+
+        Args:
+            filtros: Filtros devueltos por extraer
+
+        Returns:
+            Filtro para similarity_search(filter=...), o None si no hay filtros
+        """
+        condiciones = []
+        for filtro in filtros:
+            columna, operador, valor = filtro['columna'], filtro['operador'], filtro['valor']
+            if operador == 'entre':
+                condiciones += [{columna: {'$gte': valor[0]}}, {columna: {'$lte': valor[1]}}]
+            elif operador == 'en':
+                condiciones.append({columna: {'$in': list(valor)}})
+            else:
+                condiciones.append({columna: {OPERADORES_WHERE[operador]: valor}})
+        if not condiciones:
+            return None
+        return condiciones[0] if len(condiciones) == 1 else {'$and': condiciones}
+
+    @staticmethod
+    def describir(filtros: List[Dict[str, Any]]) -> str:
+        """Descripción legible de los filtros, p. ej. "country en France y balance > 100000"."""
+        partes = []
+        for filtro in filtros:
+            valor = filtro['valor']
+            if filtro['operador'] == 'entre':
+                texto = f"{filtro['columna']} entre {valor[0]:g} y {valor[1]:g}"
+            elif filtro['operador'] == 'en':
+                texto = f"{filtro['columna']} en {', '.join(map(str, valor))}"
+            else:
+                valor = f"{valor:g}" if isinstance(valor, float) else valor
+                texto = f"{filtro['columna']} {filtro['operador']} {valor}"
+            partes.append(texto)
+        return " y ".join(partes)
+
+    @staticmethod
+    def _campo(coincidencia: re.Match) -> str:
+        """Columna cuyo grupo con nombre participó en la coincidencia."""
+        for columna in CAMPOS_NUMERICOS:
+            if coincidencia.groupdict().get(columna):
+                return columna
+        raise ValueError("La coincidencia no contiene ningún campo")
+
+    @staticmethod
+    def _operador(texto: Optional[str]) -> str:
+        """Operador de pandas para el texto capturado (None = igualdad)."""
+        if texto is None:
+            return '=='
+        for patron, operador in OPERADORES:
+            if re.fullmatch(patron, texto.strip()):
+                return operador
+        return '=='
+
+    @staticmethod
+    def _valor(coincidencia: re.Match, nombre: str = "num") -> float:
+        """Número capturado en el grupo indicado, con su sufijo de miles."""
+        return convertir_numero(coincidencia.group(nombre), coincidencia.group(f"{nombre}_miles"))
@@ -1,7 +1,89 @@
+import numbers
+import numpy as np
 import pandas as pd
-from typing import Dict, Optional
+from typing import Any, Dict, Iterable, Optional, Union
+import time
 import logging
+import threading
+from functools import wraps
 from utils.decorators import time_decorator, log_decorator
+from utils.trazas import trazado
+from utils.metricas import REGISTRO
+
+OPERACIONES = REGISTRO.contador(
+    "gestor_clientes_operaciones_total", "Operaciones sobre clientes por resultado",
+    ("operacion", "resultado")
+)
+LATENCIA = REGISTRO.histograma(
+    "gestor_clientes_segundos", "Latencia de las operaciones sobre clientes", ("operacion",)
+)
+CLIENTES = REGISTRO.medidor("gestor_clientes_filas", "Clientes cargados en el gestor")
+
+
+def _medir_operacion(operacion: str):
+    """
+    Decorador que cuenta la operación (ok si devuelve un valor, fallo si no;
+    un DataFrame vacío cuenta como fallo) y observa su latencia.
+    """
+    def decorador(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                resultado = func(*args, **kwargs)
+            except Exception:
+                OPERACIONES.inc(operacion=operacion, resultado='error')
+                raise
+            finally:
+                LATENCIA.observar(time.perf_counter() - inicio, operacion=operacion)
+            exito = not resultado.empty if isinstance(resultado, pd.DataFrame) else bool(resultado)
+            OPERACIONES.inc(operacion=operacion, resultado='ok' if exito else 'fallo')
+            return resultado
+        return wrapper
+    return decorador
+
+
+def _valores_validos(valores: pd.Series, destino: np.dtype) -> np.ndarray:
+    """
+    Valida una columna de cambios contra el dtype de la columna destino.
+
+    Si el dtype de la columna de cambios ya es compatible no se mira cada
+    valor; solo las columnas object (registros con tipos mezclados) se
+    revisan elemento a elemento.
+
+    Args:
+        valores: Valores nuevos; los nulos significan que la fila no cambia el campo
+        destino: dtype de la columna del gestor
+
+    Returns:
+        Máscara de las filas con un valor presente y válido
+    """
+    tipos = pd.api.types
+    presentes = valores.notna().to_numpy()
+    es_booleano = tipos.is_bool_dtype(valores.dtype)
+    if tipos.is_bool_dtype(destino):
+        aceptados, compatible = (bool, np.bool_), es_booleano
+    elif tipos.is_integer_dtype(destino):
+        if tipos.is_float_dtype(valores.dtype):
+            # Los registros sin el campo convierten la columna a float con NaN
+            return presentes & (np.mod(valores.to_numpy(), 1) == 0)
+        aceptados, compatible = (numbers.Integral,), tipos.is_integer_dtype(valores.dtype)
+    elif tipos.is_float_dtype(destino):
+        aceptados, compatible = (numbers.Real,), tipos.is_numeric_dtype(valores.dtype) and not es_booleano
+    elif tipos.is_object_dtype(destino) or tipos.is_string_dtype(destino):
+        aceptados, compatible = (str,), isinstance(valores.dtype, pd.StringDtype)
+    else:
+        return presentes & (valores.dtype == destino)
+
+    if compatible:
+        return presentes
+    if not tipos.is_object_dtype(valores.dtype):
+        return np.zeros(len(valores), dtype=bool)
+    admite_booleanos = bool in aceptados
+    return presentes & valores.map(
+        lambda valor: isinstance(valor, aceptados)
+        and (admite_booleanos or not isinstance(valor, (bool, np.bool_)))
+    ).to_numpy(dtype=bool)
 
 
 class GestorClientes:
@@ -13,7 +95,13 @@ class GestorClientes:
             df: DataFrame con datos de clientes
         """
         self.df = df.copy()
+        # La instancia puede compartirse entre sesiones de la aplicación
+        self._lock = threading.RLock()
+        # Copia de solo lectura compartida por los lectores; se descarta al actualizar
+        self._instantanea: Optional[pd.DataFrame] = None
         self._validar_columnas_requeridas()
+        self._reconstruir_indice()
+        CLIENTES.fijar(len(self.df))
         logging.info("Gestor de clientes inicializado correctamente")
 
     def _validar_columnas_requeridas(self) -> None:
@@ -26,6 +114,29 @@ class GestorClientes:
         if columnas_faltantes:
             raise ValueError(f"Faltan columnas requeridas: {columnas_faltantes}")
 
+    def _reconstruir_indice(self) -> None:
+        """
+        Reconstruye el índice hash customer_id -> posición de fila; requiere tener el lock.
+
+        Si un customer_id aparece repetido se indexa su primera fila, que es
+        la que ya usaban las consultas por máscara.
+        """
+        ids = self.df['customer_id'].to_numpy()
+        primeras = ~pd.Series(ids).duplicated(keep='first').to_numpy()
+        if not primeras.all():
+            logging.warning(f"{int((~primeras).sum())} filas con customer_id repetido; se indexa la primera")
+        self._indice = pd.Index(ids[primeras])
+        self._posiciones = np.flatnonzero(primeras)
+
+    def _posicion(self, customer_id: int) -> Optional[int]:
+        """Posición de la fila del cliente, o None si no existe; requiere tener el lock."""
+        try:
+            return int(self._posiciones[self._indice.get_loc(customer_id)])
+        except (KeyError, TypeError, pd.errors.InvalidIndexError):
+            return None
+
+    @trazado("gestor_clientes.actualizar_cliente")
+    @_medir_operacion("actualizar_cliente")
     @time_decorator
     @log_decorator
     def actualizar_cliente(self, customer_id: int, nuevos_datos: Dict) -> bool:
@@ -39,7 +150,13 @@ class GestorClientes:
         Returns:
             True si la actualización fue exitosa
         """
-        if customer_id not in self.df['customer_id'].values:
+        with self._lock:
+            return self._actualizar_cliente(customer_id, nuevos_datos)
+
+    def _actualizar_cliente(self, customer_id: int, nuevos_datos: Dict) -> bool:
+        """Actualiza un cliente; requiere tener el lock."""
+        posicion = self._posicion(customer_id)
+        if posicion is None:
             logging.warning(f"Cliente {customer_id} no encontrado")
             return False
 
@@ -52,25 +169,124 @@ class GestorClientes:
 
             # Validar tipos de datos
             for key, value in nuevos_datos.items():
-                if not isinstance(value, type(self.df[key].iloc[0])):
+                if not _valores_validos(pd.Series([value], dtype=object), self.df[key].dtype)[0]:
                     logging.error(
                         f"Tipo inválido para {key}. "
-                        f"Esperado: {type(self.df[key].iloc[0])}, "
+                        f"Esperado: {self.df[key].dtype}, "
                         f"Recibido: {type(value)}"
                     )
                     return False
 
+            nuevo_id = nuevos_datos.get('customer_id', customer_id)
+            if nuevo_id != customer_id and self._posicion(nuevo_id) is not None:
+                logging.error(f"El customer_id {nuevo_id} ya pertenece a otro cliente")
+                return False
+
             # Actualizar datos
+            self._instantanea = None
             for key, value in nuevos_datos.items():
-                self.df.loc[self.df['customer_id'] == customer_id, key] = value
+                self.df.iloc[posicion, self.df.columns.get_loc(key)] = value
                 logging.info(f"Cliente {customer_id}: {key} actualizado a {value}")
 
+            if nuevo_id != customer_id:
+                self._reconstruir_indice()
             return True
 
         except Exception as e:
             logging.error(f"Error en actualización: {e}")
             return False
 
+    @trazado("gestor_clientes.actualizar_clientes_lote")
+    @time_decorator
+    @log_decorator
+    def actualizar_clientes_lote(
+            self, cambios: Union[pd.DataFrame, Iterable[Dict[str, Any]]]
+    ) -> pd.DataFrame:
+        """
+        Actualiza varios clientes con una validación por columna y una escritura vectorizada.
+
+        Cada fila de cambios identifica al cliente por customer_id; los valores
+        nulos dejan el campo como está. Una fila se aplica entera o no se aplica:
+        falla si el cliente no existe, si su customer_id se repite en el lote o si
+        alguno de sus valores no es compatible con el dtype de la columna.
+
+        Args:
+            cambios: DataFrame o registros (diccionarios) con customer_id y los campos a cambiar
+
+        Returns:
+            DataFrame con el índice de cambios y las columnas customer_id,
+            exito y motivo (None si la fila se aplicó)
+
+        Raises:
+            ValueError: Si falta customer_id o hay columnas que no existen en el gestor
+        """
+        inicio = time.perf_counter()
+        try:
+            with self._lock:
+                resultado = self._actualizar_clientes_lote(cambios)
+        except Exception:
+            OPERACIONES.inc(operacion='actualizar_clientes_lote', resultado='error')
+            raise
+        finally:
+            LATENCIA.observar(time.perf_counter() - inicio, operacion='actualizar_clientes_lote')
+
+        exitos = int(resultado['exito'].sum())
+        OPERACIONES.inc(exitos, operacion='actualizar_clientes_lote', resultado='ok')
+        OPERACIONES.inc(len(resultado) - exitos, operacion='actualizar_clientes_lote', resultado='fallo')
+        if exitos < len(resultado):
+            logging.warning(f"{len(resultado) - exitos} de {len(resultado)} actualizaciones rechazadas")
+        return resultado
+
+    def _actualizar_clientes_lote(
+            self, cambios: Union[pd.DataFrame, Iterable[Dict[str, Any]]]
+    ) -> pd.DataFrame:
+        """Actualiza un lote de clientes; requiere tener el lock."""
+        if not isinstance(cambios, pd.DataFrame):
+            cambios = pd.DataFrame.from_records(list(cambios))
+        if cambios.empty:
+            return pd.DataFrame({'customer_id': [], 'exito': [], 'motivo': []}).astype({'exito': bool})
+        if 'customer_id' not in cambios.columns:
+            raise ValueError("Los cambios deben incluir customer_id")
+        columnas_invalidas = set(cambios.columns) - set(self.df.columns)
+        if columnas_invalidas:
+            raise ValueError(f"Columnas inválidas: {columnas_invalidas}")
+
+        ids = cambios['customer_id']
+        encontrados = self._indice.get_indexer(pd.Index(ids))
+        motivos = np.full(len(cambios), None, dtype=object)
+        motivos[encontrados < 0] = "cliente no encontrado"
+        repetidos = ids.duplicated(keep=False).to_numpy() & (encontrados >= 0)
+        motivos[repetidos] = "customer_id repetido en el lote"
+
+        # Una validación por columna; una fila con un valor inválido no se aplica
+        columnas = [columna for columna in cambios.columns if columna != 'customer_id']
+        validos = {}
+        for columna in columnas:
+            presentes = cambios[columna].notna().to_numpy()
+            validos[columna] = _valores_validos(cambios[columna], self.df[columna].dtype)
+            invalidos = presentes & ~validos[columna]
+            motivos[invalidos & pd.isna(motivos)] = f"tipo inválido para {columna}"
+
+        exito = pd.isna(motivos)
+        posiciones = self._posiciones[encontrados[exito]]
+        if exito.any():
+            self._instantanea = None
+        for columna in columnas:
+            aplicar = validos[columna][exito]
+            if not aplicar.any():
+                continue
+            valores = cambios[columna].to_numpy()[exito][aplicar]
+            destino = self.df[columna].dtype
+            if pd.api.types.is_numeric_dtype(destino) or pd.api.types.is_bool_dtype(destino):
+                valores = valores.astype(destino)
+            self.df.iloc[posiciones[aplicar], self.df.columns.get_loc(columna)] = valores
+
+        return pd.DataFrame(
+            {'customer_id': ids.to_numpy(), 'exito': exito, 'motivo': motivos}, index=cambios.index
+        )
+
+    @trazado("gestor_clientes.obtener_estadisticas_cliente")
+    @_medir_operacion("obtener_estadisticas_cliente")
     @time_decorator
     @log_decorator
     def obtener_estadisticas_cliente(self, customer_id: int) -> Optional[Dict]:
@@ -84,19 +300,21 @@ class GestorClientes:
             Diccionario con estadísticas o None
         """
         try:
-            cliente = self.df[self.df['customer_id'] == customer_id]
-            if cliente.empty:
+            with self._lock:
+                posicion = self._posicion(customer_id)
+                cliente = None if posicion is None else self.df.iloc[posicion]
+            if cliente is None:
                 logging.warning(f"Cliente {customer_id} no encontrado")
                 return None
 
             stats = {
-                'credit_score': int(cliente['credit_score'].iloc[0]),
-                'balance': float(cliente['balance'].iloc[0]),
-                'products_number': int(cliente['products_number'].iloc[0]),
-                'is_active': bool(cliente['active_member'].iloc[0]),
+                'credit_score': int(cliente['credit_score']),
+                'balance': float(cliente['balance']),
+                'products_number': int(cliente['products_number']),
+                'is_active': bool(cliente['active_member']),
                 'risk_level': self._calcular_nivel_riesgo(
-                    cliente['credit_score'].iloc[0],
-                    cliente['balance'].iloc[0]
+                    cliente['credit_score'],
+                    cliente['balance']
                 )
             }
             return stats
@@ -105,6 +323,44 @@ class GestorClientes:
             logging.error(f"Error al obtener estadísticas: {e}")
             return None
 
+    @trazado("gestor_clientes.obtener_estadisticas_clientes")
+    @_medir_operacion("obtener_estadisticas_clientes")
+    @time_decorator
+    @log_decorator
+    def obtener_estadisticas_clientes(self, customer_ids: Iterable[int]) -> pd.DataFrame:
+        """
+        Obtiene estadísticas de varios clientes en una sola pasada vectorizada.
+
+        Args:
+            customer_ids: IDs de los clientes
+
+        Returns:
+            DataFrame indexado por customer_id, en el orden pedido, con las
+            columnas de obtener_estadisticas_cliente; los IDs no encontrados se omiten
+        """
+        ids = pd.Index(list(customer_ids))
+        columnas = ['credit_score', 'balance', 'products_number', 'active_member']
+        with self._lock:
+            encontrados = self._indice.get_indexer(ids)
+            validos = encontrados >= 0
+            filas = self.df.iloc[self._posiciones[encontrados[validos]]][columnas]
+
+        if not validos.all():
+            logging.warning(f"{int((~validos).sum())} de {len(ids)} clientes no encontrados")
+
+        credit_score = filas['credit_score'].to_numpy().astype(int)
+        balance = filas['balance'].to_numpy().astype(float)
+        return pd.DataFrame(
+            {
+                'credit_score': credit_score,
+                'balance': balance,
+                'products_number': filas['products_number'].to_numpy().astype(int),
+                'is_active': filas['active_member'].to_numpy().astype(bool),
+                'risk_level': self._calcular_niveles_riesgo(credit_score, balance)
+            },
+            index=pd.Index(ids[validos], name='customer_id')
+        )
+
     def _calcular_nivel_riesgo(self, credit_score: int, balance: float) -> str:
         """Calcula nivel de riesgo del cliente."""
         if credit_score >= 750:
@@ -114,6 +370,63 @@ class GestorClientes:
         else:
             return 'ALTO'
 
+    @staticmethod
+    def _calcular_niveles_riesgo(credit_scores: np.ndarray, balances: np.ndarray) -> np.ndarray:
+        """Versión vectorizada de _calcular_nivel_riesgo."""
+        return np.select(
+            [credit_scores >= 750, (credit_scores >= 600) & (balances > 0)],
+            ['BAJO', 'MEDIO'],
+            default='ALTO'
+        ).astype(object)
+
+    def existe_cliente(self, customer_id: int) -> bool:
+        """
+        Comprueba en el índice de customer_id si el cliente existe.
+
+        Args:
+            customer_id: ID del cliente
+
+        Returns:
+            True si hay una fila con ese customer_id
+        """
+        with self._lock:
+            return self._posicion(customer_id) is not None
+
+    def obtener_cliente(self, customer_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene la fila completa de un cliente a través del índice de customer_id.
+
+        Args:
+            customer_id: ID del cliente
+
+        Returns:
+            Diccionario columna -> valor (tipos de Python) o None si no existe
+        """
+        with self._lock:
+            posicion = self._posicion(customer_id)
+            if posicion is None:
+                return None
+            fila = self.df.iloc[posicion]
+        return {
+            columna: (valor.item() if hasattr(valor, 'item') else valor)
+            for columna, valor in fila.items()
+        }
+
+    @trazado("gestor_clientes.obtener_dataframe")
     def obtener_dataframe(self) -> pd.DataFrame:
         """Retorna copia del DataFrame."""
-        return self.df.copy()
\ No newline at end of file
+        with self._lock:
+            return self.df.copy()
+
+    def obtener_instantanea(self) -> pd.DataFrame:
+        """
+        Retorna una copia del DataFrame compartida entre lectores.
+
+        Solo se vuelve a copiar después de una actualización, así que las
+        consultas de solo lectura no copian el DataFrame en cada llamada.
+        No debe modificarse; para eso está obtener_dataframe.
+        """
+        with self._lock:
+            if self._instantanea is None:
+                self._instantanea = self.df.copy()
+            return self._instantanea
\ No newline at end of file
@@ -0,0 +1,113 @@
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from langchain_core.documents import Document
+
+
+class ManifiestoIndice:
+    """Manifiesto de huellas de contenido de los documentos indexados."""
+
+    NOMBRE_ARCHIVO = "manifiesto_indice.json"
+
+    def __init__(self, directorio: str):
+        """
+        Inicializa el manifiesto.
+
+        Args:
+            directorio: Directorio de persistencia del índice
+        """
+        self.ruta = Path(directorio) / self.NOMBRE_ARCHIVO
+
+    @staticmethod
+    def calcular_huella(documento: Document) -> str:
+        """
+        Calcula la huella SHA-256 de un documento.
+
+        Args:
+            documento: Documento a procesar
+
+        Returns:
+            Huella hexadecimal del contenido y los metadatos
+        """
+        metadatos = json.dumps(documento.metadata, sort_keys=True, default=str)
+        contenido = f"{documento.page_content}\x00{metadatos}".encode("utf-8")
+        return hashlib.sha256(contenido).hexdigest()
+
+    def cargar(self) -> Optional[Dict[str, Any]]:
+        """
+        Carga el manifiesto desde disco.
+
+        Returns:
+            Diccionario con configuración y huellas o None si no existe
+        """
+        if not self.ruta.is_file():
+            return None
+        try:
+            with open(self.ruta, encoding="utf-8") as archivo:
+                return json.load(archivo)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Manifiesto ilegible, se reconstruirá el índice: {e}")
+            return None
+
+    def guardar(self, huellas: Dict[str, str], configuracion: Dict[str, Any]) -> None:
+        """
+        Guarda el manifiesto de forma atómica.
+
+        Args:
+            huellas: Huella por ID de documento
+            configuracion: Configuración con la que se construyó el índice
+        """
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = self.ruta.with_suffix(".tmp")
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump({"configuracion": configuracion, "huellas": huellas}, archivo)
+        temporal.replace(self.ruta)
+
+    def calcular_cambios(
+            self,
+            documentos: Dict[str, Document],
+            configuracion: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Compara los documentos actuales con el manifiesto guardado.
+
+        Args:
+            documentos: Documentos actuales por ID
+            configuracion: Configuración actual del índice
+
+        Returns:
+            Diccionario con 'nuevos', 'modificados', 'eliminados', 'huellas'
+            y 'reconstruir' (True si no hay manifiesto o cambió la configuración)
+        """
+        huellas = {
+            id_doc: self.calcular_huella(doc) for id_doc, doc in documentos.items()
+        }
+        anterior = self.cargar()
+
+        if anterior is None or anterior.get("configuracion") != configuracion:
+            return {
+                'nuevos': list(huellas),
+                'modificados': [],
+                'eliminados': [],
+                'huellas': huellas,
+                'reconstruir': True
+            }
+
+        huellas_anteriores = anterior.get("huellas", {})
+        nuevos = [i for i in huellas if i not in huellas_anteriores]
+        modificados = [
+            i for i in huellas
+            if i in huellas_anteriores and huellas_anteriores[i] != huellas[i]
+        ]
+        eliminados = [i for i in huellas_anteriores if i not in huellas]
+
+        return {
+            'nuevos': nuevos,
+            'modificados': modificados,
+            'eliminados': eliminados,
+            'huellas': huellas,
+            'reconstruir': False
+        }
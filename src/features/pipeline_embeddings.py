@@ -0,0 +1,300 @@
+import os
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Any
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
+
+from features.cache_embeddings import CacheEmbeddings
+from utils.trazas import en_contexto
+from utils.metricas import REGISTRO, etapa, registrar_cache
+
+# Modelo de embeddings de cada proceso worker
+_modelo_worker: Optional[FastEmbedEmbeddings] = None
+
+# Marca de fin de cola entre etapas
+_FIN = object()
+
+INDEXADOS = REGISTRO.contador(
+    "rag_documentos_indexados_total", "Documentos embebidos y escritos en el índice"
+)
+
+
+def _inicializar_worker(modelo_embeddings: str, hilos: int) -> None:
+    """Carga el modelo ONNX una sola vez por proceso worker."""
+    global _modelo_worker
+    _modelo_worker = FastEmbedEmbeddings(model_name=modelo_embeddings, threads=hilos)
+
+
+def _embeber_lote(textos: List[str]) -> List[List[float]]:
+    """Embebe un lote de textos en el proceso worker."""
+    return _modelo_worker.embed_documents(textos)
+
+
+class PipelineEmbeddings:
+    """
+    Pipeline de ingesta en tres etapas conectadas por colas acotadas:
+    agrupación de chunks en lotes, cálculo de embeddings y escritura
+    en la base vectorial.
+    """
+
+    def __init__(
+            self,
+            embeddings: Embeddings,
+            escritor: Callable[[List[str], List[List[float]], List[Document]], None],
+            tamano_lote: int = 256,
+            num_workers: int = 1,
+            modelo_embeddings: Optional[str] = None,
+            max_lotes_en_cola: int = 4,
+            cache: Optional[CacheEmbeddings] = None
+    ):
+        """
+        Inicializa el pipeline.
+
+        Args:
+            embeddings: Modelo de embeddings usado con un solo worker
+            escritor: Función que persiste (ids, vectores, documentos)
+            tamano_lote: Documentos por lote de embeddings
+            num_workers: Procesos para la inferencia ONNX (1 = en proceso)
+            modelo_embeddings: Modelo de FastEmbed que cargan los workers
+            max_lotes_en_cola: Capacidad de cada cola entre etapas
+            cache: Caché de embeddings; solo se calculan los textos ausentes
+        """
+        if tamano_lote < 1:
+            raise ValueError("El tamaño de lote debe ser mayor que 0")
+        if num_workers < 1:
+            raise ValueError("El número de workers debe ser mayor que 0")
+        if num_workers > 1 and not modelo_embeddings:
+            raise ValueError("Con varios workers hay que indicar el modelo de embeddings")
+
+        self.embeddings = embeddings
+        self.escritor = escritor
+        self.tamano_lote = tamano_lote
+        self.num_workers = num_workers
+        self.modelo_embeddings = modelo_embeddings
+        self.max_lotes_en_cola = max_lotes_en_cola
+        self.cache = cache
+
+    def ejecutar(self, documentos: Iterable[Tuple[str, Document]]) -> Dict[str, Any]:
+        """
+        Ejecuta la ingesta completa.
+
+        Args:
+            documentos: Pares (id, documento); puede ser un generador
+
+        Returns:
+            Diccionario con documentos, lotes, aciertos_cache, segundos
+            y docs_por_segundo
+
+        Raises:
+            Exception: El primer error producido en cualquier etapa
+        """
+        cola_lotes: queue.Queue = queue.Queue(maxsize=self.max_lotes_en_cola)
+        cola_escritura: queue.Queue = queue.Queue(maxsize=self.max_lotes_en_cola)
+        errores: List[BaseException] = []
+        contadores = {'documentos': 0, 'lotes': 0}
+
+        # Las etapas heredan la traza y el span padre del hilo que ejecuta la ingesta
+        hilo_embeddings = threading.Thread(
+            target=en_contexto(self._etapa_embeddings),
+            args=(cola_lotes, cola_escritura, errores),
+            name="pipeline-embeddings",
+            daemon=True
+        )
+        hilo_escritura = threading.Thread(
+            target=en_contexto(self._etapa_escritura),
+            args=(cola_escritura, errores, contadores),
+            name="pipeline-escritura",
+            daemon=True
+        )
+
+        aciertos_iniciales = self.cache.aciertos if self.cache is not None else 0
+        inicio = time.perf_counter()
+        hilo_embeddings.start()
+        hilo_escritura.start()
+        try:
+            self._etapa_lotes(documentos, cola_lotes, errores)
+        finally:
+            cola_lotes.put(_FIN)
+            hilo_embeddings.join()
+            hilo_escritura.join()
+            if self.cache is not None:
+                self.cache.persistir()
+        segundos = time.perf_counter() - inicio
+
+        if errores:
+            raise errores[0]
+
+        aciertos = (self.cache.aciertos - aciertos_iniciales) if self.cache is not None else 0
+        INDEXADOS.inc(contadores['documentos'])
+        if self.cache is not None:
+            registrar_cache('embeddings', aciertos, contadores['documentos'] - aciertos)
+        estadisticas = {
+            'documentos': contadores['documentos'],
+            'lotes': contadores['lotes'],
+            'aciertos_cache': aciertos,
+            'segundos': segundos,
+            'docs_por_segundo': contadores['documentos'] / segundos if segundos > 0 else 0.0
+        }
+        logging.info(
+            f"Ingesta completada: {estadisticas['documentos']} documentos en "
+            f"{segundos:.2f} segundos ({estadisticas['docs_por_segundo']:.1f} docs/s, "
+            f"{estadisticas['aciertos_cache']} desde caché, "
+            f"lote={self.tamano_lote}, workers={self.num_workers})"
+        )
+        return estadisticas
+
+    def _etapa_lotes(
+            self,
+            documentos: Iterable[Tuple[str, Document]],
+            cola_lotes: queue.Queue,
+            errores: List[BaseException]
+    ) -> None:
+        """Agrupa los documentos en lotes y los encola."""
+        lote: List[Tuple[str, Document]] = []
+        for par in documentos:
+            if errores:
+                return
+            lote.append(par)
+            if len(lote) == self.tamano_lote:
+                cola_lotes.put(lote)
+                lote = []
+        if lote:
+            cola_lotes.put(lote)
+
+    def _etapa_embeddings(
+            self,
+            cola_lotes: queue.Queue,
+            cola_escritura: queue.Queue,
+            errores: List[BaseException]
+    ) -> None:
+        """Calcula los embeddings de cada lote, en proceso o en un pool."""
+        try:
+            if self.num_workers == 1:
+                self._embeber_en_proceso(cola_lotes, cola_escritura, errores)
+            else:
+                self._embeber_en_pool(cola_lotes, cola_escritura, errores)
+        except BaseException as e:
+            # Solo llega aquí si falla la creación del pool, antes de consumir la cola
+            errores.append(e)
+            self._vaciar(cola_lotes)
+        finally:
+            cola_escritura.put(_FIN)
+
+    def _embeber_en_proceso(
+            self,
+            cola_lotes: queue.Queue,
+            cola_escritura: queue.Queue,
+            errores: List[BaseException]
+    ) -> None:
+        """Embebe los lotes con el modelo del proceso actual."""
+        while (lote := cola_lotes.get()) is not _FIN:
+            if errores:
+                continue
+            try:
+                with etapa("embeddings.lote", documentos=len(lote)) as medicion:
+                    textos, vectores, faltan = self._consultar_cache(lote)
+                    nuevos = self.embeddings.embed_documents([textos[i] for i in faltan]) if faltan else []
+                    medicion.anotar(calculados=len(faltan))
+                cola_escritura.put((lote, self._completar(textos, vectores, faltan, nuevos)))
+            except BaseException as e:
+                errores.append(e)
+
+    def _embeber_en_pool(
+            self,
+            cola_lotes: queue.Queue,
+            cola_escritura: queue.Queue,
+            errores: List[BaseException]
+    ) -> None:
+        """Reparte los lotes entre procesos worker con un número acotado en vuelo."""
+        hilos = max(1, (os.cpu_count() or 1) // self.num_workers)
+        en_vuelo: deque = deque()
+        # spawn evita heredar los hilos del proceso padre al hacer fork
+        with ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_inicializar_worker,
+                initargs=(self.modelo_embeddings, hilos)
+        ) as pool:
+            while (lote := cola_lotes.get()) is not _FIN:
+                if errores:
+                    continue
+                try:
+                    textos, vectores, faltan = self._consultar_cache(lote)
+                    futuro = pool.submit(_embeber_lote, [textos[i] for i in faltan]) if faltan else None
+                    en_vuelo.append((lote, textos, vectores, faltan, futuro))
+                    if len(en_vuelo) >= 2 * self.num_workers:
+                        self._entregar(en_vuelo.popleft(), cola_escritura)
+                except BaseException as e:
+                    errores.append(e)
+            try:
+                while en_vuelo and not errores:
+                    self._entregar(en_vuelo.popleft(), cola_escritura)
+            except BaseException as e:
+                errores.append(e)
+
+    def _entregar(self, pendiente: Tuple, cola_escritura: queue.Queue) -> None:
+        """Espera el resultado de un lote enviado al pool y lo pasa a escritura."""
+        lote, textos, vectores, faltan, futuro = pendiente
+        with etapa("embeddings.lote", documentos=len(lote), calculados=len(faltan)):
+            nuevos = futuro.result() if futuro is not None else []
+        cola_escritura.put((lote, self._completar(textos, vectores, faltan, nuevos)))
+
+    def _consultar_cache(self, lote: List[Tuple[str, Document]]) -> Tuple[List[str], List, List[int]]:
+        """
+        Separa un lote en vectores ya cacheados y textos por embeber.
+
+        Returns:
+            Textos del lote, vectores (None si faltan) e índices pendientes
+        """
+        textos = [doc.page_content for _, doc in lote]
+        if self.cache is None:
+            return textos, [None] * len(textos), list(range(len(textos)))
+        vectores = self.cache.obtener(textos)
+        return textos, vectores, [i for i, vector in enumerate(vectores) if vector is None]
+
+    def _completar(
+            self,
+            textos: List[str],
+            vectores: List,
+            faltan: List[int],
+            nuevos: List[List[float]]
+    ) -> List[List[float]]:
+        """Rellena los vectores calculados y los guarda en la caché."""
+        for indice, vector in zip(faltan, nuevos):
+            vectores[indice] = vector
+        if self.cache is not None and faltan:
+            self.cache.guardar([textos[i] for i in faltan], nuevos)
+        return vectores
+
+    def _etapa_escritura(
+            self,
+            cola_escritura: queue.Queue,
+            errores: List[BaseException],
+            contadores: Dict[str, int]
+    ) -> None:
+        """Escribe los lotes embebidos en la base vectorial."""
+        while (elemento := cola_escritura.get()) is not _FIN:
+            if errores:
+                continue
+            lote, vectores = elemento
+            try:
+                with etapa("vector_db.escribir", documentos=len(lote)):
+                    self.escritor([id_doc for id_doc, _ in lote], vectores, [doc for _, doc in lote])
+                contadores['documentos'] += len(lote)
+                contadores['lotes'] += 1
+            except BaseException as e:
+                errores.append(e)
+
+    @staticmethod
+    def _vaciar(cola: queue.Queue) -> None:
+        """Consume la cola hasta la marca de fin para no bloquear al productor."""
+        while cola.get() is not _FIN:
+            pass
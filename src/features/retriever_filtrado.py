@@ -0,0 +1,53 @@
+import logging
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from features.extractor_predicados import ExtractorPredicados
+
+
+class RetrieverFiltrado(BaseRetriever):
+    """
+    Retriever que extrae predicados de la consulta ("clientes de Spain con
+    más de 2 productos") y los pasa como filtro 'where' a la base vectorial,
+    de modo que la búsqueda solo recorre las filas que los cumplen.
+
+    Requiere que cada documento tenga las columnas como metadatos tipados.
+    """
+
+    vectorstore: VectorStore
+    # ExtractorPredicados; sin validación de tipo para admitir dobles de prueba
+    extractor: Any
+    k: int = 5
+
+    def filtro_para(self, consulta: str) -> Optional[dict]:
+        """Filtro 'where' de la consulta, o None si no contiene predicados."""
+        return ExtractorPredicados.a_filtro_where(self.extractor.extraer(consulta))
+
+    def _get_relevant_documents(
+            self,
+            query: str,
+            *,
+            run_manager: Optional[CallbackManagerForRetrieverRun] = None
+    ) -> List[Document]:
+        """
+        Busca con el filtro de la consulta; sin resultados, repite sin filtro.
+
+        Args:
+            query: Consulta
+            run_manager: Gestor de callbacks de LangChain
+
+        Returns:
+            Hasta k documentos
+        """
+        filtro = self.filtro_para(query)
+        if filtro is not None:
+            documentos = self.vectorstore.similarity_search(query, k=self.k, filter=filtro)
+            if documentos:
+                logging.info(f"Búsqueda filtrada con {filtro}: {len(documentos)} documentos")
+                return documentos
+            logging.info(f"Ningún documento cumple {filtro}, se busca sin filtro")
+        return self.vectorstore.similarity_search(query, k=self.k)
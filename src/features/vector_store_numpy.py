@@ -0,0 +1,672 @@
+import json
+import logging
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# Comparadores del formato 'where' de Chroma
+OPERADORES_WHERE: Dict[str, Callable[[Any, Any], bool]] = {
+    '$eq': lambda valor, objetivo: valor == objetivo,
+    '$ne': lambda valor, objetivo: valor != objetivo,
+    '$gt': lambda valor, objetivo: valor is not None and valor > objetivo,
+    '$gte': lambda valor, objetivo: valor is not None and valor >= objetivo,
+    '$lt': lambda valor, objetivo: valor is not None and valor < objetivo,
+    '$lte': lambda valor, objetivo: valor is not None and valor <= objetivo,
+    '$in': lambda valor, objetivo: valor in objetivo,
+    '$nin': lambda valor, objetivo: valor not in objetivo,
+}
+
+
+def cumple_filtro(metadatos: Dict[str, Any], filtro: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evalúa un filtro 'where' de Chroma sobre los metadatos de un documento.
+
+    Args:
+        metadatos: Metadatos del documento
+        filtro: Filtro ({'country': 'Spain'}, {'balance': {'$gt': 100}},
+            {'$and': [...]}, {'$or': [...]}) o None
+
+    Returns:
+        True si el documento cumple el filtro
+    """
+    if not filtro:
+        return True
+    for clave, condicion in filtro.items():
+        if clave == '$and':
+            if not all(cumple_filtro(metadatos, parte) for parte in condicion):
+                return False
+        elif clave == '$or':
+            if not any(cumple_filtro(metadatos, parte) for parte in condicion):
+                return False
+        elif isinstance(condicion, dict):
+            valor = metadatos.get(clave)
+            for operador, objetivo in condicion.items():
+                if operador not in OPERADORES_WHERE:
+                    raise ValueError(f"Operador de filtro no soportado: {operador}")
+                try:
+                    if not OPERADORES_WHERE[operador](valor, objetivo):
+                        return False
+                except TypeError:
+                    # Tipos no comparables (p. ej. texto frente a número): no cumple
+                    return False
+        elif metadatos.get(clave) != condicion:
+            return False
+    return True
+
+
+def calcular_recall(obtenidos: Sequence[Sequence[Any]], esperados: Sequence[Sequence[Any]]) -> float:
+    """
+    Recall@k medio: fracción de los resultados esperados que se recuperaron.
+
+    Args:
+        obtenidos: Resultados de cada consulta
+        esperados: Resultados exactos de cada consulta
+
+    Returns:
+        Recall medio entre 0 y 1
+    """
+    aciertos = [
+        len(set(encontrados) & set(exactos)) / max(len(exactos), 1)
+        for encontrados, exactos in zip(obtenidos, esperados)
+    ]
+    return sum(aciertos) / max(len(aciertos), 1)
+
+
+class VectorStoreNumpy(VectorStore):
+    """
+    Base vectorial en proceso con búsqueda exacta por fuerza bruta.
+
+    Los embeddings se normalizan y se guardan en una matriz contigua
+    (mapeada en memoria si hay directorio); el top-k es un producto
+    matriz-vector más argpartition, y varias consultas se resuelven con un
+    único producto matricial. Con vectores normalizados, la similitud coseno
+    ordena igual que la distancia L2 de Chroma.
+
+    La matriz puede guardarse en float16 o en int8 con una escala por vector.
+    Con factor_reevaluacion > 0 se conservan además los vectores float32 en
+    un archivo aparte, que solo se lee para reordenar los
+    k * factor_reevaluacion mejores candidatos.
+    """
+
+    ARCHIVO_VECTORES = "vectores_numpy.bin"
+    ARCHIVO_ESCALAS = "escalas_numpy.f32"
+    ARCHIVO_ORIGINALES = "originales_numpy.f32"
+    ARCHIVO_INDICE = "documentos_numpy.json"
+    CAPACIDAD_INICIAL = 1024
+    PRECISIONES = {'float32': np.float32, 'float16': np.float16, 'int8': np.int8}
+    # Filas convertidas a float32 por bloque al puntuar matrices cuantizadas
+    FILAS_POR_BLOQUE = 8192
+
+    def __init__(
+            self,
+            embedding_function: Embeddings,
+            persist_directory: Optional[str] = None,
+            precision: str = "float32",
+            factor_reevaluacion: int = 0
+    ):
+        """
+        Inicializa la base vectorial, cargando la persistida si existe.
+
+        Args:
+            embedding_function: Modelo con el que se embeben textos y consultas
+            persist_directory: Directorio de persistencia (None la mantiene en memoria)
+            precision: Tipo de la matriz de búsqueda: 'float32', 'float16' o 'int8'
+            factor_reevaluacion: Si es mayor que 0 y la precisión no es float32,
+                se reordenan k * factor_reevaluacion candidatos con los vectores originales
+        """
+        if precision not in self.PRECISIONES:
+            raise ValueError(f"Precisión inválida: {precision}. Opciones: {list(self.PRECISIONES)}")
+        if factor_reevaluacion < 0:
+            raise ValueError("factor_reevaluacion no puede ser negativo")
+
+        self.embedding_function = embedding_function
+        self.directorio = Path(persist_directory) if persist_directory else None
+        self.precision = precision
+        self.factor_reevaluacion = factor_reevaluacion if precision != 'float32' else 0
+
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._posiciones: Dict[str, int] = {}
+        self._textos: List[str] = []
+        self._metadatos: List[Dict[str, Any]] = []
+        self._dimension: Optional[int] = None
+        self._capacidad = 0
+        self._vectores: Optional[np.ndarray] = None
+        self._escalas: Optional[np.ndarray] = None
+        self._originales: Optional[np.ndarray] = None
+        # Máscaras de filtros ya evaluados; se vacían con cada modificación
+        self._mascaras: Dict[str, np.ndarray] = {}
+        # Aumenta con cada modificación; las búsquedas la comparan al terminar
+        self._version = 0
+
+        if self.directorio is not None:
+            self._cargar()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    def count(self) -> int:
+        """Número de documentos indexados."""
+        return len(self._ids)
+
+    def upsert(
+            self,
+            ids: Sequence[str],
+            vectores: Sequence[Sequence[float]],
+            textos: Sequence[str],
+            metadatos: Sequence[Optional[Dict[str, Any]]]
+    ) -> None:
+        """
+        Inserta o actualiza documentos ya embebidos.
+
+        Args:
+            ids: IDs de los documentos
+            vectores: Embeddings correspondientes
+            textos: Contenido de cada documento
+            metadatos: Metadatos de cada documento
+        """
+        if not ids:
+            return
+        originales = self._normalizar(np.asarray(vectores, dtype=np.float32))
+        cuantizados, escalas = self._cuantizar(originales)
+        with self._lock:
+            if self._vectores is None:
+                self._crear_almacen(originales.shape[1])
+            if originales.shape[1] != self._dimension:
+                raise ValueError(
+                    f"Dimensión inválida: esperado {self._dimension}, recibido {originales.shape[1]}"
+                )
+            nuevos = sum(1 for id_documento in set(ids) if id_documento not in self._posiciones)
+            self._asegurar_capacidad(len(self._ids) + nuevos)
+            for fila, (id_documento, texto, meta) in enumerate(zip(ids, textos, metadatos)):
+                posicion = self._posiciones.get(id_documento)
+                if posicion is None:
+                    posicion = len(self._ids)
+                    self._posiciones[id_documento] = posicion
+                    self._ids.append(id_documento)
+                    self._textos.append(texto)
+                    self._metadatos.append(dict(meta or {}))
+                else:
+                    self._textos[posicion] = texto
+                    self._metadatos[posicion] = dict(meta or {})
+                self._vectores[posicion] = cuantizados[fila]
+                if self._escalas is not None:
+                    self._escalas[posicion] = escalas[fila]
+                if self._originales is not None:
+                    self._originales[posicion] = originales[fila]
+            self._mascaras.clear()
+            self._version += 1
+
+    def add_texts(
+            self,
+            texts: Iterable[str],
+            metadatas: Optional[List[dict]] = None,
+            ids: Optional[List[str]] = None,
+            **kwargs: Any
+    ) -> List[str]:
+        """Embebe e indexa textos; genera IDs aleatorios si no se indican."""
+        textos = list(texts)
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in textos]
+        metadatos = metadatas or [{} for _ in textos]
+        self.upsert(ids, self.embedding_function.embed_documents(textos), textos, metadatos)
+        return ids
+
+    @classmethod
+    def from_texts(
+            cls,
+            texts: List[str],
+            embedding: Embeddings,
+            metadatas: Optional[List[dict]] = None,
+            ids: Optional[List[str]] = None,
+            persist_directory: Optional[str] = None,
+            **kwargs: Any
+    ) -> "VectorStoreNumpy":
+        """Crea la base vectorial e indexa los textos."""
+        vector_store = cls(embedding_function=embedding, persist_directory=persist_directory, **kwargs)
+        vector_store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return vector_store
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """
+        Elimina documentos por ID moviendo el último a cada hueco.
+
+        Args:
+            ids: IDs a eliminar (los inexistentes se ignoran)
+
+        Returns:
+            True
+        """
+        with self._lock:
+            for id_documento in ids or []:
+                posicion = self._posiciones.pop(id_documento, None)
+                if posicion is None:
+                    continue
+                ultima = len(self._ids) - 1
+                if posicion != ultima:
+                    id_ultimo = self._ids[ultima]
+                    self._ids[posicion] = id_ultimo
+                    self._textos[posicion] = self._textos[ultima]
+                    self._metadatos[posicion] = self._metadatos[ultima]
+                    for matriz in self._matrices():
+                        matriz[posicion] = matriz[ultima]
+                    self._posiciones[id_ultimo] = posicion
+                self._ids.pop()
+                self._textos.pop()
+                self._metadatos.pop()
+            self._mascaras.clear()
+            self._version += 1
+        return True
+
+    def delete_collection(self) -> None:
+        """Vacía la base vectorial y elimina sus archivos."""
+        with self._lock:
+            self._vaciar()
+            if self.directorio is not None:
+                for nombre in (self.ARCHIVO_INDICE, *(archivo for archivo, _ in self._archivos())):
+                    (self.directorio / nombre).unlink(missing_ok=True)
+
+    def persistir(self) -> None:
+        """Vuelca los vectores a disco y guarda el índice de forma atómica."""
+        with self._lock:
+            if self.directorio is None or self._vectores is None:
+                return
+            for matriz in self._matrices():
+                matriz.flush()
+            indice = {
+                'dimension': self._dimension,
+                'capacidad': self._capacidad,
+                'precision': self.precision,
+                'originales': self._originales is not None,
+                'ids': self._ids,
+                'textos': self._textos,
+                'metadatos': self._metadatos
+            }
+            temporal = self.directorio / f"{self.ARCHIVO_INDICE}.tmp"
+            with open(temporal, "w", encoding="utf-8") as archivo:
+                json.dump(indice, archivo, ensure_ascii=False)
+            temporal.replace(self.directorio / self.ARCHIVO_INDICE)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """
+        Retorna el número de vectores y los bytes que ocupan.
+
+        Returns:
+            Diccionario con vectores, precision, bytes_busqueda (matriz y
+            escalas), bytes_originales, bytes_float32 y factor_reduccion
+        """
+        with self._lock:
+            total = len(self._ids)
+            dimension = self._dimension or 0
+            bytes_busqueda = total * dimension * np.dtype(self.PRECISIONES[self.precision]).itemsize
+            if self._escalas is not None:
+                bytes_busqueda += total * np.dtype(np.float32).itemsize
+            bytes_float32 = total * dimension * np.dtype(np.float32).itemsize
+            return {
+                'vectores': total,
+                'precision': self.precision,
+                'bytes_busqueda': bytes_busqueda,
+                'bytes_originales': bytes_float32 if self._originales is not None else 0,
+                'bytes_float32': bytes_float32,
+                'factor_reduccion': bytes_float32 / bytes_busqueda if bytes_busqueda else 1.0
+            }
+
+    def informe_recall(self, vectores: Sequence[Sequence[float]], k: int = 5) -> Dict[str, Any]:
+        """
+        Mide cuánto recall@k se pierde con la cuantización.
+
+        Compara el top-k de la matriz cuantizada, con y sin reevaluación,
+        con la búsqueda exacta sobre los vectores float32 originales.
+
+        Args:
+            vectores: Embeddings de las consultas de prueba
+            k: Documentos por consulta
+
+        Returns:
+            Diccionario con precision, k, consultas, recall_cuantizado,
+            recall_reevaluado (None sin reevaluación) y las estadísticas de memoria
+
+        Raises:
+            ValueError: Si la precisión no es float32 y no se conservan los originales
+        """
+        if self.precision != 'float32' and self._originales is None:
+            raise ValueError(
+                "El informe de recall requiere factor_reevaluacion > 0 para conservar los originales"
+            )
+        with self._lock:
+            total = len(self._ids)
+            if total == 0 or len(vectores) == 0:
+                exactos = cuantizados = reevaluados = []
+            else:
+                consultas = self._normalizar(np.asarray(vectores, dtype=np.float32))
+                referencia = self._originales if self._originales is not None else self._vectores
+                exactas = consultas @ np.asarray(referencia[:total]).T
+                exactos = self._top_k(exactas, k).tolist()
+                escalas = self._escalas[:total] if self._escalas is not None else None
+                puntuaciones = self._puntuar(consultas, self._vectores[:total], escalas)
+                cuantizados = self._top_k(puntuaciones, k).tolist()
+                reevaluados = [
+                    [posicion for posicion, _ in fila]
+                    for fila in self._seleccionar(consultas, puntuaciones, None, k, self._originales)
+                ]
+        return {
+            'precision': self.precision,
+            'k': k,
+            'consultas': len(vectores),
+            'recall_cuantizado': calcular_recall(cuantizados, exactos),
+            'recall_reevaluado': calcular_recall(reevaluados, exactos) if self.factor_reevaluacion else None,
+            **self.estadisticas()
+        }
+
+    def similarity_search(
+            self,
+            query: str,
+            k: int = 4,
+            filter: Optional[Dict[str, Any]] = None,
+            **kwargs: Any
+    ) -> List[Document]:
+        """Documentos más similares a la consulta."""
+        return self.similarity_search_by_vector(
+            self.embedding_function.embed_query(query), k=k, filter=filter
+        )
+
+    def similarity_search_by_vector(
+            self,
+            embedding: List[float],
+            k: int = 4,
+            filter: Optional[Dict[str, Any]] = None,
+            **kwargs: Any
+    ) -> List[Document]:
+        """Documentos más similares a un vector de consulta."""
+        encontrados = self.similarity_search_with_score_by_vector(embedding, k, filter)
+        return [documento for documento, _ in encontrados]
+
+    def similarity_search_with_score(
+            self,
+            query: str,
+            k: int = 4,
+            filter: Optional[Dict[str, Any]] = None,
+            **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Pares (documento, similitud coseno) más similares a la consulta."""
+        return self.similarity_search_with_score_by_vector(
+            self.embedding_function.embed_query(query), k, filter
+        )
+
+    def similarity_search_with_score_by_vector(
+            self,
+            embedding: List[float],
+            k: int = 4,
+            filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """Pares (documento, similitud coseno) más similares a un vector."""
+        return self.buscar_lote_con_puntuacion([embedding], k=k, filtro=filter)[0]
+
+    def buscar_lote(
+            self,
+            vectores: Sequence[Sequence[float]],
+            k: int = 4,
+            filtro: Optional[Dict[str, Any]] = None
+    ) -> List[List[Document]]:
+        """
+        Busca varias consultas con un único producto matricial.
+
+        Args:
+            vectores: Embeddings de las consultas
+            k: Documentos por consulta
+            filtro: Filtro 'where' común a todas las consultas
+
+        Returns:
+            Documentos de cada consulta, del más al menos similar
+        """
+        return [
+            [documento for documento, _ in encontrados]
+            for encontrados in self.buscar_lote_con_puntuacion(vectores, k, filtro)
+        ]
+
+    def buscar_lote_con_puntuacion(
+            self,
+            vectores: Sequence[Sequence[float]],
+            k: int = 4,
+            filtro: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Igual que buscar_lote, con la similitud coseno de cada documento.
+
+        La puntuación se hace sin el lock sobre vistas de las matrices. Si una
+        escritura concurrente las modifica entretanto (delete mueve la última
+        fila a cada hueco), la búsqueda se repite con el lock tomado.
+        """
+        if len(vectores) == 0:
+            return []
+        with self._lock:
+            total = len(self._ids)
+            if total == 0 or k < 1:
+                return [[] for _ in vectores]
+            version = self._version
+            matriz = self._vectores[:total]
+            escalas = self._escalas[:total] if self._escalas is not None else None
+            originales = self._originales
+            mascara = self._mascara(filtro, total)
+            textos, metadatos = list(self._textos), list(self._metadatos)
+
+        candidatos = np.flatnonzero(mascara) if mascara is not None else None
+        if candidatos is not None:
+            if candidatos.size == 0:
+                return [[] for _ in vectores]
+            matriz = matriz[candidatos]
+            escalas = escalas[candidatos] if escalas is not None else None
+
+        consultas = self._normalizar(np.asarray(vectores, dtype=np.float32))
+        # (consultas, documentos): una fila de similitudes por consulta
+        puntuaciones = self._puntuar(consultas, matriz, escalas)
+        seleccion = self._seleccionar(consultas, puntuaciones, candidatos, k, originales)
+        with self._lock:
+            if self._version != version:
+                # El lock es reentrante: la repetición ve las matrices sin cambios
+                return self.buscar_lote_con_puntuacion(vectores, k, filtro)
+        return [
+            [
+                (Document(page_content=textos[posicion], metadata=dict(metadatos[posicion])), puntuacion)
+                for posicion, puntuacion in fila
+            ]
+            for fila in seleccion
+        ]
+
+    def _seleccionar(
+            self,
+            consultas: np.ndarray,
+            puntuaciones: np.ndarray,
+            candidatos: Optional[np.ndarray],
+            k: int,
+            originales: Optional[np.ndarray]
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Elige los k mejores de cada consulta, reevaluando con los originales si procede.
+
+        Args:
+            originales: Matriz de vectores originales leída con el lock (None si no se conservan)
+
+        Returns:
+            Pares (posición, similitud) de cada consulta, de mayor a menor similitud
+        """
+        reevaluar = originales is not None and self.factor_reevaluacion > 0
+        mejores = self._top_k(puntuaciones, k * self.factor_reevaluacion if reevaluar else k)
+        posiciones = candidatos[mejores] if candidatos is not None else mejores
+        if not reevaluar:
+            return [
+                [(int(p), float(s)) for p, s in zip(fila_posiciones, fila_puntuaciones[fila_indices])]
+                for fila_posiciones, fila_indices, fila_puntuaciones in zip(posiciones, mejores, puntuaciones)
+            ]
+
+        seleccion = []
+        for consulta, fila_posiciones in zip(consultas, posiciones):
+            # Solo se leen del disco los vectores originales de los candidatos
+            ordenadas = np.sort(fila_posiciones)
+            exactas = np.asarray(originales[ordenadas]) @ consulta
+            orden = np.argsort(-exactas)[:k]
+            seleccion.append([(int(ordenadas[i]), float(exactas[i])) for i in orden])
+        return seleccion
+
+    def _puntuar(
+            self,
+            consultas: np.ndarray,
+            matriz: np.ndarray,
+            escalas: Optional[np.ndarray]
+    ) -> np.ndarray:
+        """Similitudes consulta-documento; las matrices cuantizadas se convierten por bloques."""
+        if matriz.dtype == np.float32:
+            return consultas @ matriz.T
+        puntuaciones = np.empty((len(consultas), len(matriz)), dtype=np.float32)
+        for inicio in range(0, len(matriz), self.FILAS_POR_BLOQUE):
+            bloque = np.asarray(matriz[inicio:inicio + self.FILAS_POR_BLOQUE], dtype=np.float32)
+            puntuaciones[:, inicio:inicio + len(bloque)] = consultas @ bloque.T
+        if escalas is not None:
+            puntuaciones *= escalas
+        return puntuaciones
+
+    @staticmethod
+    def _top_k(puntuaciones: np.ndarray, k: int) -> np.ndarray:
+        """Índices de las k mayores puntuaciones de cada fila, de mayor a menor."""
+        k = min(k, puntuaciones.shape[1])
+        if k < puntuaciones.shape[1]:
+            mejores = np.argpartition(-puntuaciones, k - 1, axis=1)[:, :k]
+        else:
+            mejores = np.broadcast_to(np.arange(k), (len(puntuaciones), k))
+        orden = np.take_along_axis(puntuaciones, mejores, axis=1).argsort(axis=1)[:, ::-1]
+        return np.take_along_axis(mejores, orden, axis=1)
+
+    def _cuantizar(self, matriz: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Convierte vectores normalizados a la precisión configurada (con escalas en int8)."""
+        if self.precision == 'float32':
+            return matriz, None
+        if self.precision == 'float16':
+            return matriz.astype(np.float16), None
+        escalas = np.abs(matriz).max(axis=1) / 127
+        escalas[escalas == 0] = 1
+        cuantizados = np.clip(np.rint(matriz / escalas[:, None]), -127, 127).astype(np.int8)
+        return cuantizados, escalas.astype(np.float32)
+
+    def _mascara(self, filtro: Optional[Dict[str, Any]], total: int) -> Optional[np.ndarray]:
+        """Documentos que cumplen el filtro, cacheado hasta la siguiente modificación."""
+        if not filtro:
+            return None
+        clave = json.dumps(filtro, sort_keys=True)
+        mascara = self._mascaras.get(clave)
+        if mascara is None:
+            mascara = np.fromiter(
+                (cumple_filtro(meta, filtro) for meta in self._metadatos[:total]),
+                dtype=bool, count=total
+            )
+            self._mascaras[clave] = mascara
+        return mascara
+
+    @staticmethod
+    def _normalizar(matriz: np.ndarray) -> np.ndarray:
+        """Normaliza las filas a norma 1 (las nulas se dejan igual)."""
+        if matriz.ndim == 1:
+            matriz = matriz[None, :]
+        normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+        return matriz / np.where(normas == 0, 1, normas)
+
+    def _archivos(self) -> List[Tuple[str, str]]:
+        """Pares (archivo, atributo) de las matrices de la configuración actual."""
+        archivos = [(self.ARCHIVO_VECTORES, '_vectores')]
+        if self.precision == 'int8':
+            archivos.append((self.ARCHIVO_ESCALAS, '_escalas'))
+        if self.factor_reevaluacion > 0:
+            archivos.append((self.ARCHIVO_ORIGINALES, '_originales'))
+        return archivos
+
+    def _matrices(self) -> List[np.ndarray]:
+        """Matrices abiertas (vectores, escalas y originales)."""
+        matrices = [getattr(self, atributo) for _, atributo in self._archivos()]
+        return [matriz for matriz in matrices if matriz is not None]
+
+    def _vaciar(self) -> None:
+        """Olvida todos los documentos y cierra las matrices."""
+        self._ids, self._textos, self._metadatos = [], [], []
+        self._posiciones = {}
+        self._mascaras.clear()
+        self._version += 1
+        self._vectores = self._escalas = self._originales = None
+        self._dimension = None
+        self._capacidad = 0
+
+    def _cargar(self) -> None:
+        """Abre la base vectorial persistida, si la hay."""
+        ruta_indice = self.directorio / self.ARCHIVO_INDICE
+        if not ruta_indice.is_file():
+            return
+        try:
+            with open(ruta_indice, encoding="utf-8") as archivo:
+                indice = json.load(archivo)
+            if indice.get('precision', 'float32') != self.precision:
+                raise ValueError(f"precisión guardada {indice.get('precision')}, configurada {self.precision}")
+            if self.factor_reevaluacion > 0 and not indice.get('originales'):
+                raise ValueError("faltan los vectores originales para la reevaluación")
+            for nombre, _ in self._archivos():
+                if not (self.directorio / nombre).is_file():
+                    raise ValueError(f"falta {nombre}")
+            self._dimension = int(indice['dimension'])
+            self._abrir_almacen(int(indice['capacidad']))
+            self._ids = list(indice['ids'])
+            self._textos = list(indice['textos'])
+            self._metadatos = list(indice['metadatos'])
+            self._posiciones = {id_documento: i for i, id_documento in enumerate(self._ids)}
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Base vectorial NumPy ilegible, se descarta: {e}")
+            self._vaciar()
+            return
+        logging.info(f"Base vectorial NumPy cargada: {len(self._ids)} vectores ({self.precision})")
+
+    def _crear_almacen(self, dimension: int) -> None:
+        """Crea las matrices para la dimensión del modelo."""
+        self._dimension = dimension
+        if self.directorio is not None:
+            self.directorio.mkdir(parents=True, exist_ok=True)
+            for nombre, _ in self._archivos():
+                (self.directorio / nombre).unlink(missing_ok=True)
+        self._abrir_almacen(self.CAPACIDAD_INICIAL)
+
+    def _asegurar_capacidad(self, necesaria: int) -> None:
+        """Duplica la capacidad de las matrices hasta admitir 'necesaria' filas."""
+        if necesaria <= self._capacidad:
+            return
+        capacidad = max(self._capacidad, 1)
+        while capacidad < necesaria:
+            capacidad *= 2
+        self._abrir_almacen(capacidad)
+
+    def _abrir_almacen(self, capacidad: int) -> None:
+        """Mapea los archivos de las matrices (o las reserva en memoria), ampliándolos si hace falta."""
+        formas = {
+            '_vectores': (self.PRECISIONES[self.precision], (capacidad, self._dimension)),
+            '_escalas': (np.float32, (capacidad,)),
+            '_originales': (np.float32, (capacidad, self._dimension))
+        }
+        for nombre, atributo in self._archivos():
+            tipo, forma = formas[atributo]
+            actual = getattr(self, atributo)
+            if self.directorio is None:
+                nueva = np.zeros(forma, dtype=tipo)
+                if actual is not None:
+                    nueva[:self._capacidad] = actual
+                setattr(self, atributo, nueva)
+                continue
+
+            ruta = self.directorio / nombre
+            if isinstance(actual, np.memmap):
+                actual.flush()
+            tamano = int(np.prod(forma)) * np.dtype(tipo).itemsize
+            with open(ruta, "ab") as archivo:
+                if archivo.tell() < tamano:
+                    archivo.truncate(tamano)
+            setattr(self, atributo, np.memmap(ruta, dtype=tipo, mode="r+", shape=forma))
+        self._capacidad = capacidad
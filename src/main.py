@@ -1,14 +1,18 @@
 # src/main.py
+import os
 import sys
 import time
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List
 
 # Importaciones relativas desde el directorio src
 from utils.logger_config import setup_logger
+from utils.trazas import activar_trazas, desactivar_trazas
+from utils.metricas import REGISTRO, ServidorMetricas
 from features.cargador_datos_csv import CargadorDatosCSV
 from features.gestor_clientes import GestorClientes
+from features.enrutador_consultas import EnrutadorConsultas
 from model.sistema_rag import SistemaRAG
 
 
@@ -18,7 +22,9 @@ class SistemaBancario:
     def __init__(
             self,
             ruta_csv: str = "../data/raw_data/BankCustomerChurnPrediction.csv",
-            persist_directory: str = "./vector_db"
+            persist_directory: str = "./vector_db",
+            inicializacion_en_segundo_plano: bool = True,
+            **opciones_rag: Any
     ):
         """
         Inicializa el sistema bancario.
@@ -26,12 +32,16 @@ class SistemaBancario:
         Args:
             ruta_csv: Ruta al archivo de datos
             persist_directory: Directorio para la base vectorial
+            inicializacion_en_segundo_plano: Prepara el sistema RAG en un hilo aparte
+            **opciones_rag: Parámetros adicionales de SistemaRAG (url_ollama, embeddings...)
         """
         # Configurar logging
         setup_logger("banco_system.log")
 
         self.ruta_csv = Path(ruta_csv)
         self.persist_directory = Path(persist_directory)
+        self.inicializacion_en_segundo_plano = inicializacion_en_segundo_plano
+        self.opciones_rag = opciones_rag
 
         # Componentes del sistema
         self.cargador = None
@@ -59,7 +69,11 @@ class SistemaBancario:
             # Inicializar RAG
             self.rag = SistemaRAG(
                 ruta_archivo=str(self.ruta_csv),
-                persist_directory=str(self.persist_directory)
+                persist_directory=str(self.persist_directory),
+                inicializacion_en_segundo_plano=self.inicializacion_en_segundo_plano,
+                enrutador=EnrutadorConsultas(self.gestor),
+                modo_ingesta="mixto",
+                **self.opciones_rag
             )
 
             logging.info("Sistema bancario inicializado correctamente")
@@ -84,6 +98,31 @@ class SistemaBancario:
             logging.error(f"Error al analizar cliente {customer_id}: {e}")
             return None
 
+    def analizar_clientes(self, customer_ids: List[int]) -> Optional[Any]:
+        """
+        Analiza varios clientes en una sola pasada.
+
+        Args:
+            customer_ids: IDs de los clientes
+
+        Returns:
+            DataFrame con las estadísticas por customer_id (ver GestorClientes.obtener_estadisticas_clientes)
+        """
+        try:
+            return self.gestor.obtener_estadisticas_clientes(customer_ids)
+        except Exception as e:
+            logging.error(f"Error al analizar {len(customer_ids)} clientes: {e}")
+            return None
+
+    def estado_rag(self) -> Dict[str, Any]:
+        """
+        Retorna el estado de preparación del sistema RAG.
+
+        Returns:
+            Diccionario con fase, progreso, error y segundos
+        """
+        return self.rag.obtener_estado()
+
     def consultar_rag(self, consulta: str) -> Dict[str, Any]:
         """
         Realiza una consulta al sistema RAG.
@@ -96,6 +135,50 @@ class SistemaBancario:
         """
         return self.rag.realizar_consulta(consulta)
 
+    def consultar_rag_stream(self, consulta: str) -> Iterator[Dict[str, Any]]:
+        """
+        Realiza una consulta al sistema RAG recibiendo la respuesta en streaming.
+
+        Args:
+            consulta: Pregunta a realizar
+
+        Returns:
+            Iterador de eventos (documentos, tokens y fin)
+        """
+        return self.rag.realizar_consulta_stream(consulta)
+
+    def consultar_rag_lote(self, consultas: List[str], max_concurrency: int = 4) -> List[Dict[str, Any]]:
+        """
+        Realiza un lote de consultas al sistema RAG.
+
+        Args:
+            consultas: Preguntas a realizar
+            max_concurrency: Generaciones simultáneas máximas
+
+        Returns:
+            Resultados en el orden de las consultas, con su error si lo hubo
+        """
+        return self.rag.realizar_consultas_lote(consultas, max_concurrency=max_concurrency)
+
+    async def aconsultar_rag(self, consulta: str) -> Dict[str, Any]:
+        """
+        Realiza una consulta al sistema RAG sin bloquear el bucle de eventos.
+
+        Quien la ejecute con asyncio.run debe esperar cerrar() antes de que
+        el bucle termine para no dejar abierta su sesión HTTP.
+
+        Args:
+            consulta: Pregunta a realizar
+
+        Returns:
+            Respuesta del sistema RAG
+        """
+        return await self.rag.arealizar_consulta(consulta)
+
+    async def cerrar(self) -> None:
+        """Cierra las conexiones asíncronas abiertas en el bucle actual."""
+        await self.rag.cerrar()
+
     def actualizar_cliente(self, customer_id: int, nuevos_datos: Dict) -> bool:
         """
         Actualiza información de un cliente.
@@ -109,6 +192,36 @@ class SistemaBancario:
         """
         return self.gestor.actualizar_cliente(customer_id, nuevos_datos)
 
+    def actualizar_clientes_lote(self, cambios: Any) -> Any:
+        """
+        Actualiza varios clientes en una sola escritura.
+
+        Args:
+            cambios: DataFrame o registros con customer_id y los campos a cambiar
+
+        Returns:
+            DataFrame con el resultado por fila (ver GestorClientes.actualizar_clientes_lote)
+        """
+        return self.gestor.actualizar_clientes_lote(cambios)
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """
+        Retorna las métricas del proceso (consultas, errores, latencias, cachés e índice).
+
+        Returns:
+            Diccionario serializable en JSON por nombre de métrica
+        """
+        return REGISTRO.a_dict()
+
+    def obtener_estadisticas_llm(self) -> Dict[str, Any]:
+        """
+        Retorna el uso acumulado de Ollama (tokens, velocidades y cargas del modelo).
+
+        Returns:
+            Resumen de la contabilidad del LLM
+        """
+        return self.rag.obtener_estadisticas_llm()
+
 
 def mostrar_menu():
     """Muestra el menú de opciones."""
@@ -121,13 +234,33 @@ def mostrar_menu():
 
 
 def main():
-    """Función principal del sistema."""
+    """
+    Función principal del sistema.
+
+    Variables de entorno opcionales:
+        RAG_TRAZA: archivo donde escribir al salir los spans de la sesión
+            (formato Chrome trace-event)
+        RAG_METRICAS_PUERTO: puerto local donde servir /metrics (Prometheus)
+        RAG_METRICAS_JSON: archivo donde volcar las métricas al salir
+    """
+    ruta_traza = os.environ.get("RAG_TRAZA")
+    if ruta_traza:
+        activar_trazas("sistema_bancario")
+    servidor_metricas = None
+    if os.environ.get("RAG_METRICAS_PUERTO"):
+        servidor_metricas = ServidorMetricas(puerto=int(os.environ["RAG_METRICAS_PUERTO"])).iniciar()
+    sistema = None
     try:
         # Inicializar sistema
+        inicio = time.perf_counter()
         sistema = SistemaBancario()
         print("Sistema inicializado correctamente")
+        tiempo_menu = None
 
         while True:
+            if tiempo_menu is None:
+                tiempo_menu = time.perf_counter() - inicio
+                logging.info(f"Tiempo hasta el primer menú: {tiempo_menu:.2f} segundos")
             opcion = mostrar_menu()
 
             if opcion == "1":
@@ -151,14 +284,35 @@ def main():
                 print("- ¿Qué relación hay entre el balance y la retención?")
 
                 consulta = input("\nIngrese su consulta: ")
-                resultado = sistema.consultar_rag(consulta)
-
+                estado = sistema.estado_rag()
+                if estado['fase'] != 'listo':
+                    print(
+                        f"Esperando a que el sistema RAG termine de prepararse "
+                        f"({estado['fase']}, {estado['progreso']:.0%})..."
+                    )
                 print("\nRespuesta:")
                 print("-" * 50)
-                print(resultado['respuesta'])
+                metadatos = {}
+                for evento in sistema.consultar_rag_stream(consulta):
+                    if evento['tipo'] == 'token':
+                        print(evento['texto'], end="", flush=True)
+                    elif evento['tipo'] == 'fin':
+                        metadatos = evento['metadatos']
+                print()
                 print("\nEstadísticas:")
-                print(f"Documentos analizados: {resultado['metadatos']['num_documentos']}")
-                print(f"Tiempo de respuesta: {resultado['metadatos']['tiempo_respuesta']:.2f} segundos")
+                print(f"Ruta: {metadatos.get('ruta', 'abierta')}")
+                print(f"Documentos analizados: {metadatos['num_documentos']}")
+                if metadatos['tiempo_primer_token'] is not None:
+                    print(f"Tiempo hasta el primer token: {metadatos['tiempo_primer_token']:.2f} segundos")
+                print(f"Tiempo de respuesta: {metadatos['tiempo_respuesta']:.2f} segundos")
+                if metadatos.get('tokens_por_segundo_decodificacion') is not None:
+                    print(
+                        f"Tokens: {metadatos['tokens_prompt']} de prompt, "
+                        f"{metadatos['tokens_generados']} generados "
+                        f"({metadatos['tokens_por_segundo_decodificacion']:.1f} tokens/s)"
+                    )
+                if metadatos.get('carga_en_frio'):
+                    print(f"Carga del modelo: {metadatos['segundos_carga_modelo']:.2f} segundos")
 
             elif opcion == "3":
                 # Actualizar cliente
@@ -200,6 +354,17 @@ def main():
         print(f"Error: {e}")
         return 1
 
+    finally:
+        if sistema is not None:
+            sistema.rag.cerrar_cache_embeddings()
+        traza = desactivar_trazas()
+        if traza is not None:
+            logging.info(f"Traza escrita en {traza.exportar_chrome(ruta_traza)}")
+        if servidor_metricas is not None:
+            servidor_metricas.detener()
+        if os.environ.get("RAG_METRICAS_JSON"):
+            logging.info(f"Métricas escritas en {REGISTRO.exportar_json(os.environ['RAG_METRICAS_JSON'])}")
+
     return 0
 
 
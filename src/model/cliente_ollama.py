@@ -0,0 +1,132 @@
+import json
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, Optional
+
+import aiohttp
+
+
+class ClienteOllamaAsync:
+    """
+    Cliente asíncrono de la API HTTP de Ollama con conexiones reutilizables.
+
+    Mantiene una sesión aiohttp por bucle de eventos cuyo conector limita
+    el número de peticiones simultáneas al servidor. La sesión solo puede
+    cerrarse desde su bucle: quien use el cliente con asyncio.run debe
+    esperar cerrar() antes de que el bucle termine.
+    """
+
+    def __init__(
+            self,
+            base_url: str = "http://localhost:11434",
+            max_conexiones: int = 8,
+            timeout: float = 300.0
+    ):
+        """
+        Inicializa el cliente.
+
+        Args:
+            base_url: URL del servidor de Ollama
+            max_conexiones: Conexiones simultáneas máximas del pool
+            timeout: Tiempo máximo de cada petición en segundos
+        """
+        if max_conexiones < 1:
+            raise ValueError("El pool debe admitir al menos una conexión")
+
+        self.base_url = base_url.rstrip("/")
+        self.max_conexiones = max_conexiones
+        self.timeout = timeout
+        self._sesiones: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _obtener_sesion(self) -> aiohttp.ClientSession:
+        """Retorna la sesión del bucle actual, creándola si hace falta."""
+        bucle = asyncio.get_running_loop()
+        with self._lock:
+            self._descartar_sesiones_terminadas()
+            sesion = self._sesiones.get(bucle)
+            if sesion is None or sesion.closed:
+                sesion = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=self.max_conexiones),
+                    timeout=aiohttp.ClientTimeout(total=self.timeout)
+                )
+                self._sesiones[bucle] = sesion
+        return sesion
+
+    def _descartar_sesiones_terminadas(self) -> None:
+        """Olvida las sesiones de bucles ya cerrados, avisando si no se cerraron."""
+        for bucle, sesion in list(self._sesiones.items()):
+            if bucle.is_closed():
+                del self._sesiones[bucle]
+                if not sesion.closed:
+                    logging.warning(
+                        "Sesión de Ollama sin cerrar en un bucle de eventos ya terminado; "
+                        "espere cerrar() antes de salir de asyncio.run"
+                    )
+
+    async def generar(
+            self,
+            modelo: str,
+            prompt: str,
+            opciones: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Genera una respuesta completa.
+
+        Args:
+            modelo: Modelo de Ollama
+            prompt: Texto de entrada
+            opciones: Opciones de generación (temperature, num_predict...)
+
+        Returns:
+            Respuesta JSON de /api/generate (texto en 'response' y contadores)
+
+        Raises:
+            RuntimeError: Si el servidor responde con error
+        """
+        cuerpo = {'model': modelo, 'prompt': prompt, 'stream': False, 'options': opciones or {}}
+        async with self._obtener_sesion().post(f"{self.base_url}/api/generate", json=cuerpo) as respuesta:
+            if respuesta.status != 200:
+                raise RuntimeError(f"Ollama respondió {respuesta.status}: {await respuesta.text()}")
+            return await respuesta.json(content_type=None)
+
+    async def generar_stream(
+            self,
+            modelo: str,
+            prompt: str,
+            opciones: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Genera una respuesta en streaming.
+
+        Args:
+            modelo: Modelo de Ollama
+            prompt: Texto de entrada
+            opciones: Opciones de generación
+
+        Returns:
+            Iterador asíncrono de los objetos JSON enviados por Ollama;
+            el último tiene 'done' a True e incluye los contadores
+
+        Raises:
+            RuntimeError: Si el servidor responde con error
+        """
+        cuerpo = {'model': modelo, 'prompt': prompt, 'stream': True, 'options': opciones or {}}
+        async with self._obtener_sesion().post(f"{self.base_url}/api/generate", json=cuerpo) as respuesta:
+            if respuesta.status != 200:
+                raise RuntimeError(f"Ollama respondió {respuesta.status}: {await respuesta.text()}")
+            async for linea in respuesta.content:
+                if linea.strip():
+                    yield json.loads(linea)
+
+    async def cerrar(self) -> None:
+        """Cierra la sesión del bucle actual y libera sus conexiones."""
+        with self._lock:
+            sesion = self._sesiones.pop(asyncio.get_running_loop(), None)
+            self._descartar_sesiones_terminadas()
+        if sesion is not None and not sesion.closed:
+            await sesion.close()
@@ -0,0 +1,153 @@
+import threading
+from typing import Any, Dict, Optional
+
+from utils.metricas import REGISTRO
+
+# Límites (tokens/segundo) de las cubetas de velocidad de generación
+LIMITES_TOKENS_POR_SEGUNDO = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+TOKENS = REGISTRO.contador("ollama_tokens_total", "Tokens procesados por Ollama", ("tipo",))
+VELOCIDAD = REGISTRO.histograma(
+    "ollama_tokens_por_segundo", "Tokens por segundo de cada generación", ("fase",),
+    limites=LIMITES_TOKENS_POR_SEGUNDO
+)
+CARGAS_EN_FRIO = REGISTRO.contador(
+    "ollama_cargas_en_frio_total", "Generaciones que tuvieron que cargar el modelo"
+)
+SEGUNDOS_CARGA = REGISTRO.contador("ollama_carga_segundos_total", "Tiempo total de carga del modelo")
+
+
+def extraer_uso(respuesta: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Extrae los contadores de una respuesta final de /api/generate.
+
+    Ollama informa de los tokens (prompt_eval_count, eval_count) y de las
+    duraciones en nanosegundos (prompt_eval_duration, eval_duration,
+    load_duration, total_duration). prompt_eval_count falta cuando el
+    prompt ya estaba en la caché de contexto del modelo.
+
+    Args:
+        respuesta: Objeto JSON final de Ollama (o generation_info de LangChain)
+
+    Returns:
+        Tokens, segundos y tokens por segundo de prefill y decodificación,
+        o un diccionario vacío si la respuesta no trae contadores
+    """
+    if not respuesta or 'eval_count' not in respuesta:
+        return {}
+    tokens_prompt = int(respuesta.get('prompt_eval_count') or 0)
+    tokens_generados = int(respuesta.get('eval_count') or 0)
+    segundos_prefill = (respuesta.get('prompt_eval_duration') or 0) / 1e9
+    segundos_decodificacion = (respuesta.get('eval_duration') or 0) / 1e9
+    return {
+        'tokens_prompt': tokens_prompt,
+        'tokens_generados': tokens_generados,
+        'segundos_prefill': segundos_prefill,
+        'segundos_decodificacion': segundos_decodificacion,
+        'segundos_carga_modelo': (respuesta.get('load_duration') or 0) / 1e9,
+        'segundos_ollama': (respuesta.get('total_duration') or 0) / 1e9,
+        'tokens_por_segundo_prefill': tokens_prompt / segundos_prefill if segundos_prefill > 0 else None,
+        'tokens_por_segundo_decodificacion': (
+            tokens_generados / segundos_decodificacion if segundos_decodificacion > 0 else None
+        )
+    }
+
+
+class ContabilidadLLM:
+    """
+    Acumula el uso de Ollama de las generaciones de un sistema: tokens de
+    prompt y generados, tiempo de prefill, de decodificación y de carga
+    del modelo.
+
+    Una generación cuenta como carga en frío si load_duration supera el
+    umbral; con el modelo ya en memoria Ollama informa de unos milisegundos.
+    """
+
+    def __init__(self, umbral_carga_fria: float = 0.5):
+        """
+        Inicializa la contabilidad.
+
+        Args:
+            umbral_carga_fria: Segundos de load_duration a partir de los que
+                se considera que el modelo se cargó para la generación
+        """
+        self.umbral_carga_fria = umbral_carga_fria
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        """Pone a cero los acumulados."""
+        with self._lock:
+            self.generaciones = 0
+            self.tokens_prompt = 0
+            self.tokens_generados = 0
+            self.segundos_prefill = 0.0
+            self.segundos_decodificacion = 0.0
+            self.segundos_carga = 0.0
+            self.cargas_en_frio = 0
+
+    def registrar(self, respuesta: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Registra una generación a partir de la respuesta final de Ollama.
+
+        Args:
+            respuesta: Objeto JSON final de Ollama (o generation_info de LangChain)
+
+        Returns:
+            Uso de la generación (ver extraer_uso); vacío si no hay contadores
+        """
+        uso = extraer_uso(respuesta)
+        if not uso:
+            return uso
+        carga_en_frio = uso['segundos_carga_modelo'] >= self.umbral_carga_fria
+        uso['carga_en_frio'] = carga_en_frio
+        with self._lock:
+            self.generaciones += 1
+            self.tokens_prompt += uso['tokens_prompt']
+            self.tokens_generados += uso['tokens_generados']
+            self.segundos_prefill += uso['segundos_prefill']
+            self.segundos_decodificacion += uso['segundos_decodificacion']
+            self.segundos_carga += uso['segundos_carga_modelo']
+            self.cargas_en_frio += carga_en_frio
+
+        TOKENS.inc(uso['tokens_prompt'], tipo='prompt')
+        TOKENS.inc(uso['tokens_generados'], tipo='generados')
+        for fase in ('prefill', 'decodificacion'):
+            if uso[f'tokens_por_segundo_{fase}'] is not None:
+                VELOCIDAD.observar(uso[f'tokens_por_segundo_{fase}'], fase=fase)
+        SEGUNDOS_CARGA.inc(uso['segundos_carga_modelo'])
+        if carga_en_frio:
+            CARGAS_EN_FRIO.inc()
+        return uso
+
+    def resumen(self) -> Dict[str, Any]:
+        """
+        Retorna los acumulados y las velocidades medias.
+
+        Las velocidades se calculan sobre el total de tokens y de tiempo, de
+        modo que las generaciones largas pesan más que las cortas.
+
+        Returns:
+            Generaciones, tokens, medias por generación, tokens por segundo
+            de prefill y de decodificación, tiempo de carga y cargas en frío
+        """
+        with self._lock:
+            n = self.generaciones
+            return {
+                'generaciones': n,
+                'tokens_prompt': self.tokens_prompt,
+                'tokens_generados': self.tokens_generados,
+                'tokens_prompt_medios': self.tokens_prompt / n if n else 0.0,
+                'tokens_generados_medios': self.tokens_generados / n if n else 0.0,
+                'tokens_por_segundo_prefill': (
+                    self.tokens_prompt / self.segundos_prefill if self.segundos_prefill > 0 else None
+                ),
+                'tokens_por_segundo_decodificacion': (
+                    self.tokens_generados / self.segundos_decodificacion
+                    if self.segundos_decodificacion > 0 else None
+                ),
+                'segundos_prefill': self.segundos_prefill,
+                'segundos_decodificacion': self.segundos_decodificacion,
+                'segundos_carga': self.segundos_carga,
+                'cargas_en_frio': self.cargas_en_frio
+            }
@@ -1,31 +1,200 @@
 import os
+import json
 import time
+import asyncio
+import uuid
+import hashlib
+import threading
 import subprocess
-from typing import Optional, Dict, Any
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
 from pathlib import Path
 import logging
 
+import pandas as pd
+
 # Importación corregida de Ollama
 from langchain_community.llms import Ollama
-from langchain_community.document_loaders import CSVLoader
 from langchain.text_splitter import CharacterTextSplitter
 from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
 from langchain_community.vectorstores.chroma import Chroma
 from langchain.prompts import PromptTemplate
 from langchain.chains import RetrievalQA
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.callbacks import BaseCallbackHandler
 
 from utils.decorators import time_decorator
+from utils.concurrencia import LockLectoresEscritor
+from utils.trazas import span, trazado, en_contexto
+from utils.metricas import REGISTRO, etapa, registrar_cache
+from utils.document_processor import DataProcessor, FUENTE_RESUMEN
+from features.manifiesto_indice import ManifiestoIndice
+from features.pipeline_embeddings import PipelineEmbeddings
+from features.cache_embeddings import CacheEmbeddings
+from features.cache_respuestas import CacheSemanticoRespuestas
+from features.enrutador_consultas import EnrutadorConsultas
+from features.empaquetador_filas import EmpaquetadorFilas
+from features.extractor_predicados import ExtractorPredicados
+from features.retriever_filtrado import RetrieverFiltrado
+from features.custom_retriever import CustomRetriever
+from features.vector_store_numpy import VectorStoreNumpy
+from model.cliente_ollama import ClienteOllamaAsync
+from model.contabilidad_llm import ContabilidadLLM
+
+
+# Métricas del sistema RAG en el registro del proceso
+CONSULTAS = REGISTRO.contador(
+    "rag_consultas_total", "Consultas atendidas por modo y ruta", ("modo", "ruta")
+)
+ERRORES = REGISTRO.contador("rag_errores_total", "Consultas u operaciones fallidas", ("operacion",))
+LATENCIA_CONSULTAS = REGISTRO.histograma(
+    "rag_consulta_segundos", "Latencia de extremo a extremo de cada consulta", ("modo",)
+)
+EN_CURSO = REGISTRO.medidor("rag_consultas_en_curso", "Consultas en curso")
+TAMANO_INDICE = REGISTRO.medidor("rag_indice_documentos", "Documentos en la base vectorial")
+
+
+def _registrar_consulta(modo: str, metadatos: Dict[str, Any], inicio: float) -> None:
+    """Cuenta una consulta completada y observa su latencia."""
+    ruta = 'cache' if metadatos.get('cache_respuesta') else metadatos.get('ruta', 'abierta')
+    CONSULTAS.inc(modo=modo, ruta=ruta)
+    LATENCIA_CONSULTAS.observar(time.perf_counter() - inicio, modo=modo)
+
+
+def _medir_consulta(modo: str):
+    """
+    Decorador de los métodos de consulta que devuelven un resultado completo:
+    consultas en curso, consultas por ruta, latencia y errores.
+    """
+    def decorador(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper_asincrono(*args, **kwargs):
+                inicio = time.perf_counter()
+                EN_CURSO.inc()
+                try:
+                    resultado = await func(*args, **kwargs)
+                except Exception:
+                    ERRORES.inc(operacion=modo)
+                    raise
+                finally:
+                    EN_CURSO.dec()
+                _registrar_consulta(modo, resultado['metadatos'], inicio)
+                return resultado
+            return wrapper_asincrono
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            inicio = time.perf_counter()
+            EN_CURSO.inc()
+            try:
+                resultado = func(*args, **kwargs)
+            except Exception:
+                ERRORES.inc(operacion=modo)
+                raise
+            finally:
+                EN_CURSO.dec()
+            _registrar_consulta(modo, resultado['metadatos'], inicio)
+            return resultado
+        return wrapper
+    return decorador
+
+
+class _CapturaUsoLLM(BaseCallbackHandler):
+    """Guarda la respuesta final de Ollama (generation_info) de la última generación."""
+
+    def __init__(self):
+        self.respuesta_llm: Optional[Dict[str, Any]] = None
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        generaciones = response.generations[0] if response.generations else []
+        if generaciones:
+            self.respuesta_llm = generaciones[0].generation_info
+
+
+class _ManejadorEtapas(_CapturaUsoLLM):
+    """Mide como etapas las cadenas, la recuperación y la generación de RetrievalQA."""
+
+    def __init__(self):
+        super().__init__()
+        self._etapas: Dict[uuid.UUID, Any] = {}
+
+    def _abrir(self, nombre: str, run_id: uuid.UUID, **atributos: Any) -> None:
+        self._etapas[run_id] = etapa(nombre, **atributos).iniciar()
+
+    def _cerrar(self, run_id: uuid.UUID, error: Optional[BaseException] = None, **atributos: Any) -> None:
+        medicion = self._etapas.pop(run_id, None)
+        if medicion is not None:
+            medicion.anotar(**atributos)
+            medicion.terminar(error)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, **kwargs) -> None:
+        nombre = kwargs.get('name') or ((serialized or {}).get('id') or ['cadena'])[-1]
+        self._abrir(f"cadena.{nombre}", run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs) -> None:
+        self._cerrar(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs) -> None:
+        self._cerrar(run_id, error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs) -> None:
+        self._abrir("consulta.recuperacion", run_id)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs) -> None:
+        self._cerrar(run_id, documentos=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs) -> None:
+        self._cerrar(run_id, error)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._abrir("consulta.generacion", run_id, caracteres_prompt=sum(len(p) for p in prompts))
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        super().on_llm_end(response, run_id=run_id, **kwargs)
+        self._cerrar(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self._cerrar(run_id, error)
+
 
 class SistemaRAG:
     """Sistema RAG para análisis de datos bancarios."""
 
+    MODOS_INGESTA = ('filas', 'resumenes', 'mixto')
+    BACKENDS_VECTORIALES = ('chroma', 'numpy')
+
     def __init__(
             self,
             ruta_archivo: str = "../data/raw_data/BankCustomerChurnPrediction.csv",
             chunk_size: int = 1000,
             chunk_overlap: int = 200,
             model_name: str = "llama3.2",
-            persist_directory: Optional[str] = "./vector_db"
+            persist_directory: Optional[str] = "./vector_db",
+            columna_id: str = "customer_id",
+            modelo_embeddings: str = "BAAI/bge-small-en-v1.5",
+            tamano_lote_embeddings: int = 256,
+            num_workers_embeddings: int = 1,
+            directorio_cache_embeddings: Optional[str] = "./cache_embeddings",
+            max_entradas_cache_embeddings: int = 50_000,
+            inicializacion_en_segundo_plano: bool = False,
+            umbral_cache_respuestas: Optional[float] = 0.95,
+            ttl_cache_respuestas: Optional[float] = 3600.0,
+            max_entradas_cache_respuestas: int = 256,
+            url_ollama: str = "http://localhost:11434",
+            max_consultas_concurrentes: int = 8,
+            enrutador: Optional[EnrutadorConsultas] = None,
+            modo_ingesta: str = "filas",
+            filas_por_chunk: int = 1,
+            backend_vectorial: str = "chroma",
+            precision_vectores: str = "float32",
+            factor_reevaluacion: int = 0,
+            hnsw_m: int = 16,
+            hnsw_construction_ef: int = 100,
+            hnsw_search_ef: int = 10,
+            embeddings: Optional[Embeddings] = None
     ):
         """
         Inicializa el sistema RAG.
@@ -36,21 +205,199 @@ class SistemaRAG:
             chunk_overlap: Solapamiento
             model_name: Modelo de Ollama
             persist_directory: Directorio de persistencia
+            columna_id: Columna que identifica cada fila del CSV
+            modelo_embeddings: Modelo de FastEmbed para los embeddings
+            tamano_lote_embeddings: Documentos por lote de embeddings
+            num_workers_embeddings: Procesos para calcular embeddings
+            directorio_cache_embeddings: Directorio de la caché de embeddings (None la desactiva)
+            max_entradas_cache_embeddings: Máximo de vectores en la caché
+            inicializacion_en_segundo_plano: Si es True, el constructor retorna de
+                inmediato y el modelo y el índice se preparan en un hilo aparte
+            umbral_cache_respuestas: Similitud mínima para reutilizar una respuesta
+                (None desactiva la caché de respuestas)
+            ttl_cache_respuestas: Segundos de vida de cada respuesta cacheada
+            max_entradas_cache_respuestas: Máximo de respuestas cacheadas
+            url_ollama: URL del servidor de Ollama
+            max_consultas_concurrentes: Consultas asíncronas simultáneas máximas
+                (hilos de búsqueda vectorial y conexiones HTTP con Ollama)
+            enrutador: Enrutador que responde con pandas las consultas de cliente,
+                agregados y filtros antes de recurrir al LLM
+            modo_ingesta: Documentos indexados: 'filas' (uno por fila del CSV),
+                'resumenes' (resumen general y por segmento) o 'mixto' (ambos)
+            filas_por_chunk: Filas del CSV agrupadas en cada chunk, con la cabecera
+                una sola vez y chunk_size como presupuesto de caracteres
+            backend_vectorial: 'chroma' (HNSW) o 'numpy' (búsqueda exacta sobre
+                una matriz float32 mapeada en memoria)
+            precision_vectores: Precisión de la matriz del backend 'numpy':
+                'float32', 'float16' o 'int8' (con escala por vector)
+            factor_reevaluacion: Con precisión reducida, reordena
+                k * factor_reevaluacion candidatos con los vectores float32 (0 lo desactiva)
+            hnsw_m: Vecinos por nodo del grafo HNSW de Chroma (hnsw:M)
+            hnsw_construction_ef: Candidatos explorados al insertar (hnsw:construction_ef)
+            hnsw_search_ef: Candidatos explorados al buscar (hnsw:search_ef)
+            embeddings: Modelo de embeddings ya creado; por defecto se crea
+                FastEmbed con modelo_embeddings. Si no es FastEmbed, su clase
+                forma parte de las claves de la caché y del índice, y la
+                ingesta se hace en un solo proceso
         """
+        if modo_ingesta not in self.MODOS_INGESTA:
+            raise ValueError(f"Modo de ingesta inválido: {modo_ingesta}. Opciones: {self.MODOS_INGESTA}")
+        if backend_vectorial not in self.BACKENDS_VECTORIALES:
+            raise ValueError(
+                f"Backend vectorial inválido: {backend_vectorial}. Opciones: {self.BACKENDS_VECTORIALES}"
+            )
+        if precision_vectores != 'float32' and backend_vectorial != 'numpy':
+            raise ValueError("La cuantización de vectores requiere backend_vectorial='numpy'")
+        if min(hnsw_m, hnsw_construction_ef, hnsw_search_ef) < 1:
+            raise ValueError("Los parámetros HNSW deben ser enteros positivos")
+
         self.ruta_archivo = self._validar_ruta_archivo(ruta_archivo)
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.model_name = model_name
         self.persist_directory = persist_directory
+        self.columna_id = columna_id
+        self.modelo_embeddings = modelo_embeddings
+        self.tamano_lote_embeddings = tamano_lote_embeddings
+        self.num_workers_embeddings = num_workers_embeddings
+        self.directorio_cache_embeddings = directorio_cache_embeddings
+        self.max_entradas_cache_embeddings = max_entradas_cache_embeddings
+        self.url_ollama = url_ollama
+        self.max_consultas_concurrentes = max_consultas_concurrentes
+        self.enrutador = enrutador
+        self.modo_ingesta = modo_ingesta
+        self.filas_por_chunk = filas_por_chunk
+        self.backend_vectorial = backend_vectorial
+        self.precision_vectores = precision_vectores
+        self.factor_reevaluacion = factor_reevaluacion
+        self.hnsw_m = hnsw_m
+        self.hnsw_construction_ef = hnsw_construction_ef
+        self.hnsw_search_ef = hnsw_search_ef
+        self.k_documentos = 5
+        # Predicados de las consultas para filtrar por metadatos; solo con una fila por documento
+        self.extractor: Optional[ExtractorPredicados] = None
         self.llm = None
+        self.embeddings = embeddings
+        # Un modelo inyectado no es necesariamente el de modelo_embeddings
+        self._embeddings_inyectados = embeddings is not None
+        self.cache_embeddings = None
         self.vector_db = None
         self.retriever = None
+        self.prompt = self._crear_prompt_template()
+        self.version_datos: Optional[str] = None
+        self._estado_csv: Optional[Tuple[int, int]] = None
+        self.cache_respuestas = None
+        if umbral_cache_respuestas is not None:
+            self.cache_respuestas = CacheSemanticoRespuestas(
+                umbral_similitud=umbral_cache_respuestas,
+                max_entradas=max_entradas_cache_respuestas,
+                ttl_segundos=ttl_cache_respuestas
+            )
+        # Modelos y cadenas QA por configuración de generación (temperatura, max_tokens)
+        self._llms: Dict[Tuple[float, int], Ollama] = {}
+        self._cadenas: Dict[Tuple[float, int], RetrievalQA] = {}
+        # Serializa la reconstrucción del índice cuando la instancia se comparte
+        self._lock = threading.RLock()
+        # Las consultas leen el índice en lectura; reiniciar() lo reconstruye en exclusiva
+        self._lock_indice = LockLectoresEscritor()
+        # Ruta asíncrona: búsquedas en hilos y generación con conexiones reutilizables
+        self.cliente_ollama = ClienteOllamaAsync(
+            base_url=url_ollama, max_conexiones=max_consultas_concurrentes
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_consultas_concurrentes, thread_name_prefix="rag-busqueda"
+        )
+        # Tokens y tiempos de Ollama de todas las generaciones
+        self.contabilidad_llm = ContabilidadLLM()
+
+        # Estado de preparación
+        self._estado = {'fase': 'pendiente', 'progreso': 0.0, 'error': None}
+        self._inicio_inicializacion = time.perf_counter()
+        self._duracion_inicializacion: Optional[float] = None
+        self._listo = threading.Event()
 
-        self._verificar_y_preparar_modelo()
-        self._cargar_y_procesar_documento()
-        logging.info("Sistema RAG inicializado correctamente")
+        if inicializacion_en_segundo_plano:
+            threading.Thread(
+                target=en_contexto(self._inicializar_en_segundo_plano),
+                name="rag-inicializacion",
+                daemon=True
+            ).start()
+        else:
+            self._inicializar()
 
 
+    def _inicializar(self) -> None:
+        """
+        Prepara el modelo y el índice actualizando el estado de preparación.
+
+        Raises:
+            Exception: Si falla la preparación del modelo o del índice
+        """
+        try:
+            self._actualizar_estado('verificando_modelo', 0.1)
+            with etapa("inicializacion.modelo", modelo=self.model_name):
+                self._verificar_y_preparar_modelo()
+            self._actualizar_estado('cargando_indice', 0.4)
+            with etapa("inicializacion.indice", modo=self.modo_ingesta):
+                self._cargar_y_procesar_documento()
+            self._duracion_inicializacion = time.perf_counter() - self._inicio_inicializacion
+            self._actualizar_estado('listo', 1.0)
+            logging.info(
+                f"Sistema RAG inicializado correctamente en "
+                f"{self._duracion_inicializacion:.2f} segundos"
+            )
+        except Exception as e:
+            ERRORES.inc(operacion='inicializacion')
+            self._estado = dict(self._estado, fase='error', error=str(e))
+            raise
+        finally:
+            self._listo.set()
+
+    def _inicializar_en_segundo_plano(self) -> None:
+        """Ejecuta la inicialización en el hilo de fondo registrando los errores."""
+        try:
+            self._inicializar()
+        except Exception as e:
+            logging.error(f"Error en la inicialización en segundo plano: {e}")
+
+    def _actualizar_estado(self, fase: str, progreso: float) -> None:
+        """Registra la fase actual de la inicialización."""
+        self._estado = {'fase': fase, 'progreso': progreso, 'error': None}
+        logging.info(f"Sistema RAG: {fase} ({progreso:.0%})")
+
+    def esta_listo(self) -> bool:
+        """Indica si el modelo y el índice están preparados."""
+        return self._estado['fase'] == 'listo'
+
+    def obtener_estado(self) -> Dict[str, Any]:
+        """
+        Retorna el estado de preparación del sistema.
+
+        Returns:
+            Diccionario con fase, progreso (0-1), error y segundos transcurridos
+        """
+        segundos = self._duracion_inicializacion
+        if segundos is None:
+            segundos = time.perf_counter() - self._inicio_inicializacion
+        return dict(self._estado, segundos=segundos)
+
+    def esperar_listo(self, timeout: Optional[float] = None) -> bool:
+        """
+        Bloquea hasta que termine la inicialización.
+
+        Args:
+            timeout: Segundos máximos de espera (None espera indefinidamente)
+
+        Returns:
+            True si el sistema está listo, False si venció el tiempo
+
+        Raises:
+            RuntimeError: Si la inicialización falló
+        """
+        self._listo.wait(timeout)
+        if self._estado['fase'] == 'error':
+            raise RuntimeError(f"El sistema RAG no pudo inicializarse: {self._estado['error']}")
+        return self.esta_listo()
 
     def _validar_ruta_archivo(self, ruta: str) -> str:
             """
@@ -84,14 +431,15 @@ class SistemaRAG:
         """
         try:
             logging.info(f"Inicializando modelo {self.model_name}...")
-            self.llm = Ollama(model=self.model_name)
+            self.llm = Ollama(model=self.model_name, base_url=self.url_ollama)
             self.llm.invoke("test")
             logging.info(f"Modelo {self.model_name} inicializado correctamente")
         except Exception as e:
             logging.warning(f"Error al inicializar modelo: {e}. Intentando descargar...")
+            self._actualizar_estado('descargando_modelo', 0.2)
             try:
                 subprocess.run(["ollama", "pull", self.model_name], check=True)
-                self.llm = Ollama(model=self.model_name)
+                self.llm = Ollama(model=self.model_name, base_url=self.url_ollama)
                 logging.info(f"Modelo descargado e inicializado correctamente")
             except Exception as e:
                 raise RuntimeError(f"No se pudo inicializar el modelo: {e}")
@@ -107,61 +455,403 @@ class SistemaRAG:
         try:
             logging.info("Iniciando carga y procesamiento del documento...")
 
-            # Cargar el CSV
-            loader = CSVLoader(
-                file_path=self.ruta_archivo,
-                csv_args={
-                    'delimiter': ',',
-                    'quotechar': '"'
-                }
+            documentos: Dict[str, Document] = {}
+            if self.modo_ingesta in ('filas', 'mixto'):
+                documentos.update(self._crear_documentos_filas())
+            if self.modo_ingesta in ('resumenes', 'mixto'):
+                documentos.update(self._crear_documentos_resumen())
+            logging.info(f"Documentos a indexar ({self.modo_ingesta}): {len(documentos)}")
+            version_datos = self._calcular_version_datos()
+
+            # Crear embeddings
+            if self.embeddings is None:
+                self.embeddings = FastEmbedEmbeddings(model_name=self.modelo_embeddings)
+            if self.cache_embeddings is None and self.directorio_cache_embeddings:
+                self.cache_embeddings = CacheEmbeddings(
+                    self.directorio_cache_embeddings,
+                    self._identidad_embeddings(),
+                    max_entradas=self.max_entradas_cache_embeddings
+                )
+
+            # Crear o sincronizar base vectorial
+            if self.persist_directory:
+                Path(self.persist_directory).mkdir(parents=True, exist_ok=True)
+                self.vector_db = self._crear_vector_db()
+                self._sincronizar_indice(documentos)
+            else:
+                self.vector_db = self._crear_vector_db()
+                self._indexar_documentos(list(documentos.items()))
+                logging.info("Base de datos vectorial creada en memoria")
+
+            # Configurar retriever; las cadenas previas apuntan al anterior
+            if self.modo_ingesta != 'filas':
+                # Resumen y filas en paralelo con un solo embedding de la consulta
+                self.retriever = CustomRetriever(
+                    vectorstore=self.vector_db,
+                    embeddings=self.embeddings,
+                    extractor=self.extractor,
+                    k_resumen=1,
+                    k_general=max(self.k_documentos - 1, 1)
+                )
+            elif self.extractor is not None:
+                self.retriever = RetrieverFiltrado(
+                    vectorstore=self.vector_db, extractor=self.extractor, k=self.k_documentos
+                )
+            else:
+                self.retriever = self.vector_db.as_retriever(
+                    search_kwargs={"k": self.k_documentos}
+                )
+            self._cadenas.clear()
+            self.version_datos = version_datos
+            TAMANO_INDICE.fijar(self._tamano_indice())
+
+        except Exception as e:
+            logging.error(f"Error en el procesamiento del documento: {e}")
+            raise
+
+    def _crear_vector_db(self):
+        """
+        Crea la base vectorial del backend configurado.
+
+        Returns:
+            Chroma o VectorStoreNumpy, persistida en persist_directory si lo hay
+        """
+        if self.backend_vectorial == 'numpy':
+            return VectorStoreNumpy(
+                embedding_function=self.embeddings,
+                persist_directory=self.persist_directory,
+                precision=self.precision_vectores,
+                factor_reevaluacion=self.factor_reevaluacion
+            )
+        if self.persist_directory:
+            return Chroma(
+                persist_directory=str(self.persist_directory),
+                embedding_function=self.embeddings,
+                collection_metadata=self._metadatos_hnsw()
+            )
+        # Colección propia: las instancias en memoria comparten el cliente de Chroma
+        return Chroma(
+            collection_name=f"sistema_rag_{uuid.uuid4().hex}",
+            embedding_function=self.embeddings,
+            collection_metadata=self._metadatos_hnsw()
+        )
+
+    def _metadatos_hnsw(self) -> Dict[str, int]:
+        """Parámetros HNSW de la colección de Chroma; solo se aplican al crearla."""
+        return {
+            'hnsw:M': self.hnsw_m,
+            'hnsw:construction_ef': self.hnsw_construction_ef,
+            'hnsw:search_ef': self.hnsw_search_ef
+        }
+
+    def _crear_documentos_filas(self) -> Dict[str, Document]:
+        """
+        Carga el CSV con un documento por fila, o varias filas por chunk
+        si filas_por_chunk es mayor que 1.
+
+        Con una fila por documento, cada columna se guarda como metadato
+        tipado para poder filtrar la búsqueda con predicados.
+
+        Returns:
+            Chunks por ID estable
+        """
+        self.extractor = None
+        if self.filas_por_chunk > 1:
+            # Texto original de cada celda, sin conversiones de tipo
+            with etapa("csv.cargar", ruta=self.ruta_archivo):
+                df = pd.read_csv(self.ruta_archivo, dtype=str, keep_default_na=False)
+            empaquetador = EmpaquetadorFilas(
+                filas_por_chunk=self.filas_por_chunk,
+                max_caracteres=self.chunk_size,
+                columna_id=self.columna_id
             )
-            documentos = loader.load()
-            logging.info(f"Documento cargado: {len(documentos)} registros")
+            with etapa("documentos.dividir", filas_por_chunk=self.filas_por_chunk):
+                return dict(empaquetador.empaquetar(df))
+
+        with etapa("csv.cargar", ruta=self.ruta_archivo):
+            df = pd.read_csv(self.ruta_archivo)
+        if self.columna_id not in df.columns:
+            raise ValueError(f"Falta la columna ID: {self.columna_id}")
+        with etapa("documentos.filas", filas=len(df)):
+            documentos = DataProcessor.create_csv_docs(df)
+            for documento in documentos:
+                documento.metadata['source'] = str(documento.metadata[self.columna_id])
+            self.extractor = ExtractorPredicados(df)
+        logging.info(f"Documento cargado: {len(documentos)} registros")
 
-            # Dividir en chunks
+        # Dividir en chunks solo si alguna fila supera el tamaño de chunk
+        chunks = documentos
+        if any(len(doc.page_content) > self.chunk_size for doc in documentos):
             text_splitter = CharacterTextSplitter(
                 separator="\n",
                 chunk_size=self.chunk_size,
                 chunk_overlap=self.chunk_overlap
             )
-            chunks = text_splitter.split_documents(documentos)
+            with etapa("documentos.dividir", chunk_size=self.chunk_size):
+                chunks = text_splitter.split_documents(documentos)
             logging.info(f"Documento dividido en {len(chunks)} chunks")
+        return dict(zip(self._generar_ids_chunks(chunks), chunks))
 
-            # Crear embeddings
-            embeddings = FastEmbedEmbeddings()
+    def _crear_documentos_resumen(self) -> Dict[str, Document]:
+        """
+        Crea el resumen estadístico general y los resúmenes por segmento.
 
-            # Crear o cargar base vectorial
-            if self.persist_directory:
-                persist_path = Path(self.persist_directory)
-                if persist_path.exists():
-                    self.vector_db = Chroma(
-                        persist_directory=str(persist_path),
-                        embedding_function=embeddings
-                    )
-                    logging.info("Base de datos vectorial cargada desde disco")
-                else:
-                    persist_path.mkdir(parents=True, exist_ok=True)
-                    self.vector_db = Chroma.from_documents(
-                        documents=chunks,
-                        embedding=embeddings,
-                        persist_directory=str(persist_path)
-                    )
-                    logging.info("Base de datos vectorial creada y persistida")
-            else:
-                self.vector_db = Chroma.from_documents(
-                    documents=chunks,
-                    embedding=embeddings
-                )
-                logging.info("Base de datos vectorial creada en memoria")
+        Returns:
+            Resúmenes por ID ('resumen:general', 'resumen:country=France', ...)
+        """
+        with etapa("csv.cargar", ruta=self.ruta_archivo):
+            df = pd.read_csv(self.ruta_archivo)
+        with etapa("documentos.resumenes"):
+            resumenes = [DataProcessor.create_csv_summary(df)] + DataProcessor.create_slice_summaries(df)
+        return {
+            f"resumen:{doc.metadata['dimension']}"
+            + ("" if doc.metadata['dimension'] == 'general' else f"={doc.metadata['valor']}"): doc
+            for doc in resumenes
+        }
+
+    def _generar_ids_chunks(self, chunks: List[Document]) -> List[str]:
+        """
+        Genera IDs estables para los chunks a partir de la columna ID.
+
+        Args:
+            chunks: Chunks generados por el splitter
+
+        Returns:
+            Lista de IDs en el mismo orden que los chunks
+        """
+        ids = []
+        contadores: Dict[str, int] = {}
+        for chunk in chunks:
+            clave = str(chunk.metadata['source'])
+            posicion = contadores.get(clave, 0)
+            contadores[clave] = posicion + 1
+            ids.append(clave if posicion == 0 else f"{clave}-{posicion}")
+        return ids
+
+    def _identidad_embeddings(self) -> str:
+        """
+        Identifica el modelo de embeddings en las claves de la caché y del índice.
 
-            # Configurar retriever
-            self.retriever = self.vector_db.as_retriever(
-                search_kwargs={"k": 5}
+        Con FastEmbed es el nombre del modelo; con un modelo inyectado de otra
+        clase se añade la clase para no mezclar sus vectores con los de FastEmbed.
+        """
+        if not self._embeddings_inyectados:
+            return self.modelo_embeddings
+        if isinstance(self.embeddings, FastEmbedEmbeddings):
+            return self.embeddings.model_name
+        clase = type(self.embeddings)
+        detalle = next(
+            (getattr(self.embeddings, atributo) for atributo in ('model_name', 'model', 'size')
+             if getattr(self.embeddings, atributo, None) is not None),
+            ""
+        )
+        return f"{clase.__module__}.{clase.__qualname__}:{detalle}"
+
+    def _modelo_workers(self) -> Optional[str]:
+        """Modelo de FastEmbed que pueden cargar los workers, o None si el inyectado no lo es."""
+        if not self._embeddings_inyectados:
+            return self.modelo_embeddings
+        if isinstance(self.embeddings, FastEmbedEmbeddings):
+            return self.embeddings.model_name
+        return None
+
+    def _configuracion_indice(self) -> Dict[str, Any]:
+        """Configuración que invalida el índice completo si cambia."""
+        return {
+            'modelo_embeddings': self._identidad_embeddings(),
+            'chunk_size': self.chunk_size,
+            'chunk_overlap': self.chunk_overlap,
+            'columna_id': self.columna_id,
+            'modo_ingesta': self.modo_ingesta,
+            'filas_por_chunk': self.filas_por_chunk,
+            'backend_vectorial': self.backend_vectorial,
+            'precision_vectores': self.precision_vectores,
+            'factor_reevaluacion': self.factor_reevaluacion,
+            'hnsw': self._metadatos_hnsw()
+        }
+
+    def _calcular_version_datos(self) -> str:
+        """
+        Calcula la versión de los datos indexados: hash del CSV y de la configuración.
+
+        Returns:
+            Identificador corto de la versión
+        """
+        estado = os.stat(self.ruta_archivo)
+        huella = hashlib.sha256(
+            json.dumps(self._configuracion_indice(), sort_keys=True).encode("utf-8")
+        )
+        with open(self.ruta_archivo, "rb") as archivo:
+            for bloque in iter(lambda: archivo.read(1 << 20), b""):
+                huella.update(bloque)
+        self._estado_csv = (estado.st_mtime_ns, estado.st_size)
+        return huella.hexdigest()[:16]
+
+    def _version_cache(self) -> str:
+        """
+        Versión con la que se validan las respuestas cacheadas.
+
+        Si el CSV cambió en disco desde la última carga, la versión cambia
+        aunque el índice aún no se haya reconstruido.
+        """
+        estado = os.stat(self.ruta_archivo)
+        if (estado.st_mtime_ns, estado.st_size) != self._estado_csv:
+            return f"{self.version_datos}:csv-{estado.st_mtime_ns}-{estado.st_size}"
+        return self.version_datos
+
+    def _sincronizar_indice(self, documentos: Dict[str, Document]) -> None:
+        """
+        Sincroniza el índice persistido con el CSV actual.
+
+        Solo se embeben los documentos nuevos o modificados y se eliminan
+        los que ya no existen, según el manifiesto de huellas.
+
+        Args:
+            documentos: Documentos actuales por ID
+        """
+        manifiesto = ManifiestoIndice(self.persist_directory)
+        configuracion = self._configuracion_indice()
+        with etapa("indice.calcular_cambios", documentos=len(documentos)):
+            cambios = manifiesto.calcular_cambios(documentos, configuracion)
+        if (
+                not cambios['reconstruir'] and isinstance(self.vector_db, VectorStoreNumpy)
+                and self.vector_db.count() == 0 and documentos
+        ):
+            # Archivos NumPy ausentes o descartados: el manifiesto ya no describe el índice
+            cambios = dict(
+                cambios, nuevos=list(documentos), modificados=[], eliminados=[], reconstruir=True
             )
 
-        except Exception as e:
-            logging.error(f"Error en el procesamiento del documento: {e}")
-            raise
+        if cambios['reconstruir']:
+            logging.info("Manifiesto ausente o configuración distinta, reconstruyendo índice")
+            self.vector_db.delete_collection()
+            self.vector_db = self._crear_vector_db()
+
+        if cambios['eliminados']:
+            self.vector_db.delete(ids=cambios['eliminados'])
+
+        pendientes = cambios['nuevos'] + cambios['modificados']
+        if pendientes:
+            self._indexar_documentos((i, documentos[i]) for i in pendientes)
+
+        if isinstance(self.vector_db, VectorStoreNumpy):
+            self.vector_db.persistir()
+        manifiesto.guardar(cambios['huellas'], configuracion)
+        logging.info(
+            f"Índice sincronizado: {len(cambios['nuevos'])} nuevos, "
+            f"{len(cambios['modificados'])} modificados, "
+            f"{len(cambios['eliminados'])} eliminados"
+        )
+
+    def _indexar_documentos(self, documentos: Iterable[Tuple[str, Document]]) -> Dict[str, Any]:
+        """
+        Embebe y escribe documentos mediante el pipeline por lotes.
+
+        Args:
+            documentos: Pares (id, documento) a indexar
+
+        Returns:
+            Estadísticas de la ingesta (documentos, segundos, docs_por_segundo)
+        """
+        modelo_workers = self._modelo_workers()
+        num_workers = self.num_workers_embeddings
+        if num_workers > 1 and modelo_workers is None:
+            # Los workers cargan FastEmbed por nombre; otro modelo solo puede usarse en proceso
+            logging.warning("Modelo de embeddings inyectado: la ingesta se hace en un solo proceso")
+            num_workers = 1
+        pipeline = PipelineEmbeddings(
+            embeddings=self.embeddings,
+            escritor=self._escribir_lote,
+            tamano_lote=self.tamano_lote_embeddings,
+            num_workers=num_workers,
+            modelo_embeddings=modelo_workers,
+            cache=self.cache_embeddings
+        )
+        with etapa("embeddings.indexar", backend=self.backend_vectorial) as medicion:
+            estadisticas = pipeline.ejecutar(documentos)
+            medicion.anotar(documentos=estadisticas['documentos'], lotes=estadisticas['lotes'])
+        return estadisticas
+
+    def _tamano_indice(self) -> int:
+        """Documentos almacenados en la base vectorial."""
+        if isinstance(self.vector_db, VectorStoreNumpy):
+            return self.vector_db.count()
+        return self.vector_db._collection.count()
+
+    def _escribir_lote(
+            self,
+            ids: List[str],
+            vectores: List[List[float]],
+            documentos: List[Document]
+    ) -> None:
+        """Inserta o actualiza un lote ya embebido en la base vectorial."""
+        if isinstance(self.vector_db, VectorStoreNumpy):
+            self.vector_db.upsert(
+                ids,
+                vectores,
+                [doc.page_content for doc in documentos],
+                [doc.metadata for doc in documentos]
+            )
+            return
+        self.vector_db._collection.upsert(
+            ids=ids,
+            embeddings=vectores,
+            documents=[doc.page_content for doc in documentos],
+            metadatas=[doc.metadata for doc in documentos]
+        )
+
+    def _obtener_llm(self, temperatura: float, max_tokens: int) -> Ollama:
+        """
+        Retorna el cliente de Ollama para una configuración de generación.
+
+        Args:
+            temperatura: Temperatura de muestreo
+            max_tokens: Máximo de tokens a generar (num_predict)
+
+        Returns:
+            Instancia de Ollama reutilizable
+        """
+        clave = (float(temperatura), int(max_tokens))
+        llm = self._llms.get(clave)
+        if llm is None:
+            with self._lock:
+                llm = self._llms.get(clave)
+                if llm is None:
+                    llm = Ollama(
+                        model=self.model_name,
+                        base_url=self.url_ollama,
+                        temperature=clave[0],
+                        num_predict=clave[1]
+                    )
+                    self._llms[clave] = llm
+        return llm
+
+    def _obtener_cadena(self, temperatura: float, max_tokens: int) -> RetrievalQA:
+        """
+        Retorna la cadena QA de una configuración, construyéndola una sola vez.
+
+        Args:
+            temperatura: Temperatura de muestreo
+            max_tokens: Máximo de tokens a generar
+
+        Returns:
+            Cadena RetrievalQA reutilizable
+        """
+        clave = (float(temperatura), int(max_tokens))
+        cadena = self._cadenas.get(clave)
+        if cadena is None:
+            with self._lock:
+                cadena = self._cadenas.get(clave)
+                if cadena is None:
+                    cadena = RetrievalQA.from_chain_type(
+                        llm=self._obtener_llm(temperatura, max_tokens),
+                        chain_type="stuff",
+                        retriever=self.retriever,
+                        return_source_documents=True,
+                        chain_type_kwargs={"prompt": self.prompt}
+                    )
+                    self._cadenas[clave] = cadena
+        return cadena
 
     def _crear_prompt_template(self) -> PromptTemplate:
         """
@@ -191,45 +881,79 @@ Respuesta:"""
         )
 
     @time_decorator
+    @trazado("consulta")
+    @_medir_consulta("sincrona")
     def realizar_consulta(
             self,
             consulta: str,
             temperatura: float = 0.7,
             max_tokens: int = 500
     ) -> Dict[str, Any]:
-        """Realiza una consulta al sistema."""
-        if not isinstance(consulta, str) or not consulta.strip():
-            raise ValueError("La consulta debe ser un texto no vacío")
+        """
+        Realiza una consulta al sistema.
 
-        if not 0 <= temperatura <= 1:
-            raise ValueError("La temperatura debe estar entre 0 y 1")
+        Args:
+            consulta: Pregunta a realizar
+            temperatura: Temperatura de generación de Ollama
+            max_tokens: Máximo de tokens a generar (num_predict de Ollama)
+
+        Returns:
+            Diccionario con respuesta, documentos_fuente y metadatos
+        """
+        self._validar_consulta(consulta, temperatura, max_tokens)
+        resultado = self._enrutar(consulta)
+        if resultado is not None:
+            return resultado
+        self.esperar_listo()
 
         try:
             logging.info(f"Realizando consulta: {consulta}")
 
-            chain = RetrievalQA.from_chain_type(
-                llm=self.llm,
-                chain_type="stuff",
-                retriever=self.retriever,
-                return_source_documents=True,
-                chain_type_kwargs={"prompt": self._crear_prompt_template()}
-            )
+            vector_consulta = None
+            if self.cache_respuestas is not None:
+                vector_consulta, resultado = self._buscar_en_cache(consulta, (temperatura, max_tokens))
+                if resultado is not None:
+                    logging.info("Consulta respondida desde la caché de respuestas")
+                    return resultado
 
             # Realizar consulta
             start_time = time.time()
-            response = chain.invoke({"query": consulta})
+            manejador = _ManejadorEtapas()
+            with self._lock_indice.lectura():
+                chain = self._obtener_cadena(temperatura, max_tokens)
+                if vector_consulta is None:
+                    response = chain.invoke({"query": consulta}, config={'callbacks': [manejador]})
+                    respuesta, documentos = response['result'], response['source_documents']
+                else:
+                    # La consulta ya está embebida para la caché: se busca por vector
+                    # y de la cadena solo se ejecuta la generación
+                    with etapa("consulta.recuperacion") as recuperacion:
+                        documentos = self._buscar_por_vector(consulta, vector_consulta)
+                        recuperacion.anotar(documentos=len(documentos))
+                    respuesta = chain.combine_documents_chain.invoke(
+                        {'input_documents': documentos, 'question': consulta},
+                        config={'callbacks': [manejador]}
+                    )['output_text']
             end_time = time.time()
 
             resultado = {
-                'respuesta': response['result'],
-                'documentos_fuente': [doc.page_content for doc in response['source_documents']],
+                'respuesta': respuesta,
+                'documentos_fuente': [doc.page_content for doc in documentos],
                 'metadatos': {
                     'tiempo_respuesta': end_time - start_time,
-                    'num_documentos': len(response['source_documents']),
-                    'modelo': self.model_name
+                    'num_documentos': len(documentos),
+                    'modelo': self.model_name,
+                    'cache_respuesta': False,
+                    'ruta': 'abierta',
+                    **self.contabilidad_llm.registrar(manejador.respuesta_llm)
                 }
             }
 
+            if vector_consulta is not None:
+                self.cache_respuestas.guardar(
+                    vector_consulta, (temperatura, max_tokens), self._version_cache(), resultado
+                )
+
             logging.info(f"Consulta completada en {end_time - start_time:.2f} segundos")
             return resultado
 
@@ -237,27 +961,681 @@ Respuesta:"""
             logging.error(f"Error al realizar la consulta: {e}")
             raise
 
+    def realizar_consulta_stream(
+            self,
+            consulta: str,
+            temperatura: float = 0.7,
+            max_tokens: int = 500
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Realiza una consulta devolviendo la respuesta a medida que se genera.
+
+        Los eventos producidos son, en orden:
+            {'tipo': 'documentos', 'documentos_fuente': [...]}
+            {'tipo': 'token', 'texto': '...'}  (uno por fragmento generado)
+            {'tipo': 'fin', 'respuesta': '...', 'metadatos': {...}}
+
+        Args:
+            consulta: Pregunta a realizar
+            temperatura: Temperatura de generación
+            max_tokens: Máximo de tokens a generar
+
+        Returns:
+            Iterador de eventos
+
+        Raises:
+            ValueError: Si la consulta o la temperatura no son válidas
+        """
+        self._validar_consulta(consulta, temperatura, max_tokens)
+        inicio = time.perf_counter()
+        resultado = self._enrutar(consulta)
+        if resultado is not None:
+            return self._medir_eventos(self._eventos_desde_resultado(resultado), inicio)
+        self.esperar_listo()
+
+        vector_consulta = None
+        if self.cache_respuestas is not None:
+            vector_consulta, resultado = self._buscar_en_cache(consulta, (temperatura, max_tokens))
+            if resultado is not None:
+                logging.info("Consulta en streaming respondida desde la caché de respuestas")
+                return self._medir_eventos(self._eventos_desde_resultado(resultado), inicio)
+
+        return self._medir_eventos(self._generar_eventos_consulta(
+            consulta, self._obtener_llm(temperatura, max_tokens), vector_consulta, (temperatura, max_tokens)
+        ), inicio)
+
+    @staticmethod
+    def _medir_eventos(eventos: Iterator[Dict[str, Any]], inicio: float) -> Iterator[Dict[str, Any]]:
+        """Reemite los eventos de streaming contando la consulta en curso y al terminar."""
+        EN_CURSO.inc()
+        try:
+            for evento in eventos:
+                if evento['tipo'] == 'fin':
+                    _registrar_consulta('stream', evento['metadatos'], inicio)
+                yield evento
+        except Exception:
+            ERRORES.inc(operacion='stream')
+            raise
+        finally:
+            EN_CURSO.dec()
+            # Si el consumidor dejó de iterar, el generador interno cierra sus spans ya
+            eventos.close()
+
+    @staticmethod
+    def _eventos_desde_resultado(resultado: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Emite como eventos de streaming un resultado ya completo."""
+        yield {'tipo': 'documentos', 'documentos_fuente': resultado['documentos_fuente']}
+        yield {'tipo': 'token', 'texto': resultado['respuesta']}
+        metadatos = dict(resultado['metadatos'])
+        if metadatos.get('cache_respuesta'):
+            metadatos.update(tiempo_primer_token=0.0, tiempo_respuesta=0.0)
+        else:
+            metadatos.setdefault('tiempo_primer_token', metadatos['tiempo_respuesta'])
+        yield {'tipo': 'fin', 'respuesta': resultado['respuesta'], 'metadatos': metadatos}
+
+    def _generar_eventos_consulta(
+            self,
+            consulta: str,
+            llm: Ollama,
+            vector_consulta: Optional[List[float]] = None,
+            configuracion: Optional[Tuple[float, int]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Recupera el contexto y emite los eventos de la respuesta en streaming."""
+        # El generador se reanuda en el contexto del consumidor: los spans
+        # abiertos entre yields se miden con iniciar/terminar
+        medicion = span("consulta", modo="stream").iniciar()
+        terminada = False
+        try:
+            logging.info(f"Realizando consulta en streaming: {consulta}")
+            inicio = time.perf_counter()
+
+            with etapa("consulta.recuperacion") as recuperacion:
+                documentos = self._recuperar(consulta, vector_consulta)
+                recuperacion.anotar(documentos=len(documentos))
+            tiempo_recuperacion = time.perf_counter() - inicio
+            yield {
+                'tipo': 'documentos',
+                'documentos_fuente': [doc.page_content for doc in documentos]
+            }
+
+            prompt = self._formatear_prompt(consulta, documentos)
+
+            fragmentos = []
+            tiempo_primer_token = None
+            generacion = etapa("consulta.generacion", caracteres_prompt=len(prompt)).iniciar()
+            captura = _CapturaUsoLLM()
+            try:
+                for fragmento in llm.stream(prompt, config={'callbacks': [captura]}):
+                    if tiempo_primer_token is None:
+                        tiempo_primer_token = time.perf_counter() - inicio
+                    fragmentos.append(fragmento)
+                    yield {'tipo': 'token', 'texto': fragmento}
+            except BaseException as e:
+                generacion.terminar(e)
+                raise
+            generacion.anotar(fragmentos=len(fragmentos), tiempo_primer_token=tiempo_primer_token)
+            generacion.terminar()
+
+            tiempo_respuesta = time.perf_counter() - inicio
+            logging.info(
+                f"Consulta en streaming completada en {tiempo_respuesta:.2f} segundos "
+                f"(primer token: {tiempo_primer_token or tiempo_respuesta:.2f} s)"
+            )
+            resultado = {
+                'respuesta': "".join(fragmentos),
+                'documentos_fuente': [doc.page_content for doc in documentos],
+                'metadatos': {
+                    'tiempo_respuesta': tiempo_respuesta,
+                    'tiempo_primer_token': tiempo_primer_token,
+                    'tiempo_recuperacion': tiempo_recuperacion,
+                    'num_documentos': len(documentos),
+                    'modelo': self.model_name,
+                    'cache_respuesta': False,
+                    'ruta': 'abierta',
+                    **self.contabilidad_llm.registrar(captura.respuesta_llm)
+                }
+            }
+            if vector_consulta is not None:
+                self.cache_respuestas.guardar(
+                    vector_consulta, configuracion, self._version_cache(), resultado
+                )
+            medicion.terminar()
+            terminada = True
+            yield {
+                'tipo': 'fin',
+                'respuesta': resultado['respuesta'],
+                'metadatos': resultado['metadatos']
+            }
+
+        except Exception as e:
+            if not terminada:
+                medicion.terminar(e)
+                terminada = True
+            logging.error(f"Error al realizar la consulta en streaming: {e}")
+            raise
+        finally:
+            if not terminada:
+                # El consumidor dejó de iterar (rerun de Streamlit, cliente desconectado)
+                medicion.anotar(interrumpida=True)
+                medicion.terminar()
+
+    @trazado("consultas_lote")
+    def realizar_consultas_lote(
+            self,
+            consultas: List[str],
+            max_concurrency: int = 4,
+            temperatura: float = 0.7,
+            max_tokens: int = 500
+    ) -> List[Dict[str, Any]]:
+        """
+        Realiza un lote de consultas preparadas.
+
+        Las consultas se embeben en una sola llamada y se buscan en bloque en
+        la base vectorial; las generaciones se reparten en un pool con como
+        máximo max_concurrency llamadas simultáneas a Ollama.
+
+        Args:
+            consultas: Preguntas a realizar
+            max_concurrency: Generaciones simultáneas máximas
+            temperatura: Temperatura de generación de Ollama
+            max_tokens: Máximo de tokens a generar (num_predict de Ollama)
+
+        Returns:
+            Lista en el orden de entrada; cada elemento tiene consulta, respuesta,
+            documentos_fuente, metadatos y error (None si la consulta tuvo éxito)
+
+        Raises:
+            ValueError: Si la configuración de generación no es válida
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency debe ser mayor que 0")
+        self._validar_consulta("lote", temperatura, max_tokens)
+        self.esperar_listo()
+
+        inicio = time.perf_counter()
+        configuracion = (temperatura, max_tokens)
+        resultados: List[Optional[Dict[str, Any]]] = [None] * len(consultas)
+        pendientes = []
+        for posicion, consulta in enumerate(consultas):
+            try:
+                self._validar_consulta(consulta, temperatura, max_tokens)
+            except ValueError as e:
+                ERRORES.inc(operacion='lote')
+                resultados[posicion] = self._resultado_lote_fallido(consulta, e)
+                continue
+            resultado = self._enrutar(consulta)
+            if resultado is not None:
+                _registrar_consulta('lote', resultado['metadatos'], inicio)
+                resultados[posicion] = dict(resultado, consulta=consulta, error=None)
+            else:
+                pendientes.append(posicion)
+
+        def fallar_pendientes(paso: str, error: Exception) -> None:
+            """Registra el error en las consultas que aún no tienen resultado."""
+            logging.error(f"Error al {paso} del lote: {error}")
+            for posicion in pendientes:
+                ERRORES.inc(operacion='lote')
+                resultados[posicion] = self._resultado_lote_fallido(consultas[posicion], error)
+            pendientes.clear()
+
+        logging.info(f"Realizando lote de {len(pendientes)} consultas")
+        vectores: Dict[int, List[float]] = {}
+        try:
+            with etapa("embeddings.consultas", consultas=len(pendientes)):
+                vectores = dict(zip(pendientes, self._embeber_consultas([consultas[i] for i in pendientes])))
+        except Exception as e:
+            fallar_pendientes("embeber las consultas", e)
+
+        if self.cache_respuestas is not None and pendientes:
+            try:
+                version = self._version_cache()
+                with etapa("cache.buscar", consultas=len(pendientes)) as medicion:
+                    buscadas = len(pendientes)
+                    for posicion in list(pendientes):
+                        resultado = self.cache_respuestas.buscar(vectores[posicion], configuracion, version)
+                        if resultado is not None:
+                            _registrar_consulta('lote', resultado['metadatos'], inicio)
+                            resultados[posicion] = dict(resultado, consulta=consultas[posicion], error=None)
+                            pendientes.remove(posicion)
+                    medicion.anotar(pendientes=len(pendientes))
+                registrar_cache('respuestas', buscadas - len(pendientes), len(pendientes))
+            except Exception as e:
+                fallar_pendientes("buscar en la caché de respuestas", e)
+
+        documentos: Dict[int, List[Document]] = {}
+        try:
+            with etapa("consulta.recuperacion", consultas=len(pendientes)), self._lock_indice.lectura():
+                documentos = dict(zip(pendientes, self._buscar_documentos_lote(
+                    [consultas[i] for i in pendientes], [vectores[i] for i in pendientes]
+                )))
+        except Exception as e:
+            fallar_pendientes("recuperar los documentos", e)
+        tiempo_recuperacion = time.perf_counter() - inicio
+
+        llm = self._obtener_llm(temperatura, max_tokens)
+        generar = en_contexto(self._generar_respuesta_lote)
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="rag-lote") as pool:
+            futuros = {
+                posicion: pool.submit(
+                    generar, llm, consultas[posicion], documentos[posicion], inicio
+                )
+                for posicion in pendientes
+            }
+            for posicion, futuro in futuros.items():
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    logging.error(f"Error en la consulta {posicion} del lote: {e}")
+                    ERRORES.inc(operacion='lote')
+                    resultados[posicion] = self._resultado_lote_fallido(consultas[posicion], e)
+                    continue
+                resultado['metadatos']['tiempo_recuperacion'] = tiempo_recuperacion
+                if self.cache_respuestas is not None:
+                    self.cache_respuestas.guardar(
+                        vectores[posicion], configuracion, self._version_cache(),
+                        {k: resultado[k] for k in ('respuesta', 'documentos_fuente', 'metadatos')}
+                    )
+                resultados[posicion] = resultado
+
+        errores = sum(1 for resultado in resultados if resultado['error'] is not None)
+        logging.info(
+            f"Lote de {len(consultas)} consultas completado en "
+            f"{time.perf_counter() - inicio:.2f} segundos ({errores} con error)"
+        )
+        return resultados
+
+    def _embeber_consultas(self, consultas: List[str]) -> List[List[float]]:
+        """
+        Embebe varias consultas con una sola llamada al modelo.
+
+        embed_documents daría vectores de pasaje, distintos de los de
+        embed_query que guarda la caché de respuestas, así que se llama a
+        query_embed de FastEmbed con el batch_size de FastEmbedEmbeddings.
+        El modelo está en _model en langchain-community 0.2 (la versión de
+        pyproject.toml) y en model desde la 0.3; si no aparece, se recurre
+        a embed_query por consulta.
+        """
+        if not consultas:
+            return []
+        modelo = getattr(self.embeddings, '_model', None) or getattr(self.embeddings, 'model', None)
+        batch_size = getattr(self.embeddings, 'batch_size', None)
+        if hasattr(modelo, 'query_embed') and batch_size:
+            return [vector.tolist() for vector in modelo.query_embed(consultas, batch_size=batch_size)]
+        return [self.embeddings.embed_query(consulta) for consulta in consultas]
+
+    def _recuperar(self, consulta: str, vector_consulta: Optional[List[float]] = None) -> List[Document]:
+        """
+        Recupera los documentos de una consulta sin que reiniciar() sustituya el índice a medias.
+
+        Con el vector ya calculado (caché de respuestas) no se vuelve a embeber la consulta.
+        """
+        with self._lock_indice.lectura():
+            if vector_consulta is None:
+                return self.retriever.invoke(consulta)
+            return self._buscar_por_vector(consulta, vector_consulta)
+
+    def _buscar_por_vector(self, consulta: str, vector_consulta: List[float]) -> List[Document]:
+        """Mismos documentos que el retriever a partir del vector; requiere el lock del índice."""
+        return self._buscar_documentos_lote([consulta], [vector_consulta])[0]
+
+    def _buscar_documentos_lote(
+            self,
+            consultas: List[str],
+            vectores: List[List[float]]
+    ) -> List[List[Document]]:
+        """
+        Busca los documentos de varias consultas con una petición a la base vectorial
+        por cada filtro distinto (todas las consultas sin predicados juntas).
+        """
+        filtros = [
+            self.retriever.filtro_para(consulta) if hasattr(self.retriever, 'filtro_para') else None
+            for consulta in consultas
+        ]
+        grupos: Dict[str, List[int]] = {}
+        for posicion, filtro in enumerate(filtros):
+            grupos.setdefault(json.dumps(filtro, sort_keys=True), []).append(posicion)
+
+        k_general = getattr(self.retriever, 'k_general', None)
+        documentos: List[List[Document]] = [[] for _ in consultas]
+        for clave, posiciones in grupos.items():
+            filtro = json.loads(clave)
+            encontrados = self._consultar_coleccion([vectores[i] for i in posiciones], filtro, k=k_general)
+            for posicion, docs in zip(posiciones, encontrados):
+                if not docs and filtro is not None:
+                    # Mismo criterio que RetrieverFiltrado: sin resultados, se busca sin filtro
+                    docs = self._consultar_coleccion([vectores[posicion]], None, k=k_general)[0]
+                documentos[posicion] = docs
+
+        if vectores and isinstance(self.retriever, CustomRetriever) and self.retriever.k_resumen > 0:
+            # Mismo orden que CustomRetriever: resúmenes primero y sin repetidos
+            resumenes = self._consultar_coleccion(
+                vectores, {"source": FUENTE_RESUMEN}, k=self.retriever.k_resumen
+            )
+            documentos = [
+                CustomRetriever._combinar([propios, docs])
+                for propios, docs in zip(resumenes, documentos)
+            ]
+        return documentos
+
+    def _consultar_coleccion(
+            self,
+            vectores: List[List[float]],
+            filtro: Optional[Dict[str, Any]],
+            k: Optional[int] = None
+    ) -> List[List[Document]]:
+        """Ejecuta una consulta multivector sobre la base vectorial (k por defecto: k_documentos)."""
+        if isinstance(self.vector_db, VectorStoreNumpy):
+            return self.vector_db.buscar_lote(vectores, k=k or self.k_documentos, filtro=filtro)
+        encontrados = self.vector_db._collection.query(
+            query_embeddings=vectores,
+            n_results=k or self.k_documentos,
+            where=filtro,
+            include=["documents", "metadatas"]
+        )
+        return [
+            [
+                Document(page_content=texto, metadata=metadatos or {})
+                for texto, metadatos in zip(textos, lista_metadatos)
+            ]
+            for textos, lista_metadatos in zip(encontrados['documents'], encontrados['metadatas'])
+        ]
+
+    def _generar_respuesta_lote(
+            self,
+            llm: Ollama,
+            consulta: str,
+            documentos: List[Document],
+            inicio_lote: float
+    ) -> Dict[str, Any]:
+        """Genera la respuesta de una consulta del lote con su contexto ya recuperado."""
+        inicio = time.perf_counter()
+        EN_CURSO.inc()
+        try:
+            prompt = self._formatear_prompt(consulta, documentos)
+            captura = _CapturaUsoLLM()
+            with etapa("consulta.generacion", caracteres_prompt=len(prompt)):
+                respuesta = llm.invoke(prompt, config={'callbacks': [captura]})
+        finally:
+            EN_CURSO.dec()
+        fin = time.perf_counter()
+        metadatos = {
+            'tiempo_respuesta': fin - inicio,
+            'tiempo_espera': inicio - inicio_lote,
+            'tiempo_total': fin - inicio_lote,
+            'num_documentos': len(documentos),
+            'modelo': self.model_name,
+            'cache_respuesta': False,
+            'ruta': 'abierta',
+            **self.contabilidad_llm.registrar(captura.respuesta_llm)
+        }
+        _registrar_consulta('lote', metadatos, inicio_lote)
+        return {
+            'consulta': consulta,
+            'respuesta': respuesta,
+            'documentos_fuente': [doc.page_content for doc in documentos],
+            'metadatos': metadatos,
+            'error': None
+        }
+
+    @staticmethod
+    def _resultado_lote_fallido(consulta: Any, error: Exception) -> Dict[str, Any]:
+        """Resultado de una consulta del lote que no pudo completarse."""
+        return {
+            'consulta': consulta,
+            'respuesta': None,
+            'documentos_fuente': [],
+            'metadatos': {},
+            'error': str(error)
+        }
+
+    @_medir_consulta("asincrona")
+    async def arealizar_consulta(
+            self,
+            consulta: str,
+            temperatura: float = 0.7,
+            max_tokens: int = 500
+    ) -> Dict[str, Any]:
+        """
+        Versión asíncrona de realizar_consulta.
+
+        La búsqueda vectorial se ejecuta en el pool de hilos del sistema y la
+        generación usa el cliente HTTP asíncrono de Ollama, de modo que varias
+        consultas pueden estar en curso a la vez sobre el mismo índice.
+
+        Args:
+            consulta: Pregunta a realizar
+            temperatura: Temperatura de generación de Ollama
+            max_tokens: Máximo de tokens a generar (num_predict de Ollama)
+
+        Returns:
+            Diccionario con respuesta, documentos_fuente y metadatos
+
+        Raises:
+            ValueError: Si la consulta o la configuración no son válidas
+        """
+        self._validar_consulta(consulta, temperatura, max_tokens)
+        resultado = self._enrutar(consulta)
+        if resultado is not None:
+            return resultado
+        bucle = asyncio.get_running_loop()
+        if self._listo.is_set():
+            self.esperar_listo()
+        else:
+            await bucle.run_in_executor(self._executor, self.esperar_listo)
+
+        with span("consulta", modo="asincrona"):
+            try:
+                logging.info(f"Realizando consulta asíncrona: {consulta}")
+                inicio = time.perf_counter()
+
+                vector_consulta = None
+                if self.cache_respuestas is not None:
+                    vector_consulta, resultado = await bucle.run_in_executor(
+                        self._executor, en_contexto(self._buscar_en_cache),
+                        consulta, (temperatura, max_tokens)
+                    )
+                    if resultado is not None:
+                        logging.info("Consulta asíncrona respondida desde la caché de respuestas")
+                        return resultado
+
+                with etapa("consulta.recuperacion") as medicion:
+                    documentos = await bucle.run_in_executor(
+                        self._executor, en_contexto(self._recuperar), consulta, vector_consulta
+                    )
+                    medicion.anotar(documentos=len(documentos))
+                tiempo_recuperacion = time.perf_counter() - inicio
+
+                prompt = self._formatear_prompt(consulta, documentos)
+                with etapa("consulta.generacion", caracteres_prompt=len(prompt)):
+                    respuesta = await self.cliente_ollama.generar(
+                        self.model_name,
+                        prompt,
+                        {'temperature': float(temperatura), 'num_predict': int(max_tokens)}
+                    )
+                tiempo_respuesta = time.perf_counter() - inicio
+
+                resultado = {
+                    'respuesta': respuesta.get('response', ''),
+                    'documentos_fuente': [doc.page_content for doc in documentos],
+                    'metadatos': {
+                        'tiempo_respuesta': tiempo_respuesta,
+                        'tiempo_recuperacion': tiempo_recuperacion,
+                        'num_documentos': len(documentos),
+                        'modelo': self.model_name,
+                        'cache_respuesta': False,
+                        'ruta': 'abierta',
+                        **self.contabilidad_llm.registrar(respuesta)
+                    }
+                }
+
+                if vector_consulta is not None:
+                    self.cache_respuestas.guardar(
+                        vector_consulta, (temperatura, max_tokens), self._version_cache(), resultado
+                    )
+
+                logging.info(f"Consulta asíncrona completada en {tiempo_respuesta:.2f} segundos")
+                return resultado
+
+            except Exception as e:
+                logging.error(f"Error al realizar la consulta asíncrona: {e}")
+                raise
+
+    async def cerrar(self) -> None:
+        """
+        Cierra las conexiones del cliente asíncrono de Ollama en el bucle actual
+        y libera la caché de embeddings.
+        """
+        await self.cliente_ollama.cerrar()
+        self.cerrar_cache_embeddings()
+
+    def cerrar_cache_embeddings(self) -> None:
+        """Persiste la caché de embeddings y libera su bloqueo de escritura para otras instancias."""
+        if self.cache_embeddings is not None:
+            self.cache_embeddings.cerrar()
+
+    def _formatear_prompt(self, consulta: str, documentos: List[Document]) -> str:
+        """Construye el prompt final con los documentos recuperados como contexto."""
+        with etapa("consulta.prompt", documentos=len(documentos)):
+            return self.prompt.format(
+                context="\n\n".join(doc.page_content for doc in documentos),
+                question=consulta
+            )
+
+    def _buscar_en_cache(
+            self,
+            consulta: str,
+            configuracion: Tuple[float, int]
+    ) -> Tuple[List[float], Optional[Dict[str, Any]]]:
+        """
+        Embebe la consulta y la busca en la caché de respuestas.
+
+        Returns:
+            Vector de la consulta (para guardar la respuesta después) y el
+            resultado cacheado, o None si no hay acierto
+        """
+        with etapa("embeddings.consulta"):
+            vector_consulta = self.embeddings.embed_query(consulta)
+        with etapa("cache.buscar") as medicion:
+            resultado = self.cache_respuestas.buscar(vector_consulta, configuracion, self._version_cache())
+            medicion.anotar(acierto=resultado is not None)
+        registrar_cache('respuestas', int(resultado is not None), int(resultado is None))
+        return vector_consulta, resultado
+
+    def _enrutar(self, consulta: str) -> Optional[Dict[str, Any]]:
+        """
+        Intenta responder la consulta con el enrutador estructurado.
+
+        No necesita el índice, por lo que funciona durante la inicialización.
+
+        Returns:
+            Resultado calculado con pandas, o None si la consulta va al LLM
+        """
+        if self.enrutador is None:
+            return None
+        with etapa("consulta.enrutador") as medicion:
+            resultado = self.enrutador.responder(consulta)
+            medicion.anotar(estructurada=resultado is not None)
+        return resultado
+
+    def obtener_estadisticas_enrutador(self) -> Optional[Dict[str, Any]]:
+        """
+        Retorna las decisiones de enrutado y sus latencias.
+
+        Returns:
+            Estadísticas por ruta, o None si no hay enrutador
+        """
+        return self.enrutador.estadisticas() if self.enrutador else None
+
+    def obtener_estadisticas_llm(self) -> Dict[str, Any]:
+        """
+        Retorna el uso acumulado del LLM según los contadores de Ollama.
+
+        Returns:
+            Tokens de prompt y generados, tokens por segundo de prefill y de
+            decodificación y cargas en frío del modelo (ver ContabilidadLLM.resumen)
+        """
+        return self.contabilidad_llm.resumen()
+
+    def obtener_estadisticas_cache(self) -> Dict[str, Any]:
+        """
+        Retorna los contadores de las cachés del sistema.
+
+        Returns:
+            Diccionario con las estadísticas de la caché de respuestas y de embeddings
+        """
+        return {
+            'respuestas': self.cache_respuestas.estadisticas() if self.cache_respuestas else None,
+            'embeddings': self.cache_embeddings.estadisticas() if self.cache_embeddings else None
+        }
+
+    def informe_recall_cuantizacion(self, consultas: List[str], k: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Mide el recall@k de la matriz cuantizada frente a la búsqueda exacta.
+
+        Args:
+            consultas: Consultas de prueba
+            k: Documentos por consulta (por defecto k_documentos)
+
+        Returns:
+            Recall con y sin reevaluación y bytes ocupados (ver VectorStoreNumpy.informe_recall)
+
+        Raises:
+            ValueError: Si el backend no es 'numpy' o no se conservan los vectores originales
+        """
+        self.esperar_listo()
+        if not isinstance(self.vector_db, VectorStoreNumpy):
+            raise ValueError("El informe de recall requiere backend_vectorial='numpy'")
+        return self.vector_db.informe_recall(self._embeber_consultas(consultas), k=k or self.k_documentos)
+
+    def _validar_consulta(self, consulta: str, temperatura: float, max_tokens: int) -> None:
+        """
+        Valida los parámetros de una consulta.
+
+        Raises:
+            ValueError: Si la consulta está vacía o la configuración es inválida
+        """
+        if not isinstance(consulta, str) or not consulta.strip():
+            raise ValueError("La consulta debe ser un texto no vacío")
+
+        if not 0 <= temperatura <= 1:
+            raise ValueError("La temperatura debe estar entre 0 y 1")
+
+        if not isinstance(max_tokens, int) or max_tokens < 1:
+            raise ValueError("max_tokens debe ser un entero positivo")
+
     def reiniciar(self) -> None:
         """
         Reinicia el sistema y la base de datos vectorial.
 
+        Espera a que terminen las consultas que están usando el índice; las
+        que llegan durante la reconstrucción esperan al índice nuevo.
+
         Raises:
             Exception: Si hay errores en el reinicio
         """
+        self.esperar_listo()
+
         try:
-            if self.vector_db is not None:
-                self.vector_db = None
-                self.retriever = None
-                if self.persist_directory:
-                    persist_path = Path(self.persist_directory)
-                    if persist_path.exists():
-                        for item in persist_path.glob('*'):
-                            if item.is_file():
-                                item.unlink()
-                            elif item.is_dir():
-                                item.rmdir()
-                self._cargar_y_procesar_documento()
-                logging.info("Sistema reiniciado correctamente")
+            with self._lock_indice.escritura(), self._lock:
+                self._reiniciar()
         except Exception as e:
             logging.error(f"Error al reiniciar el sistema: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def _reiniciar(self) -> None:
+        """Elimina la base vectorial y la reconstruye; requiere tener el lock."""
+        if self.vector_db is not None:
+            if not self.persist_directory:
+                self.vector_db.delete_collection()
+            self.vector_db = None
+            self.retriever = None
+            if self.persist_directory:
+                persist_path = Path(self.persist_directory)
+                if persist_path.exists():
+                    for item in persist_path.glob('*'):
+                        if item.is_file():
+                            item.unlink()
+                        elif item.is_dir():
+                            item.rmdir()
+            self._cargar_y_procesar_documento()
+            logging.info("Sistema reiniciado correctamente")
\ No newline at end of file
@@ -0,0 +1,52 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class LockLectoresEscritor:
+    """
+    Lock de lectores y escritor con preferencia para el escritor.
+
+    Varios lectores pueden tenerlo a la vez; el escritor espera a que salgan
+    los lectores en curso y, mientras espera, no entran lectores nuevos.
+    No es reentrante: un hilo no debe pedir la lectura dos veces anidadas.
+    """
+
+    def __init__(self):
+        self._condicion = threading.Condition(threading.Lock())
+        self._lectores = 0
+        self._escribiendo = False
+        self._escritores_esperando = 0
+
+    @contextmanager
+    def lectura(self) -> Iterator[None]:
+        """Mantiene el lock compartido mientras dure el bloque."""
+        with self._condicion:
+            while self._escribiendo or self._escritores_esperando:
+                self._condicion.wait()
+            self._lectores += 1
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._lectores -= 1
+                if not self._lectores:
+                    self._condicion.notify_all()
+
+    @contextmanager
+    def escritura(self) -> Iterator[None]:
+        """Mantiene el lock exclusivo mientras dure el bloque."""
+        with self._condicion:
+            self._escritores_esperando += 1
+            try:
+                while self._escribiendo or self._lectores:
+                    self._condicion.wait()
+            finally:
+                self._escritores_esperando -= 1
+            self._escribiendo = True
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._escribiendo = False
+                self._condicion.notify_all()
@@ -0,0 +1,269 @@
+import json
+import logging
+from typing import Any, List, Optional
+
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+# Fuente común de los documentos de resumen, usada para filtrarlos en la búsqueda
+FUENTE_RESUMEN = "CSV_summary"
+
+# Rangos de edad de los resúmenes y de las agrupaciones por edad
+BORDES_EDAD = [0, 30, 40, 50, 60, np.inf]
+ETIQUETAS_EDAD = ['<30', '30-39', '40-49', '50-59', '60+']
+
+# Dimensiones de los resúmenes por segmento: columna o rango derivado
+DIMENSIONES_RESUMEN = ['country', 'gender', 'rango_edad', 'products_number', 'active_member']
+
+
+def serialize_numpy(valor: Any) -> Any:
+    """Convierte escalares de numpy y NaN a tipos nativos serializables en JSON."""
+    if isinstance(valor, dict):
+        return {str(k): serialize_numpy(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [serialize_numpy(v) for v in valor]
+    if isinstance(valor, np.integer):
+        return int(valor)
+    if isinstance(valor, np.floating):
+        valor = float(valor)
+    if isinstance(valor, float) and np.isnan(valor):
+        return None
+    if isinstance(valor, np.bool_):
+        return bool(valor)
+    return valor
+
+
+class DataProcessor:
+    """Construcción de documentos a partir del DataFrame de clientes."""
+
+    @staticmethod
+    def split_documents(
+            documents: List[Document],
+            chunk_size: int = 1000,
+            chunk_overlap: int = 200
+    ) -> List[Document]:
+        """
+        Divide documentos en chunks.
+
+        Args:
+            documents: Documentos a dividir
+            chunk_size: Tamaño máximo de cada chunk
+            chunk_overlap: Solapamiento entre chunks
+
+        Returns:
+            Lista de chunks
+        """
+        splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        return splitter.split_documents(documents)
+
+    @staticmethod
+    def create_csv_summary(df: pd.DataFrame) -> Document:
+        """
+        Crea un documento con el resumen estadístico de todo el CSV.
+
+        Args:
+            df: DataFrame de clientes
+
+        Returns:
+            Documento con el resumen en texto y el detalle en JSON en
+            metadata['full_summary']
+        """
+        numericas = df.select_dtypes(include='number')
+        categoricas = df.select_dtypes(exclude='number')
+        descripcion = numericas.agg(['min', 'max', 'mean', 'median', 'std'])
+
+        resumen = {
+            'general_info': {
+                'total_rows': len(df),
+                'total_columns': len(df.columns),
+                'unique_customers': df['customer_id'].nunique() if 'customer_id' in df else None,
+                'columns': list(df.columns)
+            },
+            'numerical_stats': {
+                columna: {
+                    # min y max conservan el tipo de la columna
+                    'min': numericas[columna].min(),
+                    'max': numericas[columna].max(),
+                    'mean': descripcion.at['mean', columna],
+                    'median': descripcion.at['median', columna],
+                    'std': descripcion.at['std', columna]
+                }
+                for columna in numericas.columns if columna != 'customer_id'
+            },
+            'categorical_stats': {
+                columna: categoricas[columna].value_counts().to_dict()
+                for columna in categoricas.columns
+            },
+            'correlations': (
+                numericas.drop(columns=['customer_id'], errors='ignore').corr().to_dict()
+                if numericas.shape[1] > 1 else {}
+            )
+        }
+        resumen = serialize_numpy(resumen)
+
+        lineas = [
+            "RESUMEN DETALLADO DEL CSV",
+            f"Total de filas: {len(df)}",
+            f"Total de columnas: {len(df.columns)}",
+        ]
+        if 'customer_id' in df:
+            lineas.append(f"Clientes únicos: {df['customer_id'].nunique()}")
+        if 'churn' in df:
+            lineas.append(f"Tasa de deserción global: {df['churn'].mean() * 100:.1f}%")
+
+        lineas.append("\nEstadísticas numéricas:")
+        for columna, stats in resumen['numerical_stats'].items():
+            lineas.append(
+                f"- {columna}: media {stats['mean']:.2f}, mediana {stats['median']:.2f}, "
+                f"mín {stats['min']}, máx {stats['max']}"
+            )
+
+        if resumen['categorical_stats']:
+            lineas.append("\nVariables categóricas:")
+            for columna, conteos in resumen['categorical_stats'].items():
+                valores = ", ".join(f"{valor} ({n})" for valor, n in conteos.items())
+                lineas.append(f"- {columna}: {valores}")
+
+        if 'churn' in resumen['correlations']:
+            correlaciones = sorted(
+                ((c, v) for c, v in resumen['correlations']['churn'].items() if c != 'churn' and v is not None),
+                key=lambda par: abs(par[1]),
+                reverse=True
+            )
+            lineas.append("\nCorrelación con la deserción:")
+            lineas += [f"- {columna}: {valor:+.3f}" for columna, valor in correlaciones]
+
+        return Document(
+            page_content="\n".join(lineas),
+            metadata={
+                'source': FUENTE_RESUMEN,
+                'dimension': 'general',
+                'valor': 'todos',
+                'full_summary': json.dumps(resumen, ensure_ascii=False)
+            }
+        )
+
+    @staticmethod
+    def create_slice_summaries(
+            df: pd.DataFrame,
+            dimensiones: Optional[List[str]] = None
+    ) -> List[Document]:
+        """
+        Crea un documento de resumen por cada segmento de cada dimensión.
+
+        Args:
+            df: DataFrame de clientes
+            dimensiones: Dimensiones a resumir (por defecto país, género,
+                rango de edad, número de productos y actividad)
+
+        Returns:
+            Lista de documentos con source CSV_summary
+        """
+        dimensiones = dimensiones or DIMENSIONES_RESUMEN
+        metricas = {
+            columna: nombre for columna, nombre in (
+                ('credit_score', 'Credit score medio'),
+                ('age', 'Edad media'),
+                ('tenure', 'Antigüedad media'),
+                ('balance', 'Balance medio'),
+                ('products_number', 'Productos medios'),
+                ('estimated_salary', 'Salario estimado medio')
+            ) if columna in df
+        }
+        proporciones = {
+            columna: nombre for columna, nombre in (
+                ('churn', 'Tasa de deserción'),
+                ('active_member', 'Miembros activos'),
+                ('credit_card', 'Con tarjeta de crédito')
+            ) if columna in df
+        }
+        globales = df[list(metricas) + list(proporciones)].mean()
+
+        documentos = []
+        for dimension in dimensiones:
+            if dimension == 'rango_edad':
+                if 'age' not in df:
+                    continue
+                claves = pd.cut(df['age'], bins=BORDES_EDAD, labels=ETIQUETAS_EDAD, right=False)
+            elif dimension in df:
+                claves = df[dimension]
+            else:
+                continue
+
+            grupos = df.groupby(claves, observed=True)
+            medias = grupos[list(metricas) + list(proporciones)].mean()
+            tamanos = grupos.size()
+
+            for segmento, fila in medias.iterrows():
+                lineas = [
+                    f"RESUMEN DEL SEGMENTO {dimension} = {segmento}",
+                    f"Clientes: {int(tamanos[segmento])} ({tamanos[segmento] / len(df) * 100:.1f}% del total)"
+                ]
+                lineas += [
+                    f"{nombre}: {fila[columna] * 100:.1f}% (global {globales[columna] * 100:.1f}%)"
+                    for columna, nombre in proporciones.items()
+                ]
+                lineas += [
+                    f"{nombre}: {fila[columna]:,.2f} (global {globales[columna]:,.2f})"
+                    for columna, nombre in metricas.items()
+                ]
+                documentos.append(Document(
+                    page_content="\n".join(lineas),
+                    metadata={
+                        'source': FUENTE_RESUMEN,
+                        'dimension': dimension,
+                        'valor': str(segmento),
+                        'clientes': int(tamanos[segmento])
+                    }
+                ))
+
+        logging.info(f"Creados {len(documentos)} resúmenes por segmento")
+        return documentos
+
+    @staticmethod
+    def create_csv_docs(df: pd.DataFrame, sample_size: Optional[int] = None) -> List[Document]:
+        """
+        Crea un documento por fila del DataFrame.
+
+        Args:
+            df: DataFrame de clientes
+            sample_size: Si se indica, número de filas muestreadas
+
+        Returns:
+            Lista de documentos con las columnas como metadatos tipados
+            (los valores ausentes se omiten)
+        """
+        if sample_size is not None and sample_size < len(df):
+            df = df.sample(n=sample_size, random_state=42)
+
+        columnas = list(df.columns)
+        registros = df.to_dict(orient='records')
+        return [
+            Document(
+                page_content="\n".join(f"{columna}: {registro[columna]}" for columna in columnas),
+                metadata={
+                    columna: valor for columna, valor in serialize_numpy(registro).items()
+                    if valor is not None
+                }
+            )
+            for registro in registros
+        ]
+
+    @staticmethod
+    def get_customer_by_id(documents: List[Document], customer_id: int) -> Optional[Document]:
+        """
+        Busca el documento de un cliente.
+
+        Args:
+            documents: Documentos creados con create_csv_docs
+            customer_id: ID del cliente
+
+        Returns:
+            El documento del cliente o None
+        """
+        return next(
+            (doc for doc in documents if doc.metadata.get('customer_id') == customer_id),
+            None
+        )
@@ -0,0 +1,468 @@
+import json
+import time
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.trazas import span
+
+# Límites (segundos) de las cubetas de latencia: de 1 ms a 1 minuto
+LIMITES_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Tipo de contenido del formato de texto de Prometheus
+TIPO_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _formatear_valor(valor: float) -> str:
+    """Valor numérico en el formato de Prometheus."""
+    if valor == float("inf"):
+        return "+Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+def _formatear_etiquetas(etiquetas: Dict[str, str]) -> str:
+    """Etiquetas como {a="x",b="y"}, escapando comillas, barras y saltos de línea."""
+    if not etiquetas:
+        return ""
+    pares = (
+        f'{nombre}="' + valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for nombre, valor in etiquetas.items()
+    )
+    return "{" + ",".join(pares) + "}"
+
+
+class _Metrica:
+    """Métrica con valores por combinación de etiquetas."""
+
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _clave(self, etiquetas: Dict[str, Any]) -> Tuple[str, ...]:
+        """Valores de las etiquetas en el orden declarado."""
+        if len(etiquetas) != len(self.etiquetas) or any(e not in etiquetas for e in self.etiquetas):
+            raise ValueError(
+                f"{self.nombre} requiere las etiquetas {self.etiquetas}, recibidas {tuple(etiquetas)}"
+            )
+        return tuple(str(etiquetas[e]) for e in self.etiquetas)
+
+    def reiniciar(self) -> None:
+        """Descarta los valores registrados."""
+        with self._lock:
+            self._valores.clear()
+
+    def muestras(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Muestras de la métrica como (sufijo, etiquetas, valor)."""
+        with self._lock:
+            return [("", dict(zip(self.etiquetas, clave)), valor) for clave, valor in self._valores.items()]
+
+    def a_dict(self) -> Dict[str, Any]:
+        """Valores de la métrica por combinación de etiquetas, serializables en JSON."""
+        with self._lock:
+            valores = list(self._valores.items())
+        return {
+            'tipo': self.tipo,
+            'ayuda': self.ayuda,
+            'valores': [
+                {'etiquetas': dict(zip(self.etiquetas, clave)), 'valor': self._serializar(valor)}
+                for clave, valor in valores
+            ]
+        }
+
+    @staticmethod
+    def _serializar(valor: Any) -> Any:
+        return valor
+
+
+class Contador(_Metrica):
+    """Valor que solo crece (peticiones, errores, aciertos)."""
+
+    tipo = "counter"
+
+    def inc(self, cantidad: float = 1.0, **etiquetas: Any) -> None:
+        """
+        Incrementa el contador.
+
+        Raises:
+            ValueError: Si la cantidad es negativa o faltan etiquetas
+        """
+        if cantidad < 0:
+            raise ValueError("Un contador no puede decrecer")
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0.0) + cantidad
+
+    def valor(self, **etiquetas: Any) -> float:
+        """Valor actual para las etiquetas dadas (0 si nunca se incrementó)."""
+        clave = self._clave(etiquetas)
+        with self._lock:
+            return self._valores.get(clave, 0.0)
+
+
+class Medidor(Contador):
+    """Valor que sube y baja (tamaño del índice, consultas en curso)."""
+
+    tipo = "gauge"
+
+    def inc(self, cantidad: float = 1.0, **etiquetas: Any) -> None:
+        """Suma la cantidad al medidor."""
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0.0) + cantidad
+
+    def dec(self, cantidad: float = 1.0, **etiquetas: Any) -> None:
+        """Resta la cantidad al medidor."""
+        self.inc(-cantidad, **etiquetas)
+
+    def fijar(self, valor: float, **etiquetas: Any) -> None:
+        """Fija el valor del medidor."""
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = float(valor)
+
+
+class _Cubetas:
+    """Conteos por cubeta, suma y número de observaciones de un histograma."""
+
+    __slots__ = ('conteos', 'suma', 'n')
+
+    def __init__(self, num_cubetas: int):
+        self.conteos = [0] * num_cubetas
+        self.suma = 0.0
+        self.n = 0
+
+
+class Histograma(_Metrica):
+    """Distribución de observaciones (latencias) en cubetas de límites fijos."""
+
+    tipo = "histogram"
+
+    def __init__(
+            self,
+            nombre: str,
+            ayuda: str,
+            etiquetas: Sequence[str] = (),
+            limites: Sequence[float] = LIMITES_LATENCIA
+    ):
+        super().__init__(nombre, ayuda, etiquetas)
+        if list(limites) != sorted(limites) or not limites:
+            raise ValueError("Los límites del histograma deben estar ordenados")
+        self.limites = tuple(float(limite) for limite in limites)
+
+    def observar(self, valor: float, **etiquetas: Any) -> None:
+        """Añade una observación a su cubeta."""
+        clave = self._clave(etiquetas)
+        posicion = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            cubetas = self._valores.get(clave)
+            if cubetas is None:
+                # Una cubeta más para las observaciones por encima del último límite
+                cubetas = self._valores[clave] = _Cubetas(len(self.limites) + 1)
+            cubetas.conteos[posicion] += 1
+            cubetas.suma += valor
+            cubetas.n += 1
+
+    def medir(self, **etiquetas: Any) -> "_Cronometro":
+        """Gestor de contexto que observa la duración del bloque en segundos."""
+        return _Cronometro(self, etiquetas)
+
+    def resumen(self, **etiquetas: Any) -> Dict[str, Any]:
+        """
+        Resumen de las observaciones de unas etiquetas.
+
+        Returns:
+            n, suma, media y conteos acumulados por límite superior
+        """
+        clave = self._clave(etiquetas)
+        with self._lock:
+            return self._serializar(self._valores.get(clave) or _Cubetas(len(self.limites) + 1))
+
+    def _serializar(self, cubetas: _Cubetas) -> Dict[str, Any]:
+        acumulados, total = [], 0
+        for conteo in cubetas.conteos:
+            total += conteo
+            acumulados.append(total)
+        return {
+            'n': cubetas.n,
+            'suma': cubetas.suma,
+            'media': cubetas.suma / cubetas.n if cubetas.n else 0.0,
+            'cubetas': dict(zip([_formatear_valor(l) for l in self.limites] + ["+Inf"], acumulados))
+        }
+
+    def muestras(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Cubetas acumuladas (_bucket con le), _sum y _count por combinación de etiquetas."""
+        with self._lock:
+            valores = [(clave, list(c.conteos), c.suma, c.n) for clave, c in self._valores.items()]
+        muestras = []
+        for clave, conteos, suma, n in valores:
+            etiquetas = dict(zip(self.etiquetas, clave))
+            acumulado = 0
+            for limite, conteo in zip(self.limites + (float("inf"),), conteos):
+                acumulado += conteo
+                muestras.append(("_bucket", dict(etiquetas, le=_formatear_valor(limite)), acumulado))
+            muestras.append(("_sum", etiquetas, suma))
+            muestras.append(("_count", etiquetas, n))
+        return muestras
+
+
+class _Cronometro:
+    """Observa en un histograma la duración de un bloque."""
+
+    __slots__ = ('histograma', 'etiquetas', 'inicio')
+
+    def __init__(self, histograma: Histograma, etiquetas: Dict[str, Any]):
+        self.histograma = histograma
+        self.etiquetas = etiquetas
+        self.inicio = 0.0
+
+    def __enter__(self) -> "_Cronometro":
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, traceback) -> bool:
+        self.histograma.observar(time.perf_counter() - self.inicio, **self.etiquetas)
+        return False
+
+
+class RegistroMetricas:
+    """Conjunto de métricas del proceso, exportable a Prometheus o JSON."""
+
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+        self._lock = threading.Lock()
+
+    def _obtener(self, clase: type, nombre: str, ayuda: str, etiquetas: Sequence[str], **opciones: Any):
+        """Retorna la métrica existente o la crea; el tipo y las etiquetas deben coincidir."""
+        with self._lock:
+            metrica = self._metricas.get(nombre)
+            if metrica is None:
+                metrica = self._metricas[nombre] = clase(nombre, ayuda, etiquetas, **opciones)
+            elif type(metrica) is not clase or metrica.etiquetas != tuple(etiquetas):
+                raise ValueError(f"La métrica {nombre} ya existe con otro tipo o etiquetas")
+            return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Contador:
+        """Contador registrado con ese nombre (se crea la primera vez)."""
+        return self._obtener(Contador, nombre, ayuda, etiquetas)
+
+    def medidor(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Medidor:
+        """Medidor registrado con ese nombre (se crea la primera vez)."""
+        return self._obtener(Medidor, nombre, ayuda, etiquetas)
+
+    def histograma(
+            self,
+            nombre: str,
+            ayuda: str,
+            etiquetas: Sequence[str] = (),
+            limites: Sequence[float] = LIMITES_LATENCIA
+    ) -> Histograma:
+        """Histograma registrado con ese nombre (se crea la primera vez)."""
+        return self._obtener(Histograma, nombre, ayuda, etiquetas, limites=limites)
+
+    def metricas(self) -> List[_Metrica]:
+        """Métricas registradas, por nombre."""
+        with self._lock:
+            return [self._metricas[nombre] for nombre in sorted(self._metricas)]
+
+    def reiniciar(self) -> None:
+        """Descarta los valores de todas las métricas, conservando su registro."""
+        for metrica in self.metricas():
+            metrica.reiniciar()
+
+    def a_prometheus(self) -> str:
+        """Exporta las métricas en el formato de texto de Prometheus."""
+        lineas = []
+        for metrica in self.metricas():
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            lineas += [
+                f"{metrica.nombre}{sufijo}{_formatear_etiquetas(etiquetas)} {_formatear_valor(valor)}"
+                for sufijo, etiquetas, valor in metrica.muestras()
+            ]
+        return "\n".join(lineas) + "\n"
+
+    def a_dict(self) -> Dict[str, Any]:
+        """Exporta las métricas como diccionario serializable en JSON."""
+        return {metrica.nombre: metrica.a_dict() for metrica in self.metricas()}
+
+    def exportar_json(self, ruta: str) -> Path:
+        """
+        Escribe las métricas en un archivo JSON.
+
+        Args:
+            ruta: Archivo de destino
+
+        Returns:
+            Ruta del archivo escrito
+        """
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        ruta.write_text(json.dumps(self.a_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+        return ruta
+
+
+# Registro compartido por todo el proceso
+REGISTRO = RegistroMetricas()
+
+# Duración de las etapas del pipeline medidas con etapa()
+ETAPAS = REGISTRO.histograma("rag_etapa_segundos", "Duración de cada etapa del pipeline RAG", ("etapa",))
+
+# Búsquedas en las cachés de respuestas y de embeddings
+BUSQUEDAS_CACHE = REGISTRO.contador(
+    "rag_cache_total", "Búsquedas en las cachés por resultado", ("cache", "resultado")
+)
+TASA_CACHE = REGISTRO.medidor("rag_cache_tasa_aciertos", "Proporción de aciertos de cada caché", ("cache",))
+
+
+def registrar_cache(cache: str, aciertos: int, fallos: int) -> None:
+    """
+    Cuenta búsquedas en una caché y actualiza su tasa de aciertos acumulada.
+
+    Args:
+        cache: Nombre de la caché ('respuestas', 'embeddings')
+        aciertos: Búsquedas resueltas por la caché
+        fallos: Búsquedas que no estaban en la caché
+    """
+    BUSQUEDAS_CACHE.inc(aciertos, cache=cache, resultado='acierto')
+    BUSQUEDAS_CACHE.inc(fallos, cache=cache, resultado='fallo')
+    total_aciertos = BUSQUEDAS_CACHE.valor(cache=cache, resultado='acierto')
+    total = total_aciertos + BUSQUEDAS_CACHE.valor(cache=cache, resultado='fallo')
+    if total:
+        TASA_CACHE.fijar(total_aciertos / total, cache=cache)
+
+
+class _Etapa:
+    """Span de traza y observación de rag_etapa_segundos para una misma etapa."""
+
+    __slots__ = ('nombre', 'span', 'inicio')
+
+    def __init__(self, nombre: str, atributos: Dict[str, Any]):
+        self.nombre = nombre
+        self.span = span(nombre, **atributos)
+        self.inicio = 0.0
+
+    def iniciar(self) -> "_Etapa":
+        """Empieza a medir sin tocar el contexto (ver Span.iniciar)."""
+        self.span.iniciar()
+        self.inicio = time.perf_counter()
+        return self
+
+    def terminar(self, error: Optional[BaseException] = None) -> None:
+        """Deja de medir, observa la duración y cierra el span."""
+        ETAPAS.observar(time.perf_counter() - self.inicio, etapa=self.nombre)
+        self.span.terminar(error)
+
+    def anotar(self, **atributos: Any) -> None:
+        """Añade atributos al span."""
+        self.span.anotar(**atributos)
+
+    def __enter__(self) -> "_Etapa":
+        self.span.__enter__()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, traceback) -> bool:
+        ETAPAS.observar(time.perf_counter() - self.inicio, etapa=self.nombre)
+        return self.span.__exit__(tipo, valor, traceback)
+
+
+def etapa(nombre: str, **atributos: Any) -> _Etapa:
+    """
+    Mide una etapa del pipeline.
+
+    Siempre se observa en rag_etapa_segundos; el span solo se registra si
+    hay una traza activa.
+
+    Args:
+        nombre: Etapa medida ('consulta.recuperacion', 'csv.cargar'...)
+        **atributos: Datos adicionales del span
+    """
+    return _Etapa(nombre, atributos)
+
+
+class _ManejadorMetricas(BaseHTTPRequestHandler):
+    """Sirve /metrics (texto de Prometheus) y /metrics.json."""
+
+    registro: RegistroMetricas = REGISTRO
+
+    def do_GET(self) -> None:
+        ruta = self.path.split("?", 1)[0]
+        if ruta == "/metrics":
+            cuerpo, tipo = self.registro.a_prometheus().encode("utf-8"), TIPO_PROMETHEUS
+        elif ruta == "/metrics.json":
+            cuerpo = json.dumps(self.registro.a_dict(), ensure_ascii=False).encode("utf-8")
+            tipo = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato: str, *args: Any) -> None:
+        # Los scrapes periódicos no van al log del sistema
+        pass
+
+
+class ServidorMetricas:
+    """Endpoint HTTP local con las métricas, servido desde un hilo propio."""
+
+    def __init__(self, registro: RegistroMetricas = REGISTRO, host: str = "127.0.0.1", puerto: int = 9108):
+        """
+        Inicializa el servidor.
+
+        Args:
+            registro: Registro a exponer
+            host: Dirección de escucha (por defecto solo local)
+            puerto: Puerto de escucha (0 elige uno libre)
+        """
+        self.registro = registro
+        self.host = host
+        self.puerto = puerto
+        self._servidor: Optional[ThreadingHTTPServer] = None
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL base del servidor en marcha."""
+        return f"http://{self.host}:{self.puerto}"
+
+    def iniciar(self) -> "ServidorMetricas":
+        """Arranca el servidor en segundo plano."""
+        manejador = type("ManejadorMetricas", (_ManejadorMetricas,), {'registro': self.registro})
+        self._servidor = ThreadingHTTPServer((self.host, self.puerto), manejador)
+        self._servidor.daemon_threads = True
+        self.puerto = self._servidor.server_address[1]
+        self._hilo = threading.Thread(
+            target=self._servidor.serve_forever, name="servidor-metricas", daemon=True
+        )
+        self._hilo.start()
+        logging.info(f"Métricas disponibles en {self.url}/metrics")
+        return self
+
+    def detener(self) -> None:
+        """Detiene el servidor y espera a su hilo."""
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._hilo.join()
+            self._servidor = None
+
+    def __enter__(self) -> "ServidorMetricas":
+        return self.iniciar()
+
+    def __exit__(self, tipo, valor, traceback) -> bool:
+        self.detener()
+        return False
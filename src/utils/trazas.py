@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Traza del contexto actual; tiene prioridad sobre la global
+_traza_contexto: contextvars.ContextVar[Optional["Traza"]] = contextvars.ContextVar(
+    "traza_contexto", default=None
+)
+# Span abierto en el contexto actual, padre de los siguientes
+_span_actual: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "span_actual", default=None
+)
+# Traza visible desde todos los hilos (activar_trazas)
+_traza_global: Optional["Traza"] = None
+
+
+class Traza:
+    """Spans terminados de una traza; admite escrituras desde varios hilos."""
+
+    def __init__(self, nombre: str = "rag"):
+        """
+        Inicializa la traza.
+
+        Args:
+            nombre: Nombre del proceso en el visor de trazas
+        """
+        self.nombre = nombre
+        self.inicio_ns = time.perf_counter_ns()
+        self._spans: List[Dict[str, Any]] = []
+        self._hilos: Dict[int, str] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def nuevo_id(self) -> int:
+        """Identificador único de span dentro de la traza."""
+        return next(self._ids)
+
+    def registrar(self, span: "Span", fin_ns: int) -> None:
+        """Añade un span terminado; se atribuye al hilo donde empezó."""
+        hilo = span.hilo
+        registro = {
+            'nombre': span.nombre,
+            'categoria': span.categoria,
+            'id': span.id,
+            'padre': span.padre.id if span.padre is not None else None,
+            'inicio_ns': span.inicio_ns,
+            'duracion_ns': fin_ns - span.inicio_ns,
+            'hilo': hilo.ident,
+            'atributos': span.atributos
+        }
+        with self._lock:
+            self._spans.append(registro)
+            self._hilos.setdefault(hilo.ident, hilo.name)
+
+    def spans(self) -> List[Dict[str, Any]]:
+        """Copia de los spans terminados, en orden de finalización."""
+        with self._lock:
+            return list(self._spans)
+
+    def resumen(self) -> Dict[str, Dict[str, float]]:
+        """
+        Agrega los spans por nombre.
+
+        Returns:
+            Por nombre: llamadas, total_ms, medio_ms y max_ms
+        """
+        resumen: Dict[str, Dict[str, float]] = {}
+        for span in self.spans():
+            ms = span['duracion_ns'] / 1e6
+            entrada = resumen.setdefault(span['nombre'], {'llamadas': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entrada['llamadas'] += 1
+            entrada['total_ms'] += ms
+            entrada['max_ms'] = max(entrada['max_ms'], ms)
+        for entrada in resumen.values():
+            entrada['medio_ms'] = entrada['total_ms'] / entrada['llamadas']
+        return resumen
+
+    def a_chrome(self) -> Dict[str, Any]:
+        """
+        Convierte la traza al formato Chrome trace-event.
+
+        Returns:
+            Diccionario con traceEvents: un evento completo ('X') por span,
+            con tiempos en microsegundos desde el inicio de la traza, y los
+            nombres del proceso y de los hilos como metadatos ('M')
+        """
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self._spans)
+            hilos = dict(self._hilos)
+        eventos = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': self.nombre}}]
+        eventos += [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': nombre}}
+            for tid, nombre in hilos.items()
+        ]
+        eventos += [
+            {
+                'name': span['nombre'],
+                'cat': span['categoria'],
+                'ph': 'X',
+                'ts': (span['inicio_ns'] - self.inicio_ns) / 1e3,
+                'dur': span['duracion_ns'] / 1e3,
+                'pid': pid,
+                'tid': span['hilo'],
+                'args': dict(span['atributos'], id=span['id'], padre=span['padre'])
+            }
+            for span in sorted(spans, key=lambda s: s['inicio_ns'])
+        ]
+        return {'traceEvents': eventos, 'displayTimeUnit': 'ms'}
+
+    def exportar_chrome(self, ruta: str) -> Path:
+        """
+        Escribe la traza como JSON de Chrome trace-event.
+
+        Args:
+            ruta: Archivo de destino
+
+        Returns:
+            Ruta del archivo escrito
+        """
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        ruta.write_text(json.dumps(self.a_chrome(), ensure_ascii=False, default=str), encoding="utf-8")
+        return ruta
+
+
+class Span:
+    """
+    Intervalo medido de una etapa.
+
+    Como gestor de contexto pasa a ser el padre de los spans abiertos dentro.
+    Con iniciar()/terminar() no toca el contexto, lo que permite mantenerlo
+    abierto en generadores o callbacks que se reanudan en otro contexto.
+    """
+
+    __slots__ = ('traza', 'nombre', 'categoria', 'atributos', 'id', 'padre', 'hilo', 'inicio_ns', '_token')
+
+    def __init__(self, traza: Traza, nombre: str, categoria: str, atributos: Dict[str, Any]):
+        self.traza = traza
+        self.nombre = nombre
+        self.categoria = categoria
+        self.atributos = atributos
+        self.id = traza.nuevo_id()
+        self.padre: Optional[Span] = None
+        self.hilo: Optional[threading.Thread] = None
+        self.inicio_ns = 0
+        self._token = None
+
+    def iniciar(self) -> "Span":
+        """Empieza a medir; el padre es el span abierto en el contexto actual."""
+        padre = _span_actual.get()
+        self.padre = padre if padre is not None and padre.traza is self.traza else None
+        self.hilo = threading.current_thread()
+        self.inicio_ns = time.perf_counter_ns()
+        return self
+
+    def terminar(self, error: Optional[BaseException] = None) -> None:
+        """Deja de medir y registra el span en la traza."""
+        fin_ns = time.perf_counter_ns()
+        if error is not None:
+            self.atributos['error'] = repr(error)
+        self.traza.registrar(self, fin_ns)
+
+    def anotar(self, **atributos: Any) -> None:
+        """Añade atributos al span (visibles en args del evento)."""
+        self.atributos.update(atributos)
+
+    def __enter__(self) -> "Span":
+        self.iniciar()
+        self._token = _span_actual.set(self)
+        return self
+
+    def __exit__(self, tipo, valor, traceback) -> bool:
+        _span_actual.reset(self._token)
+        self.terminar(valor)
+        return False
+
+
+class _SpanNulo:
+    """Span sin efecto, devuelto cuando no hay traza activa."""
+
+    __slots__ = ()
+
+    def iniciar(self) -> "_SpanNulo":
+        return self
+
+    def terminar(self, error: Optional[BaseException] = None) -> None:
+        pass
+
+    def anotar(self, **atributos: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_SpanNulo":
+        return self
+
+    def __exit__(self, tipo, valor, traceback) -> bool:
+        return False
+
+
+_SPAN_NULO = _SpanNulo()
+
+
+def traza_activa() -> Optional[Traza]:
+    """Traza del contexto actual o, si no hay, la global."""
+    return _traza_contexto.get() or _traza_global
+
+
+def span(nombre: str, categoria: str = "rag", **atributos: Any):
+    """
+    Crea un span de la traza activa.
+
+    Args:
+        nombre: Etapa medida ('consulta.recuperacion', 'csv.cargar'...)
+        categoria: Categoría del evento en el visor
+        **atributos: Datos adicionales del span
+
+    Returns:
+        Span, o un span nulo si las trazas están desactivadas
+    """
+    traza = _traza_contexto.get() or _traza_global
+    if traza is None:
+        return _SPAN_NULO
+    return Span(traza, nombre, categoria, atributos)
+
+
+def trazado(nombre: Optional[str] = None, categoria: str = "rag") -> Callable:
+    """
+    Decorador que envuelve cada llamada a la función en un span.
+
+    Args:
+        nombre: Nombre del span (por defecto, el nombre cualificado de la función)
+        categoria: Categoría del evento en el visor
+    """
+    def decorador(func: Callable) -> Callable:
+        etiqueta = nombre or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _traza_contexto.get() is None and _traza_global is None:
+                return func(*args, **kwargs)
+            with span(etiqueta, categoria):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorador
+
+
+@contextmanager
+def trazar(nombre: str = "rag") -> Iterator[Traza]:
+    """
+    Activa una traza en el contexto actual mientras dure el bloque.
+
+    Los hilos y tareas lanzados con en_contexto (o asyncio) la heredan;
+    el resto del proceso no la ve.
+
+    Args:
+        nombre: Nombre de la traza
+
+    Yields:
+        La traza, que sigue siendo exportable al salir del bloque
+    """
+    traza = Traza(nombre)
+    token = _traza_contexto.set(traza)
+    try:
+        yield traza
+    finally:
+        _traza_contexto.reset(token)
+
+
+def activar_trazas(nombre: str = "rag") -> Traza:
+    """
+    Activa una traza global, visible desde todos los hilos del proceso.
+
+    Args:
+        nombre: Nombre de la traza
+
+    Returns:
+        La traza activada
+    """
+    global _traza_global
+    _traza_global = Traza(nombre)
+    return _traza_global
+
+
+def desactivar_trazas() -> Optional[Traza]:
+    """
+    Desactiva la traza global.
+
+    Returns:
+        La traza que estaba activa, o None
+    """
+    global _traza_global
+    traza, _traza_global = _traza_global, None
+    return traza
+
+
+def en_contexto(funcion: Callable) -> Callable:
+    """
+    Envuelve una función para que se ejecute con el contexto actual
+    (traza y span padre) al lanzarla en otro hilo o en un executor.
+
+    Cada llamada usa su propia copia del contexto, así que la función
+    envuelta puede ejecutarse en varios hilos a la vez.
+    """
+    contexto = contextvars.copy_context()
+
+    @wraps(funcion)
+    def wrapper(*args, **kwargs):
+        return contexto.copy().run(funcion, *args, **kwargs)
+    return wrapper
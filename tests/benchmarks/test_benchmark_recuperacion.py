@@ -0,0 +1,103 @@
+# test_benchmark_recuperacion.py
+
+import json
+import shutil
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+from benchmarks.benchmark_recuperacion import calcular_mrr, comparar, cargar_consultas_oro
+
+
+def resultado(recall=0.9, mrr=0.8, p95=0.010, version='1.0'):
+    return {
+        'version_consultas': version,
+        'calidad': {'recall': recall, 'mrr': mrr},
+        'latencia_busqueda': {'p50': p95 / 2, 'p95': p95, 'p99': p95 * 2}
+    }
+
+
+class TestCalcularMrr(unittest.TestCase):
+
+    def test_inverso_de_la_posicion_del_primer_relevante(self):
+        obtenidos = [['a', 'b', 'c'], ['x', 'y', 'a'], ['x', 'a', 'b']]
+        relevantes = [['a'], ['a'], ['a', 'b']]
+        self.assertAlmostEqual(calcular_mrr(obtenidos, relevantes), (1 + 1 / 3 + 1 / 2) / 3)
+
+    def test_sin_relevante_cuenta_cero(self):
+        self.assertEqual(calcular_mrr([['x', 'y'], ['a']], [['a'], ['a']]), 0.5)
+
+    def test_sin_consultas(self):
+        self.assertEqual(calcular_mrr([], []), 0.0)
+
+
+class TestComparar(unittest.TestCase):
+
+    def test_sin_regresiones_dentro_de_tolerancia(self):
+        actual = resultado(recall=0.89, mrr=0.79, p95=0.012)
+        self.assertEqual(comparar(actual, resultado(), 0.02, 0.25), [])
+
+    def test_mejoras_no_son_regresiones(self):
+        actual = resultado(recall=1.0, mrr=1.0, p95=0.001)
+        self.assertEqual(comparar(actual, resultado(), 0.0, 0.0), [])
+
+    def test_caida_de_calidad(self):
+        regresiones = comparar(resultado(recall=0.85, mrr=0.70), resultado(), 0.02, 0.25)
+        self.assertEqual(len(regresiones), 2)
+        self.assertTrue(regresiones[0].startswith('recall'))
+        self.assertTrue(regresiones[1].startswith('mrr'))
+
+    def test_subida_de_latencia(self):
+        regresiones = comparar(resultado(p95=0.013), resultado(), 0.02, 0.25)
+        self.assertEqual(len(regresiones), 1)
+        self.assertIn('p95', regresiones[0])
+
+    def test_latencia_anterior_nula_no_compara(self):
+        self.assertEqual(comparar(resultado(p95=1.0), resultado(p95=0.0), 0.02, 0.25), [])
+
+    def test_avisa_si_cambia_la_version_del_conjunto(self):
+        with self.assertLogs(level='WARNING'):
+            regresiones = comparar(resultado(version='2.0'), resultado(), 0.02, 0.25)
+        self.assertEqual(regresiones, [])
+
+
+class TestCargarConsultasOro(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.ruta_csv = self.test_dir / "clientes.csv"
+        self.ruta_csv.write_text("customer_id,age\n1,30\n", encoding="utf-8")
+        self.huella = hashlib.sha256(self.ruta_csv.read_bytes()).hexdigest()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def escribir_conjunto(self, huella):
+        ruta = self.test_dir / "consultas.json"
+        conjunto = {'version': '0.1', 'csv_sha256': huella,
+                    'consultas': [{'id': 'c1', 'tipo': 'fila', 'consulta': 'cliente 1', 'relevantes': ['1']}]}
+        ruta.write_text(json.dumps(conjunto), encoding="utf-8")
+        return ruta
+
+    def test_conjunto_incluido(self):
+        conjunto = cargar_consultas_oro()
+        self.assertIn('version', conjunto)
+        self.assertTrue(conjunto['consultas'])
+        for consulta in conjunto['consultas']:
+            self.assertTrue(consulta['relevantes'], consulta['id'])
+        self.assertEqual(len({c['id'] for c in conjunto['consultas']}), len(conjunto['consultas']))
+
+    def test_csv_coincidente_no_avisa(self):
+        with self.assertNoLogs(level='WARNING'):
+            conjunto = cargar_consultas_oro(self.escribir_conjunto(self.huella), str(self.ruta_csv))
+        self.assertEqual(conjunto['consultas'][0]['relevantes'], ['1'])
+
+    def test_csv_distinto_avisa(self):
+        with self.assertLogs(level='WARNING') as registro:
+            conjunto = cargar_consultas_oro(self.escribir_conjunto('0' * 64), str(self.ruta_csv))
+        self.assertIn('0.1', registro.output[0])
+        self.assertEqual(conjunto['version'], '0.1')
+
+
+if __name__ == '__main__':
+    unittest.main()
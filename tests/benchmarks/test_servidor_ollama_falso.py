@@ -0,0 +1,122 @@
+# test_servidor_ollama_falso.py
+
+import json
+import asyncio
+import unittest
+import aiohttp
+from model.cliente_ollama import ClienteOllamaAsync
+from benchmarks.servidor_ollama_falso import ServidorOllamaFalso
+
+
+class TestServidorOllamaFalso(unittest.TestCase):
+
+    def setUp(self):
+        self.servidor = ServidorOllamaFalso(
+            tiempo_primer_token=0.01, retardo_por_token=0.001, tokens_respuesta=8
+        ).iniciar()
+
+    def tearDown(self):
+        self.servidor.detener()
+
+    def generate(self, cuerpo):
+        """Lanza /api/generate y retorna los objetos JSON recibidos, uno por línea."""
+        async def peticion():
+            async with aiohttp.ClientSession() as sesion:
+                async with sesion.post(f"{self.servidor.url}/api/generate", json=cuerpo) as respuesta:
+                    self.assertEqual(respuesta.status, 200)
+                    return [json.loads(linea) for linea in (await respuesta.text()).splitlines() if linea]
+
+        return asyncio.run(peticion())
+
+    def test_escucha_en_puerto_libre(self):
+        self.assertNotEqual(self.servidor.puerto, 0)
+        self.assertTrue(self.servidor.url.endswith(f":{self.servidor.puerto}"))
+
+    def test_tokens_deterministas(self):
+        self.assertEqual(self.servidor.tokens_para("hola"), self.servidor.tokens_para("hola"))
+        self.assertNotEqual(self.servidor.tokens_para("hola"), self.servidor.tokens_para("adiós"))
+        self.assertEqual(len(self.servidor.tokens_para("hola")), 8)
+        self.assertEqual(len(self.servidor.tokens_para("hola", 3)), 3)
+        # num_predict no amplía la respuesta por encima de tokens_respuesta
+        self.assertEqual(len(self.servidor.tokens_para("hola", 100)), 8)
+
+    def test_generate_sin_streaming(self):
+        respuesta, = self.generate({'model': "llama3.2", 'prompt': "hola qué tal", 'stream': False,
+                                    'options': {'num_predict': 5}})
+
+        self.assertTrue(respuesta['done'])
+        self.assertEqual(respuesta['model'], "llama3.2")
+        self.assertEqual(respuesta['response'], "".join(self.servidor.tokens_para("hola qué tal", 5)))
+        self.assertEqual(respuesta['eval_count'], 5)
+        self.assertEqual(respuesta['prompt_eval_count'], 3)
+        self.assertEqual(respuesta['eval_duration'], int(0.001 * 4 * 1e9))
+        self.assertGreaterEqual(respuesta['total_duration'], int(0.014 * 1e9))
+
+    def test_generate_con_streaming(self):
+        partes = self.generate({'model': "llama3.2", 'prompt': "hola", 'options': {'num_predict': 4}})
+
+        self.assertEqual(len(partes), 5)
+        self.assertEqual([p['response'] for p in partes[:-1]], self.servidor.tokens_para("hola", 4))
+        self.assertFalse(any(p['done'] for p in partes[:-1]))
+        final = partes[-1]
+        self.assertTrue(final['done'])
+        self.assertEqual(final['response'], "")
+        self.assertEqual(final['done_reason'], "stop")
+        self.assertEqual(final['eval_count'], 4)
+        self.assertEqual(final['prompt_eval_count'], 1)
+
+    def test_generate_sin_num_predict(self):
+        respuesta, = self.generate({'prompt': "hola", 'stream': False})
+        self.assertEqual(respuesta['eval_count'], 8)
+        self.assertEqual(respuesta['model'], self.servidor.modelo)
+
+    def test_estadisticas(self):
+        async def prueba(cliente):
+            return await asyncio.gather(*(cliente.generar("llama3.2", f"p{i}") for i in range(4)))
+
+        self.servidor.reiniciar_estadisticas()
+        self.ejecutar_cliente(prueba)
+        estadisticas = self.servidor.estadisticas()
+
+        self.assertEqual(estadisticas['peticiones'], 4)
+        self.assertGreaterEqual(estadisticas['max_en_curso'], 2)
+        self.assertGreater(estadisticas['segundos_generando'], 0)
+
+        self.servidor.reiniciar_estadisticas()
+        self.assertEqual(self.servidor.estadisticas()['peticiones'], 0)
+        self.assertEqual(self.servidor.estadisticas()['segundos_generando'], 0.0)
+
+    def test_cliente_ollama(self):
+        async def prueba(cliente):
+            completa = await cliente.generar("llama3.2", "hola", {'num_predict': 5})
+            partes = [parte async for parte in cliente.generar_stream("llama3.2", "hola", {'num_predict': 5})]
+            return completa, partes
+
+        completa, partes = self.ejecutar_cliente(prueba)
+
+        self.assertEqual(completa['response'], "".join(self.servidor.tokens_para("hola", 5)))
+        self.assertEqual("".join(p['response'] for p in partes), completa['response'])
+        self.assertEqual(len(partes), 6)
+        self.assertEqual(partes[-1]['eval_count'], 5)
+        self.assertEqual(self.servidor.estadisticas()['peticiones'], 2)
+
+    def test_tiempos_negativos(self):
+        with self.assertRaises(ValueError):
+            ServidorOllamaFalso(retardo_por_token=-1)
+        with self.assertRaises(ValueError):
+            ServidorOllamaFalso(tokens_respuesta=0)
+
+    def ejecutar_cliente(self, funcion):
+        cliente = ClienteOllamaAsync(base_url=self.servidor.url, max_conexiones=4)
+
+        async def envoltorio():
+            try:
+                return await funcion(cliente)
+            finally:
+                await cliente.cerrar()
+
+        return asyncio.run(envoltorio())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Los módulos de src se importan entre sí como paquetes de primer nivel
+# (utils, features, model), igual que al ejecutar main.py o app.py desde src.
+# Los tests los importan igual para no cargar una segunda copia como src.X.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,101 @@
+# test_cache_embeddings.py
+
+import unittest
+import tempfile
+import shutil
+from features.cache_embeddings import CacheEmbeddings
+
+
+class TestCacheEmbeddings(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_guardar_y_obtener(self):
+        cache = CacheEmbeddings(self.test_dir, "modelo/test", max_entradas=10)
+        cache.guardar(["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+
+        resultado = cache.obtener(["a", "c", "b"])
+
+        self.assertEqual(resultado, [[1.0, 2.0], None, [3.0, 4.0]])
+        self.assertEqual(cache.estadisticas()['aciertos'], 2)
+        self.assertEqual(cache.estadisticas()['fallos'], 1)
+
+    def test_persistencia_entre_instancias(self):
+        cache = CacheEmbeddings(self.test_dir, "modelo", max_entradas=10)
+        cache.guardar(["texto"], [[0.5, 0.25, 0.125]])
+        cache.persistir()
+
+        recargada = CacheEmbeddings(self.test_dir, "modelo", max_entradas=10)
+        self.assertEqual(recargada.obtener(["texto"]), [[0.5, 0.25, 0.125]])
+
+    def test_clave_depende_del_modelo(self):
+        cache = CacheEmbeddings(self.test_dir, "modelo-a", max_entradas=10)
+        cache.guardar(["texto"], [[1.0]])
+        cache.persistir()
+
+        otra = CacheEmbeddings(self.test_dir, "modelo-b", max_entradas=10)
+        self.assertEqual(otra.obtener(["texto"]), [None])
+
+    def test_expulsion_lru(self):
+        cache = CacheEmbeddings(self.test_dir, "modelo", max_entradas=2)
+        cache.guardar(["a", "b"], [[1.0], [2.0]])
+        cache.obtener(["a"])  # "b" pasa a ser la menos usada
+        cache.guardar(["c"], [[3.0]])
+
+        self.assertEqual(cache.obtener(["a", "b", "c"]), [[1.0], None, [3.0]])
+        self.assertEqual(cache.estadisticas()['entradas'], 2)
+
+    def test_dimension_invalida(self):
+        cache = CacheEmbeddings(self.test_dir, "modelo", max_entradas=2)
+        cache.guardar(["a"], [[1.0, 2.0]])
+        with self.assertRaises(ValueError):
+            cache.guardar(["b"], [[1.0]])
+
+    def test_posicion_reutilizada_sin_persistir(self):
+        cache = CacheEmbeddings(self.test_dir, "modelo", max_entradas=1)
+        cache.guardar(["a"], [[1.0, 1.0]])
+        cache.persistir()
+        # "b" ocupa la posición de "a"; el índice en disco sigue apuntando a "a"
+        cache.guardar(["b"], [[2.0, 2.0]])
+
+        otra = CacheEmbeddings(self.test_dir, "modelo", max_entradas=1)
+        self.assertEqual(otra.obtener(["a"]), [None])
+        self.assertEqual(otra.estadisticas()['entradas'], 0)
+
+    def test_un_solo_escritor(self):
+        escritora = CacheEmbeddings(self.test_dir, "modelo", max_entradas=10)
+        escritora.guardar(["a"], [[1.0]])
+        escritora.persistir()
+
+        lectora = CacheEmbeddings(self.test_dir, "modelo", max_entradas=10)
+        self.assertTrue(lectora.solo_lectura)
+        lectora.guardar(["b"], [[2.0]])
+        self.assertEqual(lectora.obtener(["a", "b"]), [[1.0], None])
+
+        escritora.cerrar()
+        self.assertTrue(escritora.solo_lectura)
+        self.assertFalse(CacheEmbeddings(self.test_dir, "modelo", max_entradas=10).solo_lectura)
+
+    def test_lectora_pasa_a_escribir_al_cerrar_la_escritora(self):
+        escritora = CacheEmbeddings(self.test_dir, "modelo", max_entradas=10)
+        lectora = CacheEmbeddings(self.test_dir, "modelo", max_entradas=10)
+        escritora.guardar(["a"], [[1.0]])
+        escritora.cerrar()
+
+        # Toma el bloqueo en el siguiente guardar() y recarga lo que dejó la escritora
+        lectora.guardar(["b"], [[2.0]])
+        self.assertFalse(lectora.solo_lectura)
+        self.assertEqual(lectora.obtener(["a", "b"]), [[1.0], [2.0]])
+        lectora.cerrar()
+
+        self.assertEqual(
+            CacheEmbeddings(self.test_dir, "modelo", max_entradas=10).obtener(["a", "b"]), [[1.0], [2.0]]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# test_cache_respuestas.py
+
+import unittest
+from unittest.mock import patch
+from features.cache_respuestas import CacheSemanticoRespuestas
+
+
+class TestCacheSemanticoRespuestas(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = CacheSemanticoRespuestas(umbral_similitud=0.9, max_entradas=2, ttl_segundos=60)
+        self.resultado = {'respuesta': "Respuesta", 'documentos_fuente': [], 'metadatos': {}}
+
+    def test_acierto_por_similitud(self):
+        self.cache.guardar([1.0, 0.0], (0.7, 500), "v1", self.resultado)
+
+        resultado = self.cache.buscar([0.99, 0.05], (0.7, 500), "v1")
+
+        self.assertEqual(resultado['respuesta'], "Respuesta")
+        self.assertTrue(resultado['metadatos']['cache_respuesta'])
+        self.assertGreater(resultado['metadatos']['similitud_cache'], 0.9)
+        self.assertEqual(self.cache.estadisticas()['aciertos'], 1)
+
+    def test_fallo_bajo_umbral(self):
+        self.cache.guardar([1.0, 0.0], (0.7, 500), "v1", self.resultado)
+        self.assertIsNone(self.cache.buscar([0.0, 1.0], (0.7, 500), "v1"))
+        self.assertEqual(self.cache.estadisticas()['fallos'], 1)
+
+    def test_configuracion_distinta_no_acierta(self):
+        self.cache.guardar([1.0, 0.0], (0.7, 500), "v1", self.resultado)
+        self.assertIsNone(self.cache.buscar([1.0, 0.0], (0.2, 500), "v1"))
+
+    def test_cambio_de_version_invalida(self):
+        self.cache.guardar([1.0, 0.0], (0.7, 500), "v1", self.resultado)
+        self.assertIsNone(self.cache.buscar([1.0, 0.0], (0.7, 500), "v2"))
+        self.assertEqual(self.cache.estadisticas()['entradas'], 0)
+        self.assertEqual(self.cache.estadisticas()['invalidaciones'], 1)
+
+    def test_expulsion_lru(self):
+        self.cache.guardar([1.0, 0.0, 0.0], (0.7, 500), "v1", dict(self.resultado, respuesta="a"))
+        self.cache.guardar([0.0, 1.0, 0.0], (0.7, 500), "v1", dict(self.resultado, respuesta="b"))
+        self.cache.buscar([1.0, 0.0, 0.0], (0.7, 500), "v1")  # "b" pasa a ser la menos usada
+        self.cache.guardar([0.0, 0.0, 1.0], (0.7, 500), "v1", dict(self.resultado, respuesta="c"))
+
+        self.assertIsNone(self.cache.buscar([0.0, 1.0, 0.0], (0.7, 500), "v1"))
+        self.assertEqual(self.cache.buscar([1.0, 0.0, 0.0], (0.7, 500), "v1")['respuesta'], "a")
+        self.assertEqual(self.cache.estadisticas()['expulsiones'], 1)
+
+    @patch('features.cache_respuestas.time.monotonic')
+    def test_caducidad_ttl(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        self.cache.guardar([1.0, 0.0], (0.7, 500), "v1", self.resultado)
+
+        mock_monotonic.return_value = 161.0
+        self.assertIsNone(self.cache.buscar([1.0, 0.0], (0.7, 500), "v1"))
+
+    def test_resultado_devuelto_es_copia(self):
+        self.cache.guardar([1.0, 0.0], (0.7, 500), "v1", self.resultado)
+        self.cache.buscar([1.0, 0.0], (0.7, 500), "v1")['respuesta'] = "modificada"
+        self.assertEqual(self.cache.buscar([1.0, 0.0], (0.7, 500), "v1")['respuesta'], "Respuesta")
+
+if __name__ == '__main__':
+    unittest.main()
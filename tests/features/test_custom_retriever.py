@@ -3,7 +3,7 @@
 import unittest
 from unittest.mock import Mock, AsyncMock
 import asyncio
-from src.features.custom_retriever import CustomRetriever
+from features.custom_retriever import CustomRetriever
 from langchain_core.documents import Document
 
 class TestCustomRetriever(unittest.TestCase):
@@ -0,0 +1,41 @@
+# test_empaquetador_filas.py
+
+import unittest
+import pandas as pd
+from features.empaquetador_filas import EmpaquetadorFilas
+
+
+class TestEmpaquetadorFilas(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'customer_id': [11, 12, 13, 14, 15],
+            'country': ['France', 'Spain', 'France', 'Germany', 'Spain'],
+            'balance': [0.0, 100.5, 2000.25, 50.0, 75.75]
+        })
+
+    def test_empaqueta_n_filas_con_cabecera(self):
+        chunks = EmpaquetadorFilas(filas_por_chunk=2).empaquetar(self.df)
+
+        self.assertEqual([id_chunk for id_chunk, _ in chunks], ["11..12", "13..14", "15"])
+        primero = chunks[0][1]
+        self.assertEqual(primero.page_content, "customer_id,country,balance\n11,France,0.0\n12,Spain,100.5")
+        self.assertEqual(primero.metadata['claves'], "11,12")
+        self.assertEqual(primero.metadata['filas'], 2)
+
+    def test_presupuesto_de_caracteres(self):
+        chunks = EmpaquetadorFilas(filas_por_chunk=5, max_caracteres=60).empaquetar(self.df)
+
+        self.assertTrue(all(len(doc.page_content) <= 60 for _, doc in chunks))
+        self.assertEqual(sum(doc.metadata['filas'] for _, doc in chunks), 5)
+
+    def test_fila_mayor_que_el_presupuesto(self):
+        chunks = EmpaquetadorFilas(filas_por_chunk=3, max_caracteres=10).empaquetar(self.df)
+        self.assertEqual(len(chunks), 5)
+
+    def test_columna_id_ausente(self):
+        with self.assertRaises(ValueError):
+            EmpaquetadorFilas(columna_id="id").empaquetar(self.df)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+# test_enrutador_consultas.py
+
+import os
+import unittest
+import pandas as pd
+from features.gestor_clientes import GestorClientes
+from features.enrutador_consultas import EnrutadorConsultas
+
+RUTA_CSV = os.path.join(os.path.dirname(__file__), "..", "resources", "test_csv", "BankCustomerChurnPrediction.csv")
+
+
+class TestEnrutadorConsultas(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_csv(RUTA_CSV)
+
+    def setUp(self):
+        self.enrutador = EnrutadorConsultas(GestorClientes(self.df))
+
+    def test_agregado_por_dimension(self):
+        resultado = self.enrutador.responder("tasa de deserción por país")
+
+        datos = resultado['metadatos']['datos']
+        esperado = self.df.groupby('country')['churn'].mean() * 100
+        self.assertEqual(resultado['metadatos']['ruta'], 'agregado')
+        self.assertAlmostEqual(datos['grupos']['Germany'], esperado['Germany'])
+        self.assertAlmostEqual(datos['valor'], self.df['churn'].mean() * 100)
+        self.assertIn("Germany", resultado['respuesta'])
+
+    def test_agregado_filtrado(self):
+        resultado = self.enrutador.responder("balance promedio de clientes activos")
+
+        datos = resultado['metadatos']['datos']
+        activos = self.df[self.df['active_member'] == 1]
+        self.assertEqual(datos['campo'], 'balance')
+        self.assertAlmostEqual(datos['valor'], activos['balance'].mean())
+        self.assertAlmostEqual(datos['valor_global'], self.df['balance'].mean())
+
+    def test_agrupacion_por_rango_de_edad(self):
+        decision = self.enrutador.enrutar("churn rate by age group")
+        self.assertEqual((decision['metrica'], decision['agrupacion']), ('tasa', 'rango_edad'))
+
+    def test_filtro(self):
+        resultado = self.enrutador.responder("clientes de España inactivos")
+
+        esperado = ((self.df['country'] == 'Spain') & (self.df['active_member'] == 0)).sum()
+        self.assertEqual(resultado['metadatos']['ruta'], 'filtro')
+        self.assertEqual(resultado['metadatos']['datos']['clientes'], esperado)
+
+    def test_id_cliente(self):
+        resultado = self.enrutador.responder("información del cliente 15634602")
+
+        self.assertEqual(resultado['metadatos']['ruta'], 'id_cliente')
+        self.assertEqual(resultado['metadatos']['datos']['credit_score'], 619)
+
+    def test_id_cliente_tras_cambiar_customer_id(self):
+        self.assertTrue(self.enrutador.gestor.actualizar_cliente(15634602, {'customer_id': 99999999}))
+
+        decision = self.enrutador.enrutar("información del cliente 99999999")
+        self.assertEqual(decision, {'ruta': 'id_cliente', 'customer_id': 99999999})
+        resultado = self.enrutador.responder("información del cliente 99999999")
+        self.assertEqual(resultado['metadatos']['datos']['credit_score'], 619)
+        self.assertNotEqual(self.enrutador.enrutar("información del cliente 15634602")['ruta'], 'id_cliente')
+
+    def test_preguntas_abiertas_van_al_llm(self):
+        for consulta in (
+                "¿Cuáles son los factores más comunes de deserción?",
+                "¿Cómo influye el credit score en la deserción?",
+                "¿Qué relación hay entre el balance y la retención?"
+        ):
+            self.assertIsNone(self.enrutador.responder(consulta), consulta)
+
+    def test_explicativas_con_metrica_o_cliente_van_al_llm(self):
+        for consulta in (
+                "¿Por qué la tasa de abandono es mayor en Alemania?",
+                "¿Por qué se fue el cliente 15634602?"
+        ):
+            self.assertEqual(self.enrutador.enrutar(consulta), {'ruta': 'abierta'}, consulta)
+            self.assertIsNone(self.enrutador.responder(consulta), consulta)
+
+    def test_como_maximo_y_como_minimo_son_predicados(self):
+        decision = self.enrutador.enrutar("clientes con como máximo 2 productos")
+        self.assertEqual(decision['ruta'], 'filtro')
+        self.assertEqual(decision['filtros'], [
+            {'columna': 'products_number', 'operador': '<=', 'valor': 2.0}
+        ])
+
+        decision = self.enrutador.enrutar("cuántos clientes tienen como mínimo 3 productos")
+        self.assertEqual((decision['ruta'], decision['metrica']), ('agregado', 'conteo'))
+        self.assertEqual(decision['filtros'], [
+            {'columna': 'products_number', 'operador': '>=', 'valor': 3.0}
+        ])
+
+        decision = self.enrutador.enrutar("balance promedio de clientes como máximo de 30 años")
+        self.assertEqual(
+            (decision['ruta'], decision['metrica'], decision['campo']), ('agregado', 'mean', 'balance')
+        )
+        self.assertEqual(decision['filtros'], [{'columna': 'age', 'operador': '<=', 'valor': 30.0}])
+
+        resultado = self.enrutador.responder("clientes de Francia con como mínimo 3 productos")
+        esperado = ((self.df['country'] == 'France') & (self.df['products_number'] >= 3)).sum()
+        self.assertEqual(resultado['metadatos']['ruta'], 'filtro')
+        self.assertEqual(resultado['metadatos']['datos']['clientes'], esperado)
+
+    def test_recomendaciones_van_al_llm(self):
+        self.assertEqual(self.enrutador.enrutar("¿Qué recomendaciones das para los clientes inactivos?"),
+                         {'ruta': 'abierta'})
+
+    def test_estadisticas(self):
+        self.enrutador.responder("tasa de deserción por país")
+        self.enrutador.responder("¿Cómo influye el credit score en la deserción?")
+
+        estadisticas = self.enrutador.estadisticas()
+        self.assertEqual(estadisticas['agregado']['consultas'], 1)
+        self.assertEqual(estadisticas['abierta']['consultas'], 1)
+        self.assertGreater(estadisticas['agregado']['latencia_media_ms'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# test_extractor_predicados.py
+
+import os
+import unittest
+import pandas as pd
+from features.extractor_predicados import ExtractorPredicados, convertir_numero
+
+RUTA_CSV = os.path.join(os.path.dirname(__file__), "..", "resources", "test_csv", "BankCustomerChurnPrediction.csv")
+
+
+class TestExtractorPredicados(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_csv(RUTA_CSV)
+        cls.extractor = ExtractorPredicados(cls.df)
+
+    def test_pais_y_comparacion(self):
+        filtros = self.extractor.extraer("clientes de Francia con balance mayor de 100.000")
+
+        self.assertIn({'columna': 'country', 'operador': 'en', 'valor': ['France']}, filtros)
+        self.assertIn({'columna': 'balance', 'operador': '>', 'valor': 100000.0}, filtros)
+        mascara = ExtractorPredicados.aplicar(self.df, filtros)
+        esperado = (self.df['country'] == 'France') & (self.df['balance'] > 100000)
+        self.assertTrue(mascara.equals(esperado))
+
+    def test_operador_antes_del_campo(self):
+        filtros = self.extractor.extraer("balance de clientes con más de 2 productos")
+        self.assertEqual(filtros, [{'columna': 'products_number', 'operador': '>', 'valor': 2.0}])
+
+    def test_edad_con_anos_explicitos(self):
+        filtros = self.extractor.extraer("balance promedio de clientes como máximo de 30 años")
+        self.assertEqual(filtros, [{'columna': 'age', 'operador': '<=', 'valor': 30.0}])
+
+        # Los años de antigüedad no son una edad
+        filtros = self.extractor.extraer("clientes mayores de 60 con más de 5 años de antigüedad")
+        self.assertEqual(filtros, [{'columna': 'age', 'operador': '>', 'valor': 60.0}])
+
+    def test_rango_genero_y_actividad(self):
+        filtros = self.extractor.extraer("mujeres inactivas con credit score entre 700 y 600")
+
+        self.assertIn({'columna': 'credit_score', 'operador': 'entre', 'valor': (600.0, 700.0)}, filtros)
+        self.assertIn({'columna': 'gender', 'operador': '==', 'valor': 'Female'}, filtros)
+        self.assertIn({'columna': 'active_member', 'operador': '==', 'valor': 0}, filtros)
+
+    def test_ingles(self):
+        filtros = self.extractor.extraer("customers in Germany with salary over 50k who churned")
+
+        self.assertIn({'columna': 'estimated_salary', 'operador': '>', 'valor': 50000.0}, filtros)
+        self.assertIn({'columna': 'churn', 'operador': '==', 'valor': 1}, filtros)
+
+    def test_id_cliente(self):
+        self.assertEqual(self.extractor.extraer_id_cliente("datos del cliente 15634602"), 15634602)
+        self.assertIsNone(self.extractor.extraer_id_cliente("datos del cliente 12345678"))
+        self.assertEqual(self.extractor.extraer("datos del cliente 15634602"), [])
+
+    def test_a_filtro_where(self):
+        filtros = [
+            {'columna': 'country', 'operador': 'en', 'valor': ['Spain']},
+            {'columna': 'products_number', 'operador': '>', 'valor': 2.0},
+            {'columna': 'age', 'operador': 'entre', 'valor': (30.0, 40.0)}
+        ]
+        self.assertEqual(ExtractorPredicados.a_filtro_where(filtros), {'$and': [
+            {'country': {'$in': ['Spain']}},
+            {'products_number': {'$gt': 2.0}},
+            {'age': {'$gte': 30.0}},
+            {'age': {'$lte': 40.0}}
+        ]})
+        self.assertEqual(ExtractorPredicados.a_filtro_where(filtros[1:2]), {'products_number': {'$gt': 2.0}})
+        self.assertIsNone(ExtractorPredicados.a_filtro_where([]))
+
+    def test_convertir_numero(self):
+        self.assertEqual(convertir_numero("100,000"), 100000.0)
+        self.assertEqual(convertir_numero("2,5"), 2.5)
+        self.assertEqual(convertir_numero("50", "mil"), 50000.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+# test_gestor_clientes.py
+
+import os
+import unittest
+import numpy as np
+import pandas as pd
+from features.gestor_clientes import GestorClientes
+
+RUTA_CSV = os.path.join(os.path.dirname(__file__), "..", "resources", "test_csv", "BankCustomerChurnPrediction.csv")
+
+
+class TestGestorClientes(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_csv(RUTA_CSV)
+
+    def setUp(self):
+        self.gestor = GestorClientes(self.df)
+
+    def test_estadisticas_cliente(self):
+        fila = self.df.iloc[1]
+        stats = self.gestor.obtener_estadisticas_cliente(int(fila['customer_id']))
+
+        self.assertEqual(stats['credit_score'], fila['credit_score'])
+        self.assertAlmostEqual(stats['balance'], fila['balance'])
+        self.assertEqual(stats['products_number'], fila['products_number'])
+        self.assertEqual(stats['is_active'], bool(fila['active_member']))
+        self.assertIsNone(self.gestor.obtener_estadisticas_cliente(-1))
+        self.assertIsNone(self.gestor.obtener_estadisticas_cliente("no es un id"))
+
+    def test_estadisticas_clientes_en_lote(self):
+        ids = self.df['customer_id'].sample(500, random_state=0).tolist() + [-1]
+        stats = self.gestor.obtener_estadisticas_clientes(ids)
+
+        self.assertEqual(list(stats.index), ids[:-1])
+        self.assertEqual(stats.index.name, 'customer_id')
+        for customer_id in ids[:20]:
+            esperado = self.gestor.obtener_estadisticas_cliente(customer_id)
+            self.assertEqual(stats.loc[customer_id].to_dict(), esperado)
+
+        self.assertTrue(self.gestor.obtener_estadisticas_clientes([]).empty)
+
+    def test_obtener_cliente(self):
+        fila = self.df.iloc[3]
+        datos = self.gestor.obtener_cliente(int(fila['customer_id']))
+
+        self.assertEqual(datos['country'], fila['country'])
+        self.assertEqual(datos['age'], fila['age'])
+        self.assertIsInstance(datos['balance'], float)
+        self.assertIsNone(self.gestor.obtener_cliente(-1))
+
+    def test_existe_cliente(self):
+        customer_id = int(self.df['customer_id'].iloc[2])
+        self.assertTrue(self.gestor.existe_cliente(customer_id))
+        self.assertFalse(self.gestor.existe_cliente(-1))
+
+        self.gestor.actualizar_cliente(customer_id, {'customer_id': 99999999})
+        self.assertFalse(self.gestor.existe_cliente(customer_id))
+        self.assertTrue(self.gestor.existe_cliente(99999999))
+
+    def test_instantanea_compartida_hasta_actualizar(self):
+        instantanea = self.gestor.obtener_instantanea()
+        self.assertIs(self.gestor.obtener_instantanea(), instantanea)
+
+        customer_id = int(self.df['customer_id'].iloc[0])
+        self.gestor.actualizar_cliente(customer_id, {'credit_score': 801})
+        actualizada = self.gestor.obtener_instantanea()
+        self.assertIsNot(actualizada, instantanea)
+        self.assertEqual(actualizada['credit_score'].iloc[0], 801)
+        self.assertEqual(instantanea['credit_score'].iloc[0], self.df['credit_score'].iloc[0])
+
+    def test_niveles_de_riesgo_vectorizados(self):
+        credit_scores = np.array([800, 750, 700, 700, 600, 599])
+        balances = np.array([0.0, 10.0, 10.0, 0.0, 1.0, 5000.0])
+        esperado = [
+            self.gestor._calcular_nivel_riesgo(c, b) for c, b in zip(credit_scores, balances)
+        ]
+        self.assertEqual(list(self.gestor._calcular_niveles_riesgo(credit_scores, balances)), esperado)
+
+    def test_indice_tras_cambiar_customer_id(self):
+        antiguo = self.df['customer_id'].iloc[5]
+        nuevo = np.int64(99999999)
+        self.assertTrue(self.gestor.actualizar_cliente(antiguo, {'customer_id': nuevo}))
+
+        self.assertIsNone(self.gestor.obtener_estadisticas_cliente(antiguo))
+        stats = self.gestor.obtener_estadisticas_cliente(nuevo)
+        self.assertEqual(stats['credit_score'], self.df['credit_score'].iloc[5])
+
+        # No se puede reutilizar el ID de otro cliente
+        otro = self.df['customer_id'].iloc[6]
+        self.assertFalse(self.gestor.actualizar_cliente(nuevo, {'customer_id': otro}))
+
+    def test_actualizar_cliente_no_existente(self):
+        self.assertFalse(self.gestor.actualizar_cliente(-1, {'credit_score': np.int64(700)}))
+
+    def test_actualizar_cliente_con_tipos_de_python(self):
+        customer_id = int(self.df['customer_id'].iloc[0])
+        self.assertTrue(self.gestor.actualizar_cliente(customer_id, {'credit_score': 700, 'balance': 1500.5}))
+        self.assertFalse(self.gestor.actualizar_cliente(customer_id, {'credit_score': "700"}))
+        self.assertFalse(self.gestor.actualizar_cliente(customer_id, {'balance': True}))
+
+        stats = self.gestor.obtener_estadisticas_cliente(customer_id)
+        self.assertEqual(stats['credit_score'], 700)
+        self.assertAlmostEqual(stats['balance'], 1500.5)
+
+    def test_actualizar_clientes_lote_dataframe(self):
+        ids = self.df['customer_id'].iloc[:1000]
+        cambios = pd.DataFrame({'customer_id': ids, 'balance': np.arange(1000, dtype=float)})
+        resultado = self.gestor.actualizar_clientes_lote(cambios)
+
+        self.assertTrue(resultado['exito'].all())
+        self.assertTrue(resultado['motivo'].isna().all())
+        df = self.gestor.obtener_dataframe()
+        np.testing.assert_array_equal(df['balance'].iloc[:1000].to_numpy(), np.arange(1000, dtype=float))
+        self.assertEqual(df['balance'].dtype, self.df['balance'].dtype)
+        pd.testing.assert_series_equal(df['balance'].iloc[1000:], self.df['balance'].iloc[1000:])
+
+    def test_actualizar_clientes_lote_registros(self):
+        ids = self.df['customer_id'].iloc[:4].tolist()
+        cambios = [
+            {'customer_id': ids[0], 'credit_score': 710},
+            {'customer_id': ids[1], 'balance': 20.0},
+            {'customer_id': ids[2], 'credit_score': "alto", 'balance': 30.0},
+            {'customer_id': -1, 'credit_score': 500},
+            {'customer_id': ids[3], 'products_number': 2},
+            {'customer_id': ids[3], 'products_number': 3},
+        ]
+        resultado = self.gestor.actualizar_clientes_lote(cambios)
+
+        self.assertEqual(resultado['exito'].tolist(), [True, True, False, False, False, False])
+        self.assertEqual(resultado['motivo'].iloc[2], "tipo inválido para credit_score")
+        self.assertEqual(resultado['motivo'].iloc[3], "cliente no encontrado")
+        self.assertEqual(resultado['motivo'].iloc[4], "customer_id repetido en el lote")
+
+        df = self.gestor.obtener_dataframe()
+        self.assertEqual(df['credit_score'].iloc[0], 710)
+        self.assertEqual(df['balance'].iloc[0], self.df['balance'].iloc[0])
+        self.assertEqual(df['balance'].iloc[1], 20.0)
+        self.assertEqual(df['credit_score'].iloc[1], self.df['credit_score'].iloc[1])
+        # Una fila con un valor inválido no se aplica en parte
+        self.assertEqual(df['balance'].iloc[2], self.df['balance'].iloc[2])
+        self.assertEqual(df['credit_score'].dtype, self.df['credit_score'].dtype)
+
+    def test_actualizar_clientes_lote_errores(self):
+        self.assertTrue(self.gestor.actualizar_clientes_lote([]).empty)
+        with self.assertRaises(ValueError):
+            self.gestor.actualizar_clientes_lote([{'balance': 1.0}])
+        with self.assertRaises(ValueError):
+            self.gestor.actualizar_clientes_lote([{'customer_id': 1, 'saldo': 1.0}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# test_manifiesto_indice.py
+
+import unittest
+import tempfile
+import shutil
+from langchain_core.documents import Document
+from features.manifiesto_indice import ManifiestoIndice
+
+
+class TestManifiestoIndice(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.manifiesto = ManifiestoIndice(self.test_dir)
+        self.configuracion = {'modelo_embeddings': 'test', 'chunk_size': 1000}
+        self.documentos = {
+            "1": Document(page_content="customer_id: 1\nbalance: 10", metadata={"source": "1"}),
+            "2": Document(page_content="customer_id: 2\nbalance: 20", metadata={"source": "2"}),
+            "3": Document(page_content="customer_id: 3\nbalance: 30", metadata={"source": "3"})
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _guardar_estado_inicial(self):
+        cambios = self.manifiesto.calcular_cambios(self.documentos, self.configuracion)
+        self.manifiesto.guardar(cambios['huellas'], self.configuracion)
+
+    def test_sin_manifiesto_reconstruye(self):
+        cambios = self.manifiesto.calcular_cambios(self.documentos, self.configuracion)
+        self.assertTrue(cambios['reconstruir'])
+        self.assertEqual(sorted(cambios['nuevos']), ["1", "2", "3"])
+
+    def test_sin_cambios(self):
+        self._guardar_estado_inicial()
+        cambios = self.manifiesto.calcular_cambios(self.documentos, self.configuracion)
+        self.assertFalse(cambios['reconstruir'])
+        self.assertEqual(cambios['nuevos'], [])
+        self.assertEqual(cambios['modificados'], [])
+        self.assertEqual(cambios['eliminados'], [])
+
+    def test_detecta_nuevos_modificados_y_eliminados(self):
+        self._guardar_estado_inicial()
+        documentos = dict(self.documentos)
+        documentos["2"] = Document(page_content="customer_id: 2\nbalance: 25", metadata={"source": "2"})
+        del documentos["3"]
+        documentos["4"] = Document(page_content="customer_id: 4\nbalance: 40", metadata={"source": "4"})
+
+        cambios = self.manifiesto.calcular_cambios(documentos, self.configuracion)
+
+        self.assertFalse(cambios['reconstruir'])
+        self.assertEqual(cambios['nuevos'], ["4"])
+        self.assertEqual(cambios['modificados'], ["2"])
+        self.assertEqual(cambios['eliminados'], ["3"])
+
+    def test_cambio_de_configuracion_reconstruye(self):
+        self._guardar_estado_inicial()
+        configuracion = dict(self.configuracion, chunk_size=500)
+        cambios = self.manifiesto.calcular_cambios(self.documentos, configuracion)
+        self.assertTrue(cambios['reconstruir'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# test_pipeline_embeddings.py
+
+import unittest
+import tempfile
+import shutil
+from unittest.mock import Mock
+from langchain_core.documents import Document
+from features.pipeline_embeddings import PipelineEmbeddings
+from features.cache_embeddings import CacheEmbeddings
+
+
+class TestPipelineEmbeddings(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_embeddings = Mock()
+        self.mock_embeddings.embed_documents.side_effect = lambda textos: [[float(len(t))] for t in textos]
+        self.escritos = []
+        self.documentos = [(str(i), Document(page_content="x" * i)) for i in range(1, 11)]
+
+    def _escritor(self, ids, vectores, documentos):
+        self.escritos.append((ids, vectores))
+
+    def test_ejecutar_por_lotes(self):
+        pipeline = PipelineEmbeddings(self.mock_embeddings, self._escritor, tamano_lote=4)
+        estadisticas = pipeline.ejecutar(iter(self.documentos))
+
+        self.assertEqual(estadisticas['documentos'], 10)
+        self.assertEqual(estadisticas['lotes'], 3)
+        self.assertEqual([len(ids) for ids, _ in self.escritos], [4, 4, 2])
+        self.assertEqual(self.escritos[0], (["1", "2", "3", "4"], [[1.0], [2.0], [3.0], [4.0]]))
+        self.assertGreater(estadisticas['docs_por_segundo'], 0)
+
+    def test_error_en_escritura_se_propaga(self):
+        escritor = Mock(side_effect=RuntimeError("fallo de escritura"))
+        pipeline = PipelineEmbeddings(self.mock_embeddings, escritor, tamano_lote=2, max_lotes_en_cola=1)
+        with self.assertRaises(RuntimeError):
+            pipeline.ejecutar(self.documentos)
+
+    def test_error_en_embeddings_se_propaga(self):
+        self.mock_embeddings.embed_documents.side_effect = ValueError("modelo no disponible")
+        pipeline = PipelineEmbeddings(self.mock_embeddings, self._escritor, tamano_lote=2, max_lotes_en_cola=1)
+        with self.assertRaises(ValueError):
+            pipeline.ejecutar(self.documentos)
+        self.assertEqual(self.escritos, [])
+
+    def test_cache_evita_recalcular(self):
+        test_dir = tempfile.mkdtemp()
+        try:
+            cache = CacheEmbeddings(test_dir, "modelo", max_entradas=100)
+            PipelineEmbeddings(self.mock_embeddings, self._escritor, cache=cache).ejecutar(self.documentos)
+            self.mock_embeddings.embed_documents.reset_mock()
+
+            estadisticas = PipelineEmbeddings(
+                self.mock_embeddings, self._escritor, cache=cache
+            ).ejecutar(self.documentos)
+
+            self.mock_embeddings.embed_documents.assert_not_called()
+            self.assertEqual(estadisticas['aciertos_cache'], 10)
+            self.assertEqual(self.escritos[-1][1][2], [3.0])
+        finally:
+            shutil.rmtree(test_dir)
+
+    def test_varios_workers_requiere_modelo(self):
+        with self.assertRaises(ValueError):
+            PipelineEmbeddings(self.mock_embeddings, self._escritor, num_workers=2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+# test_retriever_filtrado.py
+
+import uuid
+import unittest
+import pandas as pd
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores.chroma import Chroma
+from features.extractor_predicados import ExtractorPredicados
+from features.retriever_filtrado import RetrieverFiltrado
+from utils.document_processor import DataProcessor
+
+
+class TestRetrieverFiltrado(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'customer_id': [1, 2, 3, 4, 5, 6],
+            'country': ['Spain', 'Spain', 'France', 'Germany', 'Spain', 'France'],
+            'products_number': [1, 3, 3, 4, 2, 1],
+            'balance': [0.0, 1500.5, 200.0, 99000.0, 12000.0, 50.0]
+        })
+        self.vectorstore = Chroma(
+            collection_name=f"test_{uuid.uuid4().hex}",
+            embedding_function=DeterministicFakeEmbedding(size=16)
+        )
+        self.vectorstore.add_documents(DataProcessor.create_csv_docs(self.df))
+        self.retriever = RetrieverFiltrado(
+            vectorstore=self.vectorstore, extractor=ExtractorPredicados(self.df), k=5
+        )
+
+    def tearDown(self):
+        self.vectorstore.delete_collection()
+
+    def test_metadatos_tipados(self):
+        metadatos = self.vectorstore.get(where={'customer_id': 4})['metadatas'][0]
+        self.assertEqual(metadatos['products_number'], 4)
+        self.assertEqual(metadatos['balance'], 99000.0)
+
+    def test_filtra_por_predicados(self):
+        documentos = self.retriever.invoke("clientes de Spain con más de 2 productos")
+        self.assertEqual([doc.metadata['customer_id'] for doc in documentos], [2])
+
+    def test_rango_numerico(self):
+        documentos = self.retriever.invoke("clientes con balance entre 100 y 20000")
+        self.assertEqual(sorted(doc.metadata['customer_id'] for doc in documentos), [2, 3, 5])
+
+    def test_sin_coincidencias_busca_sin_filtro(self):
+        documentos = self.retriever.invoke("clientes de Germany con menos de 2 productos")
+        self.assertEqual(len(documentos), 5)
+
+    def test_sin_predicados(self):
+        self.assertIsNone(self.retriever.filtro_para("factores de deserción"))
+        self.assertEqual(len(self.retriever.invoke("factores de deserción")), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,7 @@
 import unittest
 from unittest.mock import Mock, patch
 import os
-from src.features.vector_store_manager import VectorStoreManager
+from features.vector_store_manager import VectorStoreManager
 from langchain_core.documents import Document
 
 class TestVectorStoreManager(unittest.TestCase):
@@ -13,7 +13,7 @@ class TestVectorStoreManager(unittest.TestCase):
         self.base_dir = "/test/base/dir"
         self.vector_store_manager = VectorStoreManager(self.mock_embed_model, self.base_dir)
 
-    @patch('src.utils.vector_store_manager.Chroma')
+    @patch('utils.vector_store_manager.Chroma')
     def test_create_vector_store(self, mock_chroma):
         # Crear documentos de prueba
         test_documents = [
@@ -55,13 +55,13 @@ class TestVectorStoreManager(unittest.TestCase):
         test_documents = [Document(page_content="Test document", metadata={"source": "test"})]
 
         # Configurar el mock de Chroma (necesario aunque no lo usemos directamente en esta prueba)
-        with patch('src.utils.vector_store_manager.Chroma') as mock_chroma:
+        with patch('utils.vector_store_manager.Chroma') as mock_chroma:
             self.vector_store_manager.create_vector_store(test_documents)
 
         # Verificar que os.path.join fue llamado con los argumentos correctos
         mock_join.assert_called_once_with(self.base_dir, "bank_data_db")
 
-    @patch('src.utils.vector_store_manager.Chroma')
+    @patch('utils.vector_store_manager.Chroma')
     def test_create_vector_store_empty_documents(self, mock_chroma):
         # Probar con una lista vacía de documentos
         empty_documents = []
@@ -0,0 +1,130 @@
+# test_vector_store_numpy.py
+
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from features.vector_store_numpy import VectorStoreNumpy, cumple_filtro
+
+
+class TestVectorStoreNumpy(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+        self.textos = [f"cliente {i}" for i in range(50)]
+        self.metadatos = [{'customer_id': i, 'country': 'Spain' if i % 2 else 'France'} for i in range(50)]
+        self.vector_store = VectorStoreNumpy(self.embeddings, persist_directory=self.test_dir)
+        self.vector_store.add_texts(self.textos, self.metadatos, ids=[str(i) for i in range(50)])
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_top_k_exacto(self):
+        matriz = np.array(self.embeddings.embed_documents(self.textos))
+        matriz /= np.linalg.norm(matriz, axis=1, keepdims=True)
+        consulta = np.array(self.embeddings.embed_query("cliente 7"))
+        esperados = np.argsort(-(matriz @ consulta))[:5]
+
+        documentos = self.vector_store.similarity_search("cliente 7", k=5)
+
+        self.assertEqual([doc.metadata['customer_id'] for doc in documentos], esperados.tolist())
+        self.assertEqual(documentos[0].page_content, "cliente 7")
+
+    def test_lote_igual_que_individual(self):
+        consultas = ["cliente 3", "cliente 40"]
+        vectores = [self.embeddings.embed_query(c) for c in consultas]
+        lote = self.vector_store.buscar_lote(vectores, k=4)
+        for consulta, documentos in zip(consultas, lote):
+            self.assertEqual(documentos, self.vector_store.similarity_search(consulta, k=4))
+
+    def test_filtro_where(self):
+        filtro = {'$and': [{'country': 'Spain'}, {'customer_id': {'$lt': 10}}]}
+        documentos = self.vector_store.similarity_search("cliente", k=10, filter=filtro)
+        self.assertEqual(sorted(doc.metadata['customer_id'] for doc in documentos), [1, 3, 5, 7, 9])
+        self.assertFalse(cumple_filtro({'balance': 'n/a'}, {'balance': {'$gt': 1}}))
+
+    def test_upsert_y_delete(self):
+        vector = self.embeddings.embed_query("nuevo")
+        self.vector_store.upsert(["7"], [vector], ["nuevo"], [{'customer_id': 7}])
+        self.vector_store.delete(ids=["0", "inexistente"])
+
+        self.assertEqual(self.vector_store.count(), 49)
+        self.assertEqual(self.vector_store.similarity_search("nuevo", k=1)[0].page_content, "nuevo")
+        restantes = self.vector_store.similarity_search("cliente 0", k=49)
+        self.assertNotIn("cliente 0", [doc.page_content for doc in restantes])
+
+    def test_busqueda_con_delete_concurrente(self):
+        puntuar = self.vector_store._puntuar
+        llamadas = []
+
+        def puntuar_y_borrar(*args):
+            puntuaciones = puntuar(*args)
+            if not llamadas:
+                # Otro hilo borra mientras se puntúa: la fila 49 pasa al hueco de la 7
+                self.vector_store.delete(ids=["7"])
+            llamadas.append(1)
+            return puntuaciones
+
+        self.vector_store._puntuar = puntuar_y_borrar
+        documentos = self.vector_store.similarity_search("cliente 7", k=3)
+
+        self.assertEqual(len(llamadas), 2)
+        self.assertNotIn("cliente 7", [doc.page_content for doc in documentos])
+        for doc in documentos:
+            self.assertEqual(doc.page_content, f"cliente {doc.metadata['customer_id']}")
+
+    def test_persistencia(self):
+        self.vector_store.persistir()
+        recargado = VectorStoreNumpy(self.embeddings, persist_directory=self.test_dir)
+
+        self.assertEqual(recargado.count(), 50)
+        self.assertEqual(
+            recargado.similarity_search("cliente 12", k=3),
+            self.vector_store.similarity_search("cliente 12", k=3)
+        )
+
+    def test_crecimiento_de_capacidad(self):
+        en_memoria = VectorStoreNumpy(self.embeddings)
+        textos = [f"texto {i}" for i in range(VectorStoreNumpy.CAPACIDAD_INICIAL + 10)]
+        en_memoria.add_texts(textos)
+        self.assertEqual(en_memoria.count(), len(textos))
+        self.assertEqual(en_memoria.similarity_search(textos[-1], k=1)[0].page_content, textos[-1])
+
+    def test_cuantizacion_int8_con_reevaluacion(self):
+        directorio = tempfile.mkdtemp(dir=self.test_dir)
+        cuantizado = VectorStoreNumpy(
+            self.embeddings, persist_directory=directorio, precision="int8", factor_reevaluacion=4
+        )
+        cuantizado.add_texts(self.textos, self.metadatos, ids=[str(i) for i in range(50)])
+        cuantizado.persistir()
+        recargado = VectorStoreNumpy(
+            self.embeddings, persist_directory=directorio, precision="int8", factor_reevaluacion=4
+        )
+        vectores = [self.embeddings.embed_query(texto) for texto in self.textos[:20]]
+
+        informe = recargado.informe_recall(vectores, k=5)
+
+        self.assertEqual(recargado.count(), 50)
+        self.assertGreaterEqual(informe['recall_reevaluado'], 0.95)
+        self.assertGreaterEqual(informe['recall_reevaluado'], informe['recall_cuantizado'])
+        self.assertGreater(informe['factor_reduccion'], 3)
+        self.assertEqual(recargado.similarity_search("cliente 7", k=1)[0].page_content, "cliente 7")
+
+    def test_float16_sin_originales(self):
+        cuantizado = VectorStoreNumpy(self.embeddings, precision="float16")
+        cuantizado.add_texts(self.textos)
+
+        self.assertEqual(cuantizado.estadisticas()['factor_reduccion'], 2)
+        self.assertEqual(cuantizado.similarity_search("cliente 3", k=1)[0].page_content, "cliente 3")
+        with self.assertRaises(ValueError):
+            cuantizado.informe_recall([self.embeddings.embed_query("cliente 3")])
+
+    def test_precision_distinta_descarta_lo_persistido(self):
+        self.vector_store.persistir()
+        otro = VectorStoreNumpy(self.embeddings, persist_directory=self.test_dir, precision="float16")
+        self.assertEqual(otro.count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+# test_cliente_ollama.py
+
+import json
+import asyncio
+import unittest
+from aiohttp import web
+from model.cliente_ollama import ClienteOllamaAsync
+
+
+async def responder_generate(request):
+    cuerpo = await request.json()
+    if not cuerpo['stream']:
+        return web.json_response({'response': f"eco: {cuerpo['prompt']}", 'done': True, 'eval_count': 2})
+
+    respuesta = web.StreamResponse()
+    await respuesta.prepare(request)
+    for fragmento in ("eco", ": ", cuerpo['prompt']):
+        await respuesta.write((json.dumps({'response': fragmento, 'done': False}) + "\n").encode())
+    await respuesta.write((json.dumps({'response': "", 'done': True, 'eval_count': 3}) + "\n").encode())
+    return respuesta
+
+
+class TestClienteOllamaAsync(unittest.TestCase):
+
+    def ejecutar(self, funcion, cliente=None):
+        async def envoltorio():
+            aplicacion = web.Application()
+            aplicacion.router.add_post("/api/generate", responder_generate)
+            runner = web.AppRunner(aplicacion)
+            await runner.setup()
+            sitio = web.TCPSite(runner, "127.0.0.1", 0)
+            await sitio.start()
+            puerto = sitio._server.sockets[0].getsockname()[1]
+            base_url = f"http://127.0.0.1:{puerto}"
+            activo = cliente or ClienteOllamaAsync(max_conexiones=2)
+            activo.base_url = base_url
+            try:
+                return await funcion(activo)
+            finally:
+                await activo.cerrar()
+                await runner.cleanup()
+
+        return asyncio.run(envoltorio())
+
+    def test_generar(self):
+        async def prueba(cliente):
+            return await asyncio.gather(*(cliente.generar("modelo", f"p{i}") for i in range(5)))
+
+        respuestas = self.ejecutar(prueba)
+
+        self.assertEqual([r['response'] for r in respuestas], [f"eco: p{i}" for i in range(5)])
+
+    def test_generar_stream(self):
+        async def prueba(cliente):
+            return [parte async for parte in cliente.generar_stream("modelo", "hola")]
+
+        partes = self.ejecutar(prueba)
+
+        self.assertEqual("".join(p['response'] for p in partes), "eco: hola")
+        self.assertTrue(partes[-1]['done'])
+        self.assertEqual(partes[-1]['eval_count'], 3)
+
+    def test_sesion_reutilizada(self):
+        async def prueba(cliente):
+            await cliente.generar("modelo", "a")
+            sesion = cliente._obtener_sesion()
+            await cliente.generar("modelo", "b")
+            return sesion is cliente._obtener_sesion()
+
+        self.assertTrue(self.ejecutar(prueba))
+
+    def test_una_sesion_por_bucle(self):
+        cliente = ClienteOllamaAsync(max_conexiones=2)
+        sesiones = []
+
+        async def prueba(cliente):
+            await cliente.generar("modelo", "a")
+            sesiones.append(cliente._obtener_sesion())
+
+        # Cada asyncio.run crea su bucle; cerrar() libera la sesión del que termina
+        self.ejecutar(prueba, cliente)
+        self.ejecutar(prueba, cliente)
+
+        self.assertIsNot(sesiones[0], sesiones[1])
+        self.assertTrue(all(sesion.closed for sesion in sesiones))
+        self.assertEqual(len(cliente._sesiones), 0)
+
+    def test_max_conexiones_invalido(self):
+        with self.assertRaises(ValueError):
+            ClienteOllamaAsync(max_conexiones=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# test_contabilidad_llm.py
+
+import unittest
+from model.contabilidad_llm import ContabilidadLLM, extraer_uso
+
+
+def respuesta_ollama(tokens_prompt=20, tokens_generados=50, carga=0.002):
+    return {
+        'response': "",
+        'done': True,
+        'total_duration': 3_500_000_000,
+        'load_duration': int(carga * 1e9),
+        'prompt_eval_count': tokens_prompt,
+        'prompt_eval_duration': 500_000_000,
+        'eval_count': tokens_generados,
+        'eval_duration': 2_500_000_000
+    }
+
+
+class TestContabilidadLLM(unittest.TestCase):
+
+    def setUp(self):
+        self.contabilidad = ContabilidadLLM(umbral_carga_fria=0.5)
+
+    def test_extraer_uso(self):
+        uso = extraer_uso(respuesta_ollama())
+        self.assertEqual(uso['tokens_prompt'], 20)
+        self.assertEqual(uso['tokens_generados'], 50)
+        self.assertAlmostEqual(uso['tokens_por_segundo_prefill'], 40.0)
+        self.assertAlmostEqual(uso['tokens_por_segundo_decodificacion'], 20.0)
+        self.assertAlmostEqual(uso['segundos_ollama'], 3.5)
+
+    def test_respuesta_sin_contadores(self):
+        self.assertEqual(extraer_uso(None), {})
+        self.assertEqual(self.contabilidad.registrar({'response': "hola", 'done': True}), {})
+        self.assertEqual(self.contabilidad.resumen()['generaciones'], 0)
+
+    def test_prompt_en_cache_de_contexto(self):
+        respuesta = respuesta_ollama()
+        del respuesta['prompt_eval_count']
+        respuesta['prompt_eval_duration'] = 0
+        uso = extraer_uso(respuesta)
+        self.assertEqual(uso['tokens_prompt'], 0)
+        self.assertIsNone(uso['tokens_por_segundo_prefill'])
+
+    def test_resumen_y_cargas_en_frio(self):
+        primera = self.contabilidad.registrar(respuesta_ollama(carga=4.0))
+        segunda = self.contabilidad.registrar(respuesta_ollama(tokens_prompt=30, tokens_generados=100))
+        self.assertTrue(primera['carga_en_frio'])
+        self.assertFalse(segunda['carga_en_frio'])
+
+        resumen = self.contabilidad.resumen()
+        self.assertEqual(resumen['generaciones'], 2)
+        self.assertEqual(resumen['tokens_prompt'], 50)
+        self.assertEqual(resumen['tokens_generados'], 150)
+        self.assertAlmostEqual(resumen['tokens_generados_medios'], 75.0)
+        self.assertAlmostEqual(resumen['tokens_por_segundo_prefill'], 50.0)
+        self.assertAlmostEqual(resumen['tokens_por_segundo_decodificacion'], 30.0)
+        self.assertEqual(resumen['cargas_en_frio'], 1)
+        self.assertAlmostEqual(resumen['segundos_carga'], 4.002)
+
+        self.contabilidad.reiniciar()
+        self.assertEqual(self.contabilidad.resumen()['generaciones'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
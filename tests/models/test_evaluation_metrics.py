@@ -1,7 +1,7 @@
 # test_evaluation_metrics.py
 
 import unittest
-from src.models.evaluation_metrics import EvaluationMetrics
+from models.evaluation_metrics import EvaluationMetrics
 
 
 class TestEvaluationMetrics(unittest.TestCase):
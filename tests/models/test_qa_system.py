@@ -2,7 +2,7 @@
 
 import unittest
 from unittest.mock import Mock, patch
-from src.models.qa_system import QASystem
+from models.qa_system import QASystem
 
 
 class TestQASystem(unittest.TestCase):
@@ -17,8 +17,8 @@ class TestQASystem(unittest.TestCase):
         self.assertEqual(self.qa_system.custom_retriever, self.mock_retriever)
         self.assertIsNone(self.qa_system.qa_chain)
 
-    @patch('src.utils.qa_system.PromptTemplate')
-    @patch('src.utils.qa_system.RetrievalQA')
+    @patch('utils.qa_system.PromptTemplate')
+    @patch('utils.qa_system.RetrievalQA')
     def test_setup_qa_chain(self, mock_retrieval_qa, mock_prompt_template):
         mock_chain = Mock()
         mock_retrieval_qa.from_chain_type.return_value = mock_chain
@@ -33,7 +33,7 @@ class TestQASystem(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.qa_system.ask_question("Test question")
 
-    @patch('src.utils.qa_system.RetrievalQA')
+    @patch('utils.qa_system.RetrievalQA')
     def test_ask_question(self, mock_retrieval_qa):
         # Configurar el mock para RetrievalQA
         mock_chain = Mock()
@@ -53,8 +53,8 @@ class TestQASystem(unittest.TestCase):
         self.assertEqual(result["result"], "Test answer")
         self.assertEqual(result["source_documents"], ["doc1", "doc2"])
 
-    @patch('src.utils.qa_system.PromptTemplate')
-    @patch('src.utils.qa_system.RetrievalQA')
+    @patch('utils.qa_system.PromptTemplate')
+    @patch('utils.qa_system.RetrievalQA')
     def test_prompt_template_content(self, mock_retrieval_qa, mock_prompt_template):
         self.qa_system.setup_qa_chain()
 
@@ -2,7 +2,7 @@
 
 import unittest
 from unittest.mock import Mock, patch
-from src.models.rag_system import RAGSystem
+from models.rag_system import RAGSystem
 
 class TestRAGSystem(unittest.TestCase):
 
@@ -20,10 +20,10 @@ class TestRAGSystem(unittest.TestCase):
         self.assertIsInstance(self.rag_system.vector_store_manager, Mock)
         self.assertIsNone(self.rag_system.qa_system)
 
-    @patch('src.models.rag_system.DocumentLoader')
-    @patch('src.models.rag_system.DataProcessor')
-    @patch('src.models.rag_system.CustomRetriever')
-    @patch('src.models.rag_system.QASystem')
+    @patch('models.rag_system.DocumentLoader')
+    @patch('models.rag_system.DataProcessor')
+    @patch('models.rag_system.CustomRetriever')
+    @patch('models.rag_system.QASystem')
     def test_run(self, mock_qa_system, mock_custom_retriever, mock_data_processor, mock_document_loader):
         # Configurar mocks
         mock_document_loader.load_pdfs.return_value = ["pdf1", "pdf2"]
@@ -53,7 +53,7 @@ class TestRAGSystem(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.rag_system.ask_question("Test question")
 
-    @patch('src.models.rag_system.QASystem')
+    @patch('models.rag_system.QASystem')
     def test_ask_question(self, mock_qa_system):
         # Configurar el sistema QA mock
         mock_qa = Mock()
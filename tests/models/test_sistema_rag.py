@@ -0,0 +1,425 @@
+# test_sistema_rag.py
+
+import os
+import asyncio
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
+from langchain_community.llms.fake import FakeListLLM
+from model.sistema_rag import SistemaRAG
+from features.gestor_clientes import GestorClientes
+from features.enrutador_consultas import EnrutadorConsultas
+from utils.trazas import trazar
+
+RUTA_CSV = os.path.join(os.path.dirname(__file__), "..", "resources", "test_csv", "BankCustomerChurnPrediction.csv")
+
+
+def crear_llm_falso(*args, **kwargs):
+    return FakeListLLM(responses=["Respuesta de prueba"] * 100)
+
+
+def crear_embeddings_falsos(*args, **kwargs):
+    return DeterministicFakeEmbedding(size=32)
+
+
+class ClienteOllamaFalso:
+    """Cliente asíncrono que registra cuántas generaciones hay en curso a la vez."""
+
+    def __init__(self):
+        self.en_curso = 0
+        self.max_en_curso = 0
+
+    async def generar(self, modelo, prompt, opciones=None):
+        self.en_curso += 1
+        self.max_en_curso = max(self.max_en_curso, self.en_curso)
+        await asyncio.sleep(0.05)
+        self.en_curso -= 1
+        return {'response': "Respuesta asíncrona", 'done': True}
+
+
+class ModeloFastEmbedFalso:
+    """Modelo de FastEmbed que registra las llamadas a query_embed."""
+
+    def __init__(self):
+        self.llamadas = []
+
+    def query_embed(self, consultas, batch_size):
+        self.llamadas.append((list(consultas), batch_size))
+        return (np.full(3, float(len(consulta))) for consulta in consultas)
+
+
+class EmbeddingsFastEmbedFalsos:
+    """Envoltorio con la forma de FastEmbedEmbeddings en langchain-community 0.3."""
+
+    def __init__(self):
+        self.model = ModeloFastEmbedFalso()
+        self.batch_size = 16
+
+
+@patch('model.sistema_rag.FastEmbedEmbeddings', side_effect=crear_embeddings_falsos)
+@patch('model.sistema_rag.Ollama', side_effect=crear_llm_falso)
+class TestSistemaRAG(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.ruta_csv = os.path.join(self.test_dir, "clientes.csv")
+        pd.read_csv(RUTA_CSV).head(40).to_csv(self.ruta_csv, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def crear_sistema(self, **kwargs):
+        kwargs.setdefault('persist_directory', None)
+        kwargs.setdefault('directorio_cache_embeddings', None)
+        return SistemaRAG(ruta_archivo=self.ruta_csv, **kwargs)
+
+    def test_inicializacion_sincrona(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        self.assertTrue(sistema.esta_listo())
+        self.assertEqual(sistema.obtener_estado()['fase'], 'listo')
+        self.assertEqual(sistema.vector_db._collection.count(), 40)
+
+    def test_inicializacion_en_segundo_plano(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema(inicializacion_en_segundo_plano=True)
+        self.assertTrue(sistema.esperar_listo(timeout=30))
+        self.assertEqual(sistema.obtener_estado()['progreso'], 1.0)
+
+    def test_error_en_segundo_plano(self, mock_ollama, mock_embeddings):
+        mock_embeddings.side_effect = RuntimeError("modelo no disponible")
+        sistema = self.crear_sistema(inicializacion_en_segundo_plano=True)
+        with self.assertRaises(RuntimeError):
+            sistema.esperar_listo(timeout=30)
+        self.assertEqual(sistema.obtener_estado()['fase'], 'error')
+        self.assertFalse(sistema.esta_listo())
+
+    def test_realizar_consulta(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        resultado = sistema.realizar_consulta("¿Qué clientes tienen mayor balance?")
+        self.assertEqual(resultado['respuesta'], "Respuesta de prueba")
+        self.assertEqual(resultado['metadatos']['num_documentos'], 5)
+
+    def test_realizar_consulta_stream(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        eventos = list(sistema.realizar_consulta_stream("¿Qué clientes tienen mayor balance?"))
+
+        self.assertEqual(eventos[0]['tipo'], 'documentos')
+        self.assertEqual(len(eventos[0]['documentos_fuente']), 5)
+        self.assertEqual(eventos[-1]['tipo'], 'fin')
+        tokens = "".join(e['texto'] for e in eventos if e['tipo'] == 'token')
+        self.assertEqual(tokens, "Respuesta de prueba")
+        self.assertEqual(eventos[-1]['respuesta'], "Respuesta de prueba")
+        self.assertIsNotNone(eventos[-1]['metadatos']['tiempo_primer_token'])
+
+    def test_realizar_consulta_stream_interrumpida_cierra_el_span(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        with trazar() as traza:
+            eventos = sistema.realizar_consulta_stream("¿Qué clientes tienen mayor balance?")
+            self.assertEqual(next(eventos)['tipo'], 'documentos')
+            # El consumidor deja de iterar, como en un rerun de Streamlit
+            eventos.close()
+
+        consultas = [s for s in traza.spans() if s['nombre'] == "consulta"]
+        self.assertEqual(len(consultas), 1)
+        self.assertTrue(consultas[0]['atributos']['interrumpida'])
+
+    def test_realizar_consulta_stream_valida_antes_de_iterar(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        with self.assertRaises(ValueError):
+            sistema.realizar_consulta_stream("consulta", temperatura=2)
+
+    def test_cadenas_reutilizadas_por_configuracion(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        sistema.realizar_consulta("consulta 1", temperatura=0.2, max_tokens=64)
+        sistema.realizar_consulta("consulta 2", temperatura=0.2, max_tokens=64)
+        sistema.realizar_consulta("consulta 3", temperatura=0.5, max_tokens=128)
+
+        self.assertEqual(len(sistema._cadenas), 2)
+        mock_ollama.assert_any_call(
+            model=sistema.model_name, base_url=sistema.url_ollama, temperature=0.2, num_predict=64
+        )
+        mock_ollama.assert_any_call(
+            model=sistema.model_name, base_url=sistema.url_ollama, temperature=0.5, num_predict=128
+        )
+        self.assertIs(sistema._obtener_cadena(0.2, 64), sistema._cadenas[(0.2, 64)])
+
+    def test_cache_de_respuestas(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        primera = sistema.realizar_consulta("tasa de deserción por país")
+        segunda = sistema.realizar_consulta("tasa de deserción por país")
+
+        self.assertFalse(primera['metadatos']['cache_respuesta'])
+        self.assertTrue(segunda['metadatos']['cache_respuesta'])
+        self.assertEqual(sistema.obtener_estadisticas_cache()['respuestas']['aciertos'], 1)
+
+    def test_consulta_embebida_una_vez_con_cache(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        sistema.cliente_ollama = ClienteOllamaFalso()
+        consultas = ["¿Qué clientes tienen mayor balance?", "clientes con saldo alto", "perfil de riesgo"]
+        esperados = [
+            [doc.page_content for doc in sistema.retriever.invoke(consulta)] for consulta in consultas
+        ]
+
+        with patch.object(
+                DeterministicFakeEmbedding, 'embed_query', autospec=True,
+                side_effect=DeterministicFakeEmbedding.embed_query
+        ) as embed_query:
+            sincrona = sistema.realizar_consulta(consultas[0])
+            stream = list(sistema.realizar_consulta_stream(consultas[1]))
+            asincrona = asyncio.run(sistema.arealizar_consulta(consultas[2]))
+
+        self.assertEqual(embed_query.call_count, 3)
+        self.assertEqual(sincrona['respuesta'], "Respuesta de prueba")
+        self.assertEqual(sincrona['documentos_fuente'], esperados[0])
+        self.assertEqual(stream[0]['documentos_fuente'], esperados[1])
+        self.assertEqual(asincrona['documentos_fuente'], esperados[2])
+
+    def test_cache_de_respuestas_invalidada_al_cambiar_csv(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        sistema.realizar_consulta("tasa de deserción por país")
+        pd.read_csv(self.ruta_csv).head(30).to_csv(self.ruta_csv, index=False)
+
+        resultado = sistema.realizar_consulta("tasa de deserción por país")
+
+        self.assertFalse(resultado['metadatos']['cache_respuesta'])
+        self.assertEqual(sistema.obtener_estadisticas_cache()['respuestas']['invalidaciones'], 1)
+
+    def test_arealizar_consultas_concurrentes(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema(umbral_cache_respuestas=None)
+        sistema.cliente_ollama = ClienteOllamaFalso()
+
+        async def consultar():
+            return await asyncio.gather(*(
+                sistema.arealizar_consulta(f"consulta {i}") for i in range(4)
+            ))
+
+        resultados = asyncio.run(consultar())
+
+        self.assertEqual([r['respuesta'] for r in resultados], ["Respuesta asíncrona"] * 4)
+        self.assertTrue(all(r['metadatos']['num_documentos'] == 5 for r in resultados))
+        self.assertEqual(sistema.cliente_ollama.max_en_curso, 4)
+
+    def test_arealizar_consulta_usa_cache(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        sistema.cliente_ollama = ClienteOllamaFalso()
+        sistema.realizar_consulta("tasa de deserción por país")
+
+        resultado = asyncio.run(sistema.arealizar_consulta("tasa de deserción por país"))
+
+        self.assertTrue(resultado['metadatos']['cache_respuesta'])
+        self.assertEqual(sistema.cliente_ollama.max_en_curso, 0)
+
+    def test_realizar_consultas_lote(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        consultas = ["tasa de deserción por país", "   ", "clientes con balance alto"]
+
+        resultados = sistema.realizar_consultas_lote(consultas, max_concurrency=2)
+
+        self.assertEqual([r['consulta'] for r in resultados], consultas)
+        self.assertIsNone(resultados[0]['error'])
+        self.assertIsNotNone(resultados[1]['error'])
+        self.assertEqual(resultados[2]['respuesta'], "Respuesta de prueba")
+        esperados = [doc.page_content for doc in sistema.retriever.invoke(consultas[2])]
+        self.assertEqual(resultados[2]['documentos_fuente'], esperados)
+        self.assertIn('tiempo_total', resultados[2]['metadatos'])
+
+    def test_realizar_consultas_lote_errores_y_cache(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        sistema.realizar_consulta("tasa de deserción por país")
+
+        with patch.object(sistema, '_generar_respuesta_lote', side_effect=RuntimeError("Ollama caído")):
+            resultados = sistema.realizar_consultas_lote(["tasa de deserción por país", "otra consulta"])
+
+        self.assertTrue(resultados[0]['metadatos']['cache_respuesta'])
+        self.assertIsNone(resultados[0]['error'])
+        self.assertEqual(resultados[1]['error'], "Ollama caído")
+
+    def test_realizar_consultas_lote_fallo_al_preparar(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        sistema.realizar_consulta("tasa de deserción por país")
+        consultas = ["tasa de deserción por país", "otra consulta", "   "]
+
+        with patch.object(sistema, '_buscar_documentos_lote', side_effect=RuntimeError("índice caído")):
+            resultados = sistema.realizar_consultas_lote(consultas)
+        self.assertTrue(resultados[0]['metadatos']['cache_respuesta'])
+        self.assertEqual(resultados[1]['error'], "índice caído")
+        self.assertIsNotNone(resultados[2]['error'])
+
+        with patch.object(sistema, '_embeber_consultas', side_effect=RuntimeError("modelo caído")):
+            resultados = sistema.realizar_consultas_lote(consultas[:2])
+        self.assertEqual([r['error'] for r in resultados], ["modelo caído"] * 2)
+        self.assertEqual([r['consulta'] for r in resultados], consultas[:2])
+
+    def test_embeber_consultas_en_una_llamada(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        sistema.embeddings = EmbeddingsFastEmbedFalsos()
+
+        vectores = sistema._embeber_consultas(["a", "bcd"])
+
+        self.assertEqual(vectores, [[1.0] * 3, [3.0] * 3])
+        self.assertEqual(sistema.embeddings.model.llamadas, [(["a", "bcd"], 16)])
+
+    def test_enrutador_responde_sin_llm(self, mock_ollama, mock_embeddings):
+        enrutador = EnrutadorConsultas(GestorClientes(pd.read_csv(self.ruta_csv)))
+        sistema = self.crear_sistema(enrutador=enrutador, inicializacion_en_segundo_plano=True)
+
+        resultado = sistema.realizar_consulta("tasa de deserción por país")
+        eventos = list(sistema.realizar_consulta_stream("balance promedio de clientes activos"))
+        sistema.esperar_listo(timeout=30)
+        abierta = sistema.realizar_consulta("¿Cómo influye el credit score en la deserción?")
+
+        self.assertEqual(resultado['metadatos']['ruta'], 'agregado')
+        self.assertEqual(resultado['metadatos']['modelo'], 'pandas')
+        self.assertEqual(eventos[-1]['metadatos']['ruta'], 'agregado')
+        self.assertEqual(abierta['respuesta'], "Respuesta de prueba")
+        self.assertEqual(sistema.obtener_estadisticas_enrutador()['abierta']['consultas'], 1)
+
+    def test_modo_ingesta_resumenes(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema(modo_ingesta="resumenes")
+        resumenes = sistema._crear_documentos_resumen()
+
+        self.assertIn('resumen:general', resumenes)
+        self.assertIn('resumen:country=France', resumenes)
+        self.assertEqual(sistema.vector_db._collection.count(), len(resumenes))
+        self.assertLess(len(resumenes), 40)
+
+    def test_modo_ingesta_mixto(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema(modo_ingesta="mixto")
+        num_resumenes = len(sistema._crear_documentos_resumen())
+        self.assertEqual(sistema.vector_db._collection.count(), 40 + num_resumenes)
+
+    def test_retriever_resumen_y_filas(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema(modo_ingesta="mixto")
+        consulta = "clientes con balance alto"
+
+        resultado = sistema.realizar_consulta(consulta)
+        lote = sistema.realizar_consultas_lote(["clientes con saldo bajo"])
+
+        self.assertFalse(lote[0]['metadatos']['cache_respuesta'])
+        self.assertEqual(type(sistema.retriever).__name__, "CustomRetriever")
+        for fuentes in (resultado['documentos_fuente'], lote[0]['documentos_fuente']):
+            self.assertTrue(fuentes[0].startswith("RESUMEN"))
+            self.assertEqual(len(fuentes), len(set(fuentes)))
+
+    def test_backend_numpy(self, mock_ollama, mock_embeddings):
+        directorio = os.path.join(self.test_dir, "vector_db")
+        sistema = self.crear_sistema(backend_vectorial="numpy", persist_directory=directorio)
+        resultado = sistema.realizar_consulta("clientes con balance alto")
+        recargado = self.crear_sistema(backend_vectorial="numpy", persist_directory=directorio)
+
+        self.assertEqual(type(sistema.vector_db).__name__, "VectorStoreNumpy")
+        self.assertEqual(resultado['metadatos']['num_documentos'], 5)
+        self.assertEqual(recargado.vector_db.count(), 40)
+        self.assertEqual(
+            sistema._consultar_coleccion([sistema.embeddings.embed_query("x")], None),
+            recargado._consultar_coleccion([recargado.embeddings.embed_query("x")], None)
+        )
+
+    def test_vectores_cuantizados(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema(
+            backend_vectorial="numpy", precision_vectores="int8", factor_reevaluacion=4
+        )
+        informe = sistema.informe_recall_cuantizacion(["clientes con balance alto", "clientes de France"])
+
+        self.assertEqual(informe['precision'], 'int8')
+        self.assertEqual(informe['vectores'], 40)
+        self.assertGreaterEqual(informe['recall_reevaluado'], informe['recall_cuantizado'])
+        with self.assertRaises(ValueError):
+            self.crear_sistema(precision_vectores="int8")
+
+    def test_parametros_hnsw(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema(hnsw_m=8, hnsw_construction_ef=64, hnsw_search_ef=32)
+        metadatos = sistema.vector_db._collection.metadata
+
+        self.assertEqual(metadatos['hnsw:M'], 8)
+        self.assertEqual(metadatos['hnsw:construction_ef'], 64)
+        self.assertEqual(metadatos['hnsw:search_ef'], 32)
+        with self.assertRaises(ValueError):
+            self.crear_sistema(hnsw_m=0)
+
+    def test_filas_por_chunk(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema(filas_por_chunk=8)
+
+        self.assertEqual(sistema.vector_db._collection.count(), 5)
+        resultado = sistema.realizar_consulta("clientes con balance alto")
+        self.assertTrue(resultado['documentos_fuente'][0].startswith("customer_id,credit_score"))
+
+    def test_busqueda_filtrada_por_metadatos(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        consulta = "clientes de Spain con más de 1 productos"
+
+        resultado = sistema.realizar_consulta(consulta)
+        lote = sistema.realizar_consultas_lote([consulta])
+
+        df = pd.read_csv(self.ruta_csv)
+        esperados = df[(df['country'] == 'Spain') & (df['products_number'] > 1)]
+        self.assertEqual(resultado['metadatos']['num_documentos'], min(5, len(esperados)))
+        for documento in resultado['documentos_fuente'] + lote[0]['documentos_fuente']:
+            self.assertIn("country: Spain", documento)
+
+    def test_modo_ingesta_invalido(self, mock_ollama, mock_embeddings):
+        with self.assertRaises(ValueError):
+            self.crear_sistema(modo_ingesta="columnas")
+
+    def test_max_tokens_invalido(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        with self.assertRaises(ValueError):
+            sistema.realizar_consulta("consulta", max_tokens=0)
+
+    def test_realizar_consulta_vacia(self, mock_ollama, mock_embeddings):
+        sistema = self.crear_sistema()
+        with self.assertRaises(ValueError):
+            sistema.realizar_consulta("   ")
+
+    def test_indice_persistido_incremental(self, mock_ollama, mock_embeddings):
+        persist_directory = os.path.join(self.test_dir, "vector_db")
+        self.crear_sistema(persist_directory=persist_directory)
+
+        df = pd.read_csv(self.ruta_csv)
+        df.loc[0, 'balance'] = 1.0
+        df.drop(index=1).to_csv(self.ruta_csv, index=False)
+
+        with patch('model.sistema_rag.PipelineEmbeddings') as mock_pipeline:
+            sistema = self.crear_sistema(persist_directory=persist_directory)
+            documentos = list(mock_pipeline.return_value.ejecutar.call_args[0][0])
+
+        self.assertEqual([id_doc for id_doc, _ in documentos], [str(df.loc[0, 'customer_id'])])
+        self.assertEqual(sistema.vector_db._collection.count(), 39)
+
+    def test_cerrar_libera_la_cache_de_embeddings(self, mock_ollama, mock_embeddings):
+        directorio_cache = os.path.join(self.test_dir, "cache")
+        primero = self.crear_sistema(directorio_cache_embeddings=directorio_cache)
+        self.assertFalse(primero.cache_embeddings.solo_lectura)
+
+        asyncio.run(primero.cerrar())
+
+        segundo = self.crear_sistema(directorio_cache_embeddings=directorio_cache)
+        self.assertFalse(segundo.cache_embeddings.solo_lectura)
+        self.assertEqual(segundo.cache_embeddings.estadisticas()['aciertos'], 40)
+        segundo.cerrar_cache_embeddings()
+
+    def test_embeddings_inyectados_en_claves(self, mock_ollama, mock_embeddings):
+        directorio_cache = os.path.join(self.test_dir, "cache")
+        identidad = "langchain_core.embeddings.fake.DeterministicFakeEmbedding:32"
+
+        # Con la clase real para distinguir el modelo inyectado de FastEmbed
+        with patch('model.sistema_rag.FastEmbedEmbeddings', FastEmbedEmbeddings):
+            with self.assertLogs(level='WARNING') as registros:
+                sistema = self.crear_sistema(
+                    embeddings=DeterministicFakeEmbedding(size=32),
+                    directorio_cache_embeddings=directorio_cache,
+                    num_workers_embeddings=2
+                )
+            self.assertEqual(sistema._configuracion_indice()['modelo_embeddings'], identidad)
+
+        self.assertEqual(sistema.cache_embeddings.modelo, identidad)
+        self.assertEqual(os.listdir(directorio_cache), [sistema.cache_embeddings.directorio.name])
+        self.assertTrue(any("un solo proceso" in linea for linea in registros.output))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,12 +5,12 @@ import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
 import plotly.graph_objects as go
-from src.app import StreamlitRAGSystem, main
+from app import StreamlitRAGSystem, main
 
 class TestApp(unittest.TestCase):
 
-    @patch('src.app.RAGSystem.__init__')
-    @patch('src.app.Ollama')
+    @patch('app.RAGSystem.__init__')
+    @patch('app.Ollama')
     def test_streamlit_rag_system_init(self, mock_ollama, mock_rag_init):
         mock_rag_init.return_value = None
         system = StreamlitRAGSystem("base_dir")
@@ -20,8 +20,8 @@ class TestApp(unittest.TestCase):
         self.assertEqual(system.chunk_overlap, 500)
         mock_ollama.assert_called_once_with(model="llama3", temperature=0.7)
 
-    @patch('src.app.RAGSystem.__init__')
-    @patch('src.app.Ollama')
+    @patch('app.RAGSystem.__init__')
+    @patch('app.Ollama')
     def test_update_parameters(self, mock_ollama, mock_rag_init):
         mock_rag_init.return_value = None
         system = StreamlitRAGSystem("base_dir")
@@ -34,13 +34,13 @@ class TestApp(unittest.TestCase):
         mock_ollama.assert_called_with(model="llama2", temperature=0.5)
         system.run.assert_called_once()
 
-    @patch('src.app.st')
-    @patch('src.app.StreamlitRAGSystem')
-    @patch('src.app.os.path.exists')
-    @patch('src.app.pd.read_csv')
-    @patch('src.app.make_subplots')
-    @patch('src.app.go.Bar')
-    @patch('src.app.go.Scatter')
+    @patch('app.st')
+    @patch('app.StreamlitRAGSystem')
+    @patch('app.os.path.exists')
+    @patch('app.pd.read_csv')
+    @patch('app.make_subplots')
+    @patch('app.go.Bar')
+    @patch('app.go.Scatter')
     def test_main_function(self, mock_scatter, mock_bar, mock_subplots, mock_read_csv, mock_exists, mock_streamlit_rag, mock_st):
         # Simular la carga del sistema RAG
         mock_rag_instance = MagicMock()
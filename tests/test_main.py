@@ -3,13 +3,13 @@
 import unittest
 from unittest.mock import patch, MagicMock
 from io import StringIO
-from src.main import main
+from main import main
 
 class TestMain(unittest.TestCase):
 
-    @patch('src.main.RAGSystem')
-    @patch('src.main.run_tests')
-    @patch('src.main.plot_results')
+    @patch('main.RAGSystem')
+    @patch('main.run_tests')
+    @patch('main.plot_results')
     @patch('builtins.input')
     @patch('builtins.print')
     def test_main_function(self, mock_print, mock_input, mock_plot_results, mock_run_tests, mock_rag_system):
@@ -49,9 +49,9 @@ class TestMain(unittest.TestCase):
         mock_rag_instance.ask_question.assert_called_once_with("¿Pregunta de prueba?")
         mock_print.assert_called_with("Respuesta: Respuesta de prueba")
 
-    @patch('src.main.RAGSystem')
-    @patch('src.main.run_tests')
-    @patch('src.main.plot_results')
+    @patch('main.RAGSystem')
+    @patch('main.run_tests')
+    @patch('main.plot_results')
     @patch('builtins.input')
     def test_main_function_error_handling(self, mock_input, mock_plot_results, mock_run_tests, mock_rag_system):
         # Simular un error en RAGSystem
@@ -62,9 +62,9 @@ class TestMain(unittest.TestCase):
         with self.assertRaises(Exception):
             main()
 
-    @patch('src.main.RAGSystem')
-    @patch('src.main.run_tests')
-    @patch('src.main.plot_results')
+    @patch('main.RAGSystem')
+    @patch('main.run_tests')
+    @patch('main.plot_results')
     @patch('builtins.input')
     @patch('builtins.print')
     def test_main_function_empty_input(self, mock_print, mock_input, mock_plot_results, mock_run_tests, mock_rag_system):
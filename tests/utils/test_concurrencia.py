@@ -0,0 +1,65 @@
+# test_concurrencia.py
+
+import time
+import threading
+import unittest
+from utils.concurrencia import LockLectoresEscritor
+
+
+class TestLockLectoresEscritor(unittest.TestCase):
+
+    def setUp(self):
+        self.lock = LockLectoresEscritor()
+
+    def test_lectores_simultaneos(self):
+        dentro = threading.Barrier(2, timeout=2)
+
+        def leer():
+            with self.lock.lectura():
+                dentro.wait()
+
+        hilos = [threading.Thread(target=leer) for _ in range(2)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join(2)
+        self.assertFalse(dentro.broken)
+
+    def test_escritor_espera_a_los_lectores_y_los_nuevos_esperan_al_escritor(self):
+        eventos = []
+        leyendo = threading.Event()
+        soltar_lector = threading.Event()
+
+        def leer_largo():
+            with self.lock.lectura():
+                leyendo.set()
+                soltar_lector.wait(2)
+                eventos.append('fin_lectura')
+
+        def escribir():
+            with self.lock.escritura():
+                eventos.append('escritura')
+
+        def leer_despues():
+            with self.lock.lectura():
+                eventos.append('lectura_nueva')
+
+        lector = threading.Thread(target=leer_largo)
+        lector.start()
+        leyendo.wait(2)
+        escritor = threading.Thread(target=escribir)
+        escritor.start()
+        time.sleep(0.05)
+        nuevo = threading.Thread(target=leer_despues)
+        nuevo.start()
+        time.sleep(0.05)
+        self.assertEqual(eventos, [])
+
+        soltar_lector.set()
+        for hilo in (lector, escritor, nuevo):
+            hilo.join(2)
+        self.assertEqual(eventos, ['fin_lectura', 'escritura', 'lectura_nueva'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,7 @@ import unittest
 import pandas as pd
 import numpy as np
 from langchain_core.documents import Document
-from src.utils.document_processor import DataProcessor
+from utils.document_processor import DataProcessor
 import json
 
 class TestDataProcessor(unittest.TestCase):
@@ -44,6 +44,16 @@ class TestDataProcessor(unittest.TestCase):
         self.assertIn('categorical_stats', full_summary)
         self.assertIn('correlations', full_summary)
 
+    def test_create_slice_summaries(self):
+        resumenes = DataProcessor.create_slice_summaries(self.df)
+
+        por_segmento = {(d.metadata['dimension'], d.metadata['valor']): d for d in resumenes}
+        self.assertEqual(len(resumenes), 6)  # 3 países y 3 rangos de edad
+        self.assertTrue(all(d.metadata['source'] == "CSV_summary" for d in resumenes))
+        self.assertEqual(por_segmento[('country', 'UK')].metadata['clientes'], 2)
+        self.assertIn("Balance medio: 2,250.62", por_segmento[('country', 'UK')].page_content)
+        self.assertIn(('rango_edad', '30-39'), por_segmento)
+
     def test_create_csv_docs(self):
         csv_docs = DataProcessor.create_csv_docs(self.df)
         self.assertEqual(len(csv_docs), len(self.df))
@@ -4,7 +4,7 @@ import unittest
 import os
 import tempfile
 import pandas as pd
-from src.utils.document_loader import DocumentLoader
+from utils.document_loader import DocumentLoader
 from langchain_core.documents import Document
 
 class TestDocumentLoader(unittest.TestCase):
@@ -2,7 +2,7 @@
 
 import unittest
 from unittest.mock import patch, MagicMock
-from src.utils.document_manager import DocumentManager
+from utils.document_manager import DocumentManager
 from langchain_core.documents import Document
 import pandas as pd
 
@@ -17,8 +17,8 @@ class TestDocumentManager(unittest.TestCase):
         self.assertEqual(self.document_manager.pdf_directory, self.pdf_directory)
         self.assertEqual(self.document_manager.csv_file, self.csv_file)
 
-    @patch('src.utils.document_manager.DocumentLoader')
-    @patch('src.utils.document_manager.DataProcessor')
+    @patch('utils.document_manager.DocumentLoader')
+    @patch('utils.document_manager.DataProcessor')
     def test_load_and_process_documents(self, mock_data_processor, mock_document_loader):
         # Configurar mocks
         mock_pdf_docs = [Document(page_content="PDF1"), Document(page_content="PDF2")]
@@ -47,8 +47,8 @@ class TestDocumentManager(unittest.TestCase):
         expected_result = [mock_csv_summary_doc] + mock_csv_docs + mock_split_docs
         self.assertEqual(result, expected_result)
 
-    @patch('src.utils.document_manager.DocumentLoader')
-    @patch('src.utils.document_manager.DataProcessor')
+    @patch('utils.document_manager.DocumentLoader')
+    @patch('utils.document_manager.DataProcessor')
     def test_load_and_process_documents_empty(self, mock_data_processor, mock_document_loader):
         # Configurar mocks para simular documentos vacíos
         mock_document_loader.load_pdfs.return_value = []
@@ -64,8 +64,8 @@ class TestDocumentManager(unittest.TestCase):
         self.assertEqual(len(result), 1)  # Solo debería contener el resumen del CSV vacío
         self.assertEqual(result[0].page_content, "Empty CSV Summary")
 
-    @patch('src.utils.document_manager.DocumentLoader')
-    @patch('src.utils.document_manager.DataProcessor')
+    @patch('utils.document_manager.DocumentLoader')
+    @patch('utils.document_manager.DataProcessor')
     def test_load_and_process_documents_error_handling(self, mock_data_processor, mock_document_loader):
         # Simular un error al cargar PDFs
         mock_document_loader.load_pdfs.side_effect = Exception("Error loading PDFs")
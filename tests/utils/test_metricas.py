@@ -0,0 +1,100 @@
+# test_metricas.py
+
+import json
+import unittest
+import urllib.error
+import urllib.request
+from utils.metricas import (
+    RegistroMetricas, ServidorMetricas, ETAPAS, TASA_CACHE, etapa, registrar_cache
+)
+from utils.trazas import trazar
+
+
+class TestMetricas(unittest.TestCase):
+
+    def setUp(self):
+        self.registro = RegistroMetricas()
+
+    def test_contador_y_medidor(self):
+        consultas = self.registro.contador("consultas_total", "Consultas", ("modo",))
+        consultas.inc(modo="sincrona")
+        consultas.inc(2, modo="sincrona")
+        self.assertEqual(consultas.valor(modo="sincrona"), 3)
+        self.assertEqual(consultas.valor(modo="lote"), 0)
+        with self.assertRaises(ValueError):
+            consultas.inc(-1, modo="sincrona")
+        with self.assertRaises(ValueError):
+            consultas.inc(ruta="abierta")
+
+        en_curso = self.registro.medidor("en_curso", "En curso")
+        en_curso.inc()
+        en_curso.inc()
+        en_curso.dec()
+        self.assertEqual(en_curso.valor(), 1)
+        en_curso.fijar(7)
+        self.assertEqual(en_curso.valor(), 7)
+
+    def test_registro_reutiliza_metricas(self):
+        contador = self.registro.contador("errores_total", "Errores", ("operacion",))
+        self.assertIs(self.registro.contador("errores_total", "Errores", ("operacion",)), contador)
+        with self.assertRaises(ValueError):
+            self.registro.medidor("errores_total", "Errores", ("operacion",))
+
+    def test_histograma(self):
+        latencia = self.registro.histograma("latencia_segundos", "Latencia", limites=(0.1, 1.0))
+        for valor in (0.05, 0.1, 0.5, 3.0):
+            latencia.observar(valor)
+        resumen = latencia.resumen()
+        self.assertEqual(resumen['n'], 4)
+        self.assertAlmostEqual(resumen['suma'], 3.65)
+        self.assertEqual(resumen['cubetas'], {'0.1': 2, '1': 3, '+Inf': 4})
+        with latencia.medir():
+            pass
+        self.assertEqual(latencia.resumen()['n'], 5)
+
+    def test_formato_prometheus(self):
+        self.registro.contador("consultas_total", "Consultas", ("ruta",)).inc(ruta='filtro "país"')
+        self.registro.histograma("latencia_segundos", "Latencia", limites=(1.0,)).observar(0.5)
+        texto = self.registro.a_prometheus()
+
+        self.assertIn("# TYPE consultas_total counter", texto)
+        self.assertIn('consultas_total{ruta="filtro \\"país\\""} 1', texto)
+        self.assertIn("# TYPE latencia_segundos histogram", texto)
+        self.assertIn('latencia_segundos_bucket{le="1"} 1', texto)
+        self.assertIn('latencia_segundos_bucket{le="+Inf"} 1', texto)
+        self.assertIn("latencia_segundos_sum 0.5", texto)
+        self.assertIn("latencia_segundos_count 1", texto)
+
+    def test_etapa_observa_y_traza(self):
+        antes = ETAPAS.resumen(etapa="prueba.etapa")['n']
+        with etapa("prueba.etapa"):
+            pass
+        with trazar() as traza:
+            with etapa("prueba.etapa", k=2) as medicion:
+                medicion.anotar(documentos=3)
+
+        self.assertEqual(ETAPAS.resumen(etapa="prueba.etapa")['n'], antes + 2)
+        spans = traza.spans()
+        self.assertEqual(len(spans), 1)
+        self.assertEqual(spans[0]['atributos'], {'k': 2, 'documentos': 3})
+
+    def test_tasa_aciertos_cache(self):
+        registrar_cache("prueba", aciertos=3, fallos=1)
+        registrar_cache("prueba", aciertos=0, fallos=4)
+        self.assertAlmostEqual(TASA_CACHE.valor(cache="prueba"), 3 / 8)
+
+    def test_servidor_metricas(self):
+        self.registro.medidor("indice_documentos", "Documentos").fijar(42)
+        with ServidorMetricas(self.registro, puerto=0) as servidor:
+            with urllib.request.urlopen(f"{servidor.url}/metrics") as respuesta:
+                self.assertTrue(respuesta.headers['Content-Type'].startswith("text/plain"))
+                self.assertIn("indice_documentos 42", respuesta.read().decode("utf-8"))
+            with urllib.request.urlopen(f"{servidor.url}/metrics.json") as respuesta:
+                datos = json.loads(respuesta.read())
+            self.assertEqual(datos['indice_documentos']['valores'][0]['valor'], 42)
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{servidor.url}/otra")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,7 @@ import unittest
 from unittest.mock import Mock, patch, mock_open
 import csv
 import io
-from src.utils.test_runner import flatten_dict, run_tests, plot_results
+from utils.test_runner import flatten_dict, run_tests, plot_results
 
 class TestTestRunner(unittest.TestCase):
 
@@ -21,9 +21,9 @@ class TestTestRunner(unittest.TestCase):
         flattened = flatten_dict(nested_dict)
         self.assertEqual(flattened, {'a': 1, 'b_c': 2, 'b_d_e': 3})
 
-    @patch('src.utils.test_runner.EvaluationMetrics')
-    @patch('src.utils.test_runner.open', new_callable=mock_open)
-    @patch('src.utils.test_runner.csv.DictWriter')
+    @patch('utils.test_runner.EvaluationMetrics')
+    @patch('utils.test_runner.open', new_callable=mock_open)
+    @patch('utils.test_runner.csv.DictWriter')
     def test_run_tests(self, mock_csv_writer, mock_file, mock_metrics):
         # Configurar mocks
         mock_rag_system = Mock()
@@ -55,7 +55,7 @@ class TestTestRunner(unittest.TestCase):
         self.assertIn('bleu_score', results[0])
         self.assertIn('rouge_scores_rouge-1', results[0])
 
-    @patch('src.utils.test_runner.plt')
+    @patch('utils.test_runner.plt')
     def test_plot_results(self, mock_plt):
         results = [
             {'bleu_score': 0.8, 'rouge_scores_rouge-1': 0.7, 'rouge_scores_rouge-2': 0.6, 'rouge_scores_rouge-l': 0.75, 'source_relevance': 0.9, 'response_time': 1.0, 'question': 'Q1'},
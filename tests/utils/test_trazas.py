@@ -0,0 +1,98 @@
+# test_trazas.py
+
+import json
+import unittest
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from utils.trazas import (
+    span, trazado, trazar, activar_trazas, desactivar_trazas, en_contexto, traza_activa
+)
+
+
+class TestTrazas(unittest.TestCase):
+
+    def tearDown(self):
+        desactivar_trazas()
+
+    def test_sin_traza_no_registra(self):
+        self.assertIsNone(traza_activa())
+        with span("etapa") as medicion:
+            medicion.anotar(documentos=3)
+        self.assertIs(span("otra"), span("etapa"))
+
+    def test_spans_anidados(self):
+        with trazar("prueba") as traza:
+            with span("consulta") as consulta:
+                with span("consulta.recuperacion", k=4):
+                    pass
+                with span("consulta.generacion"):
+                    pass
+
+        spans = {s['nombre']: s for s in traza.spans()}
+        self.assertEqual(set(spans), {"consulta", "consulta.recuperacion", "consulta.generacion"})
+        self.assertIsNone(spans["consulta"]['padre'])
+        self.assertEqual(spans["consulta.recuperacion"]['padre'], consulta.id)
+        self.assertEqual(spans["consulta.generacion"]['padre'], consulta.id)
+        self.assertEqual(spans["consulta.recuperacion"]['atributos'], {'k': 4})
+        self.assertGreaterEqual(spans["consulta"]['duracion_ns'], spans["consulta.recuperacion"]['duracion_ns'])
+        self.assertIsNone(traza_activa())
+
+    def test_error_queda_en_el_span(self):
+        with trazar() as traza:
+            with self.assertRaises(ValueError):
+                with span("fallo"):
+                    raise ValueError("sin documentos")
+        self.assertIn("sin documentos", traza.spans()[0]['atributos']['error'])
+
+    def test_en_contexto_propaga_a_otros_hilos(self):
+        def subbusqueda(k):
+            with span("subbusqueda", k=k):
+                return k
+
+        with trazar() as traza:
+            with span("recuperacion") as padre:
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    envuelta = en_contexto(subbusqueda)
+                    self.assertEqual(list(pool.map(envuelta, [1, 4])), [1, 4])
+                    # Sin propagar, el hilo del pool no ve la traza del contexto
+                    pool.submit(subbusqueda, 9).result()
+
+        hijos = [s for s in traza.spans() if s['nombre'] == "subbusqueda"]
+        self.assertEqual(sorted(s['atributos']['k'] for s in hijos), [1, 4])
+        self.assertTrue(all(s['padre'] == padre.id for s in hijos))
+
+    def test_traza_global_y_decorador(self):
+        @trazado("gestor_clientes.obtener")
+        def obtener(customer_id):
+            return customer_id
+
+        self.assertEqual(obtener(1), 1)
+        traza = activar_trazas()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            self.assertEqual(pool.submit(obtener, 2).result(), 2)
+        self.assertIs(desactivar_trazas(), traza)
+
+        self.assertEqual([s['nombre'] for s in traza.spans()], ["gestor_clientes.obtener"])
+        self.assertEqual(traza.resumen()["gestor_clientes.obtener"]['llamadas'], 1)
+
+    def test_exportar_chrome(self):
+        with trazar("rag") as traza:
+            with span("csv.cargar", ruta="clientes.csv"):
+                with span("documentos.dividir"):
+                    pass
+
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = traza.exportar_chrome(str(Path(directorio) / "traza.json"))
+            datos = json.loads(ruta.read_text(encoding="utf-8"))
+
+        completos = [e for e in datos['traceEvents'] if e['ph'] == 'X']
+        self.assertEqual([e['name'] for e in completos], ["csv.cargar", "documentos.dividir"])
+        self.assertEqual(completos[0]['args']['ruta'], "clientes.csv")
+        self.assertLessEqual(completos[0]['ts'], completos[1]['ts'])
+        self.assertGreaterEqual(completos[0]['dur'], completos[1]['dur'])
+        self.assertTrue(any(e['name'] == 'thread_name' for e in datos['traceEvents'] if e['ph'] == 'M'))
+
+
+if __name__ == '__main__':
+    unittest.main()